@@ -0,0 +1,142 @@
+import math
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from fastapi import HTTPException, status
+
+from core.config import settings
+from core.logging import logger
+from core.metrics import registry
+
+ADMISSION_SHED = registry.counter(
+    "auth_admission_shed_total", "Login and refresh requests rejected by admission control.",
+    ("endpoint", "reason"))
+ADMISSION_ADMITTED = registry.counter(
+    "auth_admission_admitted_total", "Login and refresh requests admitted.",
+    ("endpoint",))
+
+
+class RateLimiter:
+    """
+    Token buckets keyed by an arbitrary string (client IP, username).
+
+    Each key gets a bucket of `burst` tokens refilled at `rate_per_minute`.
+    At most `max_keys` buckets are kept; the least recently used ones are
+    dropped first, which only ever makes a client less limited.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int, max_keys: int):
+        self.rate = rate_per_minute / 60
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    def acquire(self, key: str, now: float | None = None) -> float:
+        """
+        Take a token from the bucket of `key`.
+
+        :param key: The key to rate limit.
+        :param now: The current monotonic time, for tests.
+        :return: 0 if a token was taken, otherwise the seconds until one is available.
+        :rtype: float
+        """
+        now = time.monotonic() if now is None else now
+        tokens, updated = self._buckets.get(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+
+        if tokens < 1:
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            return (1 - tokens) / self.rate
+
+        self._buckets[key] = (tokens - 1, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return 0.0
+
+
+class LoginAdmission:
+    """
+    Admission control for the login and token refresh endpoints.
+
+    Requests are rate limited per client IP and per username (429 with a
+    Retry-After header), and at most `max_verifications` password verifications
+    run at once; logins beyond that are answered with a 503 right away instead
+    of queueing for the bcrypt pool.
+    """
+
+    def __init__(
+            self, ip_limiter: RateLimiter, username_limiter: RateLimiter,
+            max_verifications: int
+            ):
+        self.ip_limiter = ip_limiter
+        self.username_limiter = username_limiter
+        self.max_verifications = max_verifications
+        self.verifications = 0
+
+    def _shed(self, endpoint: str, reason: str, status_code: int, retry_after: float):
+        ADMISSION_SHED.inc(endpoint, reason)
+        logger.warning(f"Admission control rejected {endpoint} request: {reason}")
+        raise HTTPException(
+            status_code=status_code,
+            detail="Too many requests. Please try again later."
+            if status_code == status.HTTP_429_TOO_MANY_REQUESTS
+            else "Server is busy. Please try again later.",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+
+    def check_rate(
+            self, endpoint: str, client_ip: str | None, username: str | None = None
+            ) -> None:
+        """
+        Take a token from the client IP's and the username's buckets.
+
+        :param endpoint: The endpoint name, used as a metric label and bucket namespace.
+        :param client_ip: The client's IP address, if known.
+        :param username: The username or email the request is for, if any.
+        :raises HTTPException: 429 if either bucket is empty.
+        """
+        if client_ip:
+            retry_after = self.ip_limiter.acquire(f"{endpoint}:{client_ip}")
+            if retry_after:
+                self._shed(endpoint, "ip_rate", status.HTTP_429_TOO_MANY_REQUESTS, retry_after)
+        if username:
+            retry_after = self.username_limiter.acquire(f"{endpoint}:{username.lower()}")
+            if retry_after:
+                self._shed(
+                    endpoint, "username_rate", status.HTTP_429_TOO_MANY_REQUESTS, retry_after)
+        ADMISSION_ADMITTED.inc(endpoint)
+
+    @asynccontextmanager
+    async def verification_slot(self, endpoint: str) -> AsyncIterator[None]:
+        """
+        Hold one of the password verification slots.
+
+        :param endpoint: The endpoint name, used as a metric label.
+        :raises HTTPException: 503 if all slots are taken.
+        """
+        if self.verifications >= self.max_verifications:
+            self._shed(endpoint, "overloaded", status.HTTP_503_SERVICE_UNAVAILABLE, 1)
+        self.verifications += 1
+        try:
+            yield
+        finally:
+            self.verifications -= 1
+
+
+login_admission = LoginAdmission(
+    ip_limiter=RateLimiter(
+        settings.login_ip_rate_per_minute, settings.login_ip_burst,
+        settings.admission_max_tracked_keys),
+    username_limiter=RateLimiter(
+        settings.login_username_rate_per_minute, settings.login_username_burst,
+        settings.admission_max_tracked_keys),
+    max_verifications=settings.login_max_concurrent_verifications,
+)
+
+registry.gauge(
+    "auth_password_verifications_in_flight", "Login password verifications running or queued.",
+    callback=lambda: {(): login_admission.verifications})
@@ -8,6 +8,8 @@ from sqlalchemy import select
 from models import User, UserRole
 from core.db_handler import db_handler
 from .jwt_utils import jwt_manager
+from .principal_cache import Principal, principal_cache
+from .revocation import revocation_store
 
 security = HTTPBearer()
 
@@ -15,16 +17,20 @@ security = HTTPBearer()
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     session: AsyncSession = Depends(db_handler.session_dependency)
-) -> User:
+) -> Principal:
     """
-    Fetch the currently authenticated user from the database.
+    Fetch the principal of the currently authenticated user.
 
     This function first verifies the JWT token provided in the Authorization header,
-    and then uses the user ID extracted from the token to fetch the user from the database.
-    If the token is invalid, or if the user is not found or is inactive,
+    and then uses the user ID extracted from the token to look up the user's principal
+    in the principal cache, falling back to the database on a miss.
+    If the token is invalid or revoked, was issued before the user's tokens_valid_after
+    watermark, or if the user is not found or is inactive,
     an HTTPException is raised with a 401 Unauthorized status code.
 
-    :return: The currently authenticated user.
+    Endpoints that need the full user row should depend on `get_current_user_record`.
+
+    :return: The principal of the currently authenticated user.
     :raises HTTPException: If the token is invalid, or if the user is not found or is inactive.
     """
     credentials_exception = HTTPException(
@@ -61,27 +67,66 @@ async def get_current_user(
                 detail="Invalid token type"
             )
 
+        # Check that the token was not revoked (e.g. on logout or password change)
+        if revocation_store.is_revoked(payload.get("jti")):
+            raise credentials_exception
+        if not revocation_store.accepts_token(user_id, payload.get("iat")):
+            raise credentials_exception
+
     except Exception:
         raise credentials_exception
 
-    # Fetch user from database
-    user = await session.get(User, user_id)
-    if user is None:
-        raise credentials_exception
-    if not user.is_active:
+    # Fetch user from the cache or the database
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        user = await session.get(User, user_id)
+        if user is None:
+            raise credentials_exception
+        principal = Principal.from_user(user)
+        principal_cache.set(principal)
+
+    if not principal.is_active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Account has been deactivated"
         )
 
+    # Reject tokens issued before e.g. the last password change
+    if not principal.accepts_token_issued_at(payload.get("iat")):
+        raise credentials_exception
+
+    return principal
+
+
+async def get_current_user_record(
+    current_user: Principal = Depends(get_current_user),
+    session: AsyncSession = Depends(db_handler.session_dependency)
+) -> User:
+    """
+    Fetch the currently authenticated user from the database.
+
+    Used by endpoints that read or change fields of the user that are not part of
+    the principal (profile, password hash).
+
+    :return: The currently authenticated user.
+    :raises HTTPException: If the user no longer exists.
+    """
+    user = await session.get(User, current_user.id)
+    if user is None:
+        principal_cache.invalidate(current_user.id)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return user
 
 
 async def get_current_active_user(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: Principal = Depends(get_current_user)
+) -> Principal:
     """
-    Fetch the currently authenticated user from the database, but only if the user is active.
+    Fetch the principal of the currently authenticated user, but only if the user is active.
 
     This function first fetches the currently authenticated user using the `get_current_user`
     dependency, and then checks if the user is active. If the user is inactive,
@@ -99,10 +144,10 @@ async def get_current_active_user(
 
 
 async def get_admin_user(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: Principal = Depends(get_current_user)
+) -> Principal:
     """
-    Fetch the currently authenticated user from the database, but only if the user is an administrator.
+    Fetch the principal of the currently authenticated user, but only if the user is an administrator.
 
     This function first fetches the currently authenticated user using the `get_current_user`
     dependency, and then checks if the user is an administrator. If the user is not an administrator,
@@ -119,6 +164,62 @@ async def get_admin_user(
     return current_user
 
 
+async def get_admin_claims(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> Principal:
+    """
+    Authorize an administrator from the signed claims of the access token alone.
+
+    A claims-only alternative to `get_admin_user` for read-only admin endpoints:
+    the role comes from the token's `role` claim, and the active/revoked check
+    uses only in-memory state (the revocation store with its tokens_valid_after
+    watermarks, and the principal cache if the user is cached). The database is
+    never queried. Deactivations and password changes are picked up within
+    token_revocation_refresh_seconds; a role change only once the token expires.
+
+    :return: A principal built from the token claims.
+    :raises HTTPException: 401 if the token is invalid, revoked or issued before the
+        user's watermark, or the user is known to be inactive; 403 if the user is
+        not an administrator.
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+    payload = jwt_manager.verify_token(credentials.credentials)
+    if payload is None or payload.get("type") != "access":
+        raise credentials_exception
+
+    try:
+        user_id = UUID(payload.get("user_id"))
+    except (ValueError, TypeError, AttributeError):
+        raise credentials_exception
+
+    if revocation_store.is_revoked(payload.get("jti")):
+        raise credentials_exception
+    if not revocation_store.accepts_token(user_id, payload.get("iat")):
+        raise credentials_exception
+
+    cached = principal_cache.get(user_id)
+    if cached is not None and not cached.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Account has been deactivated"
+        )
+
+    if payload.get("role") != UserRole.ADMIN.value:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+
+    return Principal(
+        id=user_id, username=payload.get("username"),
+        role=UserRole.ADMIN, is_active=True)
+
+
 async def get_optional_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False)),
     session: AsyncSession = Depends(db_handler.session_dependency)
@@ -1,12 +1,16 @@
+import hashlib
 import jwt
 import logging
+import time
 
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict, Any
 from jwt.exceptions import InvalidTokenError
-from uuid import UUID
+from uuid import UUID, uuid4
 
 from core.config import settings
+from core.metrics import registry
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +21,11 @@ class JWTManager:
         self.algorithm = settings.jwt_algorithm
         self.access_token_expire_minutes = settings.jwt_access_token_expire_minutes
         self.refresh_token_expire_days = settings.jwt_refresh_token_expire_days
+        self.verified_cache_size = settings.jwt_verified_cache_size
+        self.verified_cache_hits = 0
+        self.verified_cache_misses = 0
+        # Token digest -> (exp, decoded claims), least recently used first
+        self._verified: OrderedDict[bytes, tuple[float, Dict[str, Any]]] = OrderedDict()
 
     def create_access_token(
             self, data: Dict[str, Any],
@@ -47,6 +56,7 @@ class JWTManager:
             {
                 "exp": expire,
                 "iat": datetime.now(timezone.utc),  # Issued at
+                "jti": uuid4().hex,  # Token ID, used for revocation
                 "type": "access"
             }
         )
@@ -74,6 +84,7 @@ class JWTManager:
             {
                 "exp": expire,
                 "iat": datetime.now(timezone.utc),  # Issued at
+                "jti": uuid4().hex,  # Token ID, used for revocation
                 "type": "refresh"
             }
         )
@@ -87,17 +98,54 @@ class JWTManager:
         Attempts to decode the token using the configured secret key and algorithm.
         If the token is invalid, logs a warning and returns None.
 
+        The claims of verified tokens are cached by the token's SHA-256 digest until
+        the token expires, so a token that is sent with many requests is only decoded
+        and signature-checked once. At most verified_cache_size tokens are cached,
+        the least recently used ones are evicted first.
+
         :param token: The token to verify.
         :return: The decoded payload if the token is valid, otherwise None.
         :rtype: Optional[Dict[str, Any]]
         """
+        digest = hashlib.sha256(token.encode("utf-8")).digest()
+        cached = self._verified.get(digest)
+        if cached is not None:
+            if cached[0] > time.time():
+                self._verified.move_to_end(digest)
+                self.verified_cache_hits += 1
+                return dict(cached[1])
+            del self._verified[digest]
+        self.verified_cache_misses += 1
+
         try:
             payload: dict = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
-            return payload
         except InvalidTokenError as e:
             logger.warning(f"Invalid token: {e}")
             return None
 
+        exp = payload.get("exp")
+        if self.verified_cache_size > 0 and isinstance(exp, (int, float)):
+            self._verified[digest] = (exp, payload)
+            while len(self._verified) > self.verified_cache_size:
+                self._verified.popitem(last=False)
+            payload = dict(payload)
+        return payload
+
+    def verified_cache_stats(self) -> Dict[str, int]:
+        """
+        Get the counters of the verified token cache.
+
+        :return: A dictionary with the number of cached tokens, the cache capacity,
+            and the hits and misses since startup.
+        :rtype: Dict[str, int]
+        """
+        return {
+            "size": len(self._verified),
+            "max_size": self.verified_cache_size,
+            "hits": self.verified_cache_hits,
+            "misses": self.verified_cache_misses,
+        }
+
     def is_token_expired(self, token: str) -> bool:
         """
         Checks if a given token has expired.
@@ -120,3 +168,10 @@ class JWTManager:
 
 
 jwt_manager = JWTManager()
+
+registry.gauge(
+    "jwt_verified_cache_hits", "Verified token cache hits since startup.",
+    callback=lambda: {(): jwt_manager.verified_cache_hits})
+registry.gauge(
+    "jwt_verified_cache_misses", "Verified token cache misses since startup.",
+    callback=lambda: {(): jwt_manager.verified_cache_misses})
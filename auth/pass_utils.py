@@ -1,9 +1,36 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
 import bcrypt
 
+from core.config import settings
+from core.metrics import PASSWORD_HASH_SECONDS, registry
+
+T = TypeVar("T")
+
 
 class PasswordUtils:
-    @staticmethod
-    def hash_password(password: str) -> str:
+    """
+    bcrypt password hashing.
+
+    The `*_async` methods run bcrypt on a dedicated pool of
+    `password_hash_workers` threads (bcrypt releases the GIL), so hashing never
+    blocks the event loop and at most that many hashes run at once; further
+    calls wait in the pool's queue.
+    """
+
+    def __init__(self, rounds: int, workers: int):
+        self.rounds = rounds
+        self.workers = workers
+        self.queued = 0
+        self.running = 0
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def hash_password(self, password: str) -> str:
         """
         Hashes a given password using bcrypt.
 
@@ -12,8 +39,10 @@ class PasswordUtils:
         :return: The hashed password
         :rtype: str
         """
-        salt = bcrypt.gensalt()
+        started = time.perf_counter()
+        salt = bcrypt.gensalt(rounds=self.rounds)
         hashed = bcrypt.hashpw(password.encode("utf-8"), salt)
+        PASSWORD_HASH_SECONDS.observe(time.perf_counter() - started, "hash")
         return hashed.decode("utf-8")
 
     @staticmethod
@@ -28,9 +57,91 @@ class PasswordUtils:
         :return: Whether the plaintext password matches the hashed password
         :rtype: bool
         """
-        return bcrypt.checkpw(
-            plain_password.encode("utf-8"),
-            hashed_password.encode("utf-8"))
+        started = time.perf_counter()
+        try:
+            return bcrypt.checkpw(
+                plain_password.encode("utf-8"),
+                hashed_password.encode("utf-8"))
+        finally:
+            PASSWORD_HASH_SECONDS.observe(time.perf_counter() - started, "verify")
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """
+        Checks whether a hash was made with a different cost factor than the configured one.
+
+        :param hashed_password: The hashed password, e.g. `$2b$12$...`
+        :type hashed_password: str
+        :return: Whether the password should be hashed again
+        :rtype: bool
+        """
+        try:
+            return int(hashed_password.split("$")[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+    async def _run(self, func: Callable[..., T], *args) -> T:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="bcrypt")
+
+        # Whoever leaves the queue first takes the call off `queued`: the worker
+        # when it starts, or the caller when it's cancelled before that
+        dequeued = False
+
+        def dequeue() -> None:
+            nonlocal dequeued
+            if not dequeued:
+                dequeued = True
+                self.queued -= 1
+
+        def run() -> T:
+            with self._lock:
+                dequeue()
+                self.running += 1
+            try:
+                return func(*args)
+            finally:
+                with self._lock:
+                    self.running -= 1
+
+        with self._lock:
+            self.queued += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, run)
+        finally:
+            with self._lock:
+                dequeue()
+
+    async def hash_password_async(self, password: str) -> str:
+        """
+        Hashes a given password on the bcrypt worker pool.
+
+        :param password: The password to hash
+        :type password: str
+        :return: The hashed password
+        :rtype: str
+        """
+        return await self._run(self.hash_password, password)
+
+    async def verify_password_async(self, plain_password: str, hashed_password: str) -> bool:
+        """
+        Verifies a given plaintext password against a hashed password on the bcrypt worker pool.
+
+        :param plain_password: The plaintext password to verify
+        :type plain_password: str
+        :param hashed_password: The hashed password to verify against
+        :type hashed_password: str
+        :return: Whether the plaintext password matches the hashed password
+        :rtype: bool
+        """
+        return await self._run(self.verify_password, plain_password, hashed_password)
+
 
+pwd_utils = PasswordUtils(settings.bcrypt_rounds, settings.password_hash_workers)
 
-pwd_utils = PasswordUtils()
+registry.gauge(
+    "password_hash_queue_depth", "bcrypt calls waiting for a worker thread.",
+    callback=lambda: {(): pwd_utils.queued})
+registry.gauge(
+    "password_hash_running", "bcrypt calls currently running.",
+    callback=lambda: {(): pwd_utils.running})
@@ -0,0 +1,137 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import timezone
+from uuid import UUID
+
+from models import User, UserRole
+from core.config import settings
+from core.metrics import registry
+
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    The fields of an authenticated user that authorization needs.
+    """
+    id: UUID
+    username: str
+    role: UserRole
+    is_active: bool
+    # POSIX time before which issued tokens are rejected
+    tokens_valid_after: float | None = None
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        tokens_valid_after = None
+        if user.tokens_valid_after is not None:
+            tokens_valid_after = user.tokens_valid_after.replace(
+                tzinfo=timezone.utc).timestamp()
+        return cls(
+            id=user.id, username=user.username,
+            role=user.role, is_active=user.is_active,
+            tokens_valid_after=tokens_valid_after)
+
+    def accepts_token_issued_at(self, issued_at: float | None) -> bool:
+        """
+        Check a token's `iat` claim against the user's tokens_valid_after watermark.
+
+        :param issued_at: The `iat` claim of the token.
+        :return: Whether a token issued at that time is still valid.
+        :rtype: bool
+        """
+        if self.tokens_valid_after is None:
+            return True
+        return issued_at is not None and issued_at >= self.tokens_valid_after
+
+
+class PrincipalCache:
+    """
+    An in-process TTL and LRU cache of principals keyed by user ID.
+
+    Entries expire `ttl_seconds` after they were stored, and the least recently
+    used entry is evicted once `max_size` entries are cached. Endpoints that
+    change a user's username, role, activity or password must call `invalidate`
+    after committing; other workers pick the change up when the entry expires.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[UUID, tuple[float, Principal]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, user_id: UUID) -> Principal | None:
+        """
+        Get the cached principal of a user.
+
+        :param user_id: The ID of the user.
+        :return: The principal, or None if it isn't cached or has expired.
+        :rtype: Principal | None
+        """
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[user_id]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, principal: Principal) -> None:
+        """
+        Cache a principal, evicting the least recently used one if the cache is full.
+
+        :param principal: The principal to cache.
+        """
+        self._entries[principal.id] = (time.monotonic() + self.ttl_seconds, principal)
+        self._entries.move_to_end(principal.id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: UUID) -> None:
+        """
+        Drop the cached principal of a user.
+
+        :param user_id: The ID of the user.
+        """
+        self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        """Drop every cached principal."""
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        """
+        Get the cache counters.
+
+        :return: A dictionary with the number of cached principals, the cache
+            capacity, and the hits and misses since startup.
+        :rtype: dict
+        """
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+principal_cache = PrincipalCache(
+    settings.principal_cache_size, settings.principal_cache_ttl_seconds)
+
+registry.gauge(
+    "principal_cache_hits", "Principal cache hits since startup.",
+    callback=lambda: {(): principal_cache.hits})
+registry.gauge(
+    "principal_cache_misses", "Principal cache misses since startup.",
+    callback=lambda: {(): principal_cache.misses})
+registry.gauge(
+    "principal_cache_size", "Principals currently cached.",
+    callback=lambda: {(): len(principal_cache)})
@@ -0,0 +1,220 @@
+import hashlib
+import time
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import RevokedToken, User
+from core.config import settings
+from core.db_handler import db_handler
+from core.logging import logger
+from core.metrics import registry
+
+
+class BloomFilter:
+    """
+    A fixed-size Bloom filter of strings.
+
+    `might_contain` never returns a false negative; false positives are
+    possible and must be confirmed elsewhere.
+    """
+
+    def __init__(self, size_bits: int, hashes: int):
+        self.size_bits = size_bits
+        self.hashes = hashes
+        self._bits = bytearray((size_bits + 7) // 8)
+
+    def _positions(self, value: str):
+        digest = hashlib.blake2b(value.encode("utf-8"), digest_size=8 * self.hashes).digest()
+        for i in range(self.hashes):
+            yield int.from_bytes(digest[8 * i:8 * i + 8], "little") % self.size_bits
+
+    def add(self, value: str) -> None:
+        for position in self._positions(value):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def might_contain(self, value: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(value)
+        )
+
+
+class RevocationStore:
+    """
+    The set of revoked token IDs (`jti` claims).
+
+    The `revoked_tokens` table is the source of truth. Every worker mirrors it
+    in memory: a Bloom filter answers the common "not revoked" case without
+    touching the exact set, which confirms the rare positives. Revocations made
+    by other workers become visible after at most token_revocation_refresh_seconds.
+
+    The recent `users.tokens_valid_after` watermarks (set on password change and
+    deactivation) are mirrored the same way, so access tokens can be checked
+    against them without loading the user.
+    """
+    # Rows are re-read this long after their creation, so rows committed out of
+    # order by other workers are not missed
+    REFRESH_OVERLAP = timedelta(minutes=1)
+
+    def __init__(self, bloom_bits: int, bloom_hashes: int):
+        self.bloom_bits = bloom_bits
+        self.bloom_hashes = bloom_hashes
+        self._bloom = BloomFilter(bloom_bits, bloom_hashes)
+        # jti -> expiry as a POSIX timestamp
+        self._revoked: dict[str, float] = {}
+        # user ID -> tokens_valid_after as a POSIX timestamp
+        self._watermarks: dict[UUID, float] = {}
+        self._refreshed_until: datetime | None = None
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    def _add(self, jti: str, expires_at: float) -> None:
+        if jti not in self._revoked:
+            self._bloom.add(jti)
+        self._revoked[jti] = expires_at
+
+    def is_revoked(self, jti: str | None) -> bool:
+        """
+        Check whether a token ID was revoked.
+
+        :param jti: The `jti` claim of the token; tokens without one are never revoked.
+        :return: Whether the token was revoked.
+        :rtype: bool
+        """
+        if not jti or not self._bloom.might_contain(jti):
+            return False
+        return jti in self._revoked
+
+    def accepts_token(self, user_id: UUID, issued_at: float | None) -> bool:
+        """
+        Check a token's `iat` claim against the user's mirrored tokens_valid_after watermark.
+
+        :param user_id: The ID of the token's user.
+        :param issued_at: The `iat` claim of the token.
+        :return: Whether a token issued at that time is still valid.
+        :rtype: bool
+        """
+        watermark = self._watermarks.get(user_id)
+        if watermark is None:
+            return True
+        return issued_at is not None and issued_at >= watermark
+
+    def invalidate_user_tokens(self, user: User) -> None:
+        """
+        Reject every token issued to a user so far.
+
+        Sets the user's tokens_valid_after watermark (to be committed by the caller)
+        and applies it in this worker right away.
+
+        :param user: The user whose tokens are invalidated.
+        """
+        # Token iat claims have whole-second precision
+        now = datetime.utcnow().replace(microsecond=0)
+        user.tokens_valid_after = now
+        self._watermarks[user.id] = now.replace(tzinfo=timezone.utc).timestamp()
+
+    async def revoke(
+            self, session: AsyncSession, jti: str, user_id: UUID, expires_at: int
+            ) -> None:
+        """
+        Revoke a token until it expires.
+
+        :param session: The database session to use; the revocation is committed.
+        :param jti: The `jti` claim of the token.
+        :param user_id: The ID of the token's user.
+        :param expires_at: The `exp` claim of the token.
+        """
+        stmt = (
+            insert(RevokedToken)
+            .values(
+                jti=jti, user_id=user_id,
+                expires_at=datetime.fromtimestamp(expires_at, tz=timezone.utc).replace(tzinfo=None)
+            )
+            .on_conflict_do_nothing(index_elements=[RevokedToken.jti])
+        )
+        await session.execute(stmt)
+        await session.commit()
+        self._add(jti, expires_at)
+
+    async def refresh(self) -> int:
+        """
+        Load the revocations made since the last refresh (all of them on the first call),
+        and the watermarks that can still affect unexpired access tokens.
+
+        :return: The number of revocation rows read.
+        :rtype: int
+        """
+        started = datetime.utcnow()
+        stmt = select(RevokedToken.jti, RevokedToken.expires_at).where(
+            RevokedToken.expires_at > started)
+        if self._refreshed_until is not None:
+            stmt = stmt.where(
+                RevokedToken.created_at >= self._refreshed_until - self.REFRESH_OVERLAP)
+
+        watermark_cutoff = started - timedelta(minutes=settings.jwt_access_token_expire_minutes)
+        watermarks_stmt = select(User.id, User.tokens_valid_after).where(
+            User.tokens_valid_after > watermark_cutoff)
+
+        async with db_handler.async_session_factory() as session:
+            rows = (await session.execute(stmt)).all()
+            watermark_rows = (await session.execute(watermarks_stmt)).all()
+
+        for jti, expires_at in rows:
+            self._add(jti, expires_at.replace(tzinfo=timezone.utc).timestamp())
+        for user_id, tokens_valid_after in watermark_rows:
+            timestamp = tokens_valid_after.replace(tzinfo=timezone.utc).timestamp()
+            self._watermarks[user_id] = max(timestamp, self._watermarks.get(user_id, 0))
+        self._refreshed_until = started
+        return len(rows)
+
+    def prune(self) -> int:
+        """
+        Drop expired token IDs from memory and rebuild the Bloom filter.
+
+        Watermarks older than the access token lifetime are dropped as well.
+
+        :return: The number of token IDs dropped.
+        :rtype: int
+        """
+        now = time.time()
+        live = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+        dropped = len(self._revoked) - len(live)
+        self._bloom = BloomFilter(self.bloom_bits, self.bloom_hashes)
+        self._revoked = {}
+        for jti, expires_at in live.items():
+            self._add(jti, expires_at)
+
+        watermark_cutoff = now - settings.jwt_access_token_expire_minutes * 60
+        self._watermarks = {
+            user_id: watermark for user_id, watermark in self._watermarks.items()
+            if watermark > watermark_cutoff
+        }
+        return dropped
+
+    async def delete_expired(self) -> int:
+        """
+        Delete the rows of expired tokens.
+
+        :return: The number of rows deleted.
+        :rtype: int
+        """
+        async with db_handler.async_session_factory() as session:
+            result = await session.execute(
+                delete(RevokedToken).where(RevokedToken.expires_at <= datetime.utcnow()))
+            await session.commit()
+        if result.rowcount:
+            logger.info(f"Deleted {result.rowcount} expired revoked tokens.")
+        return result.rowcount
+
+
+revocation_store = RevocationStore(
+    settings.token_revocation_bloom_bits, settings.token_revocation_bloom_hashes)
+
+registry.gauge(
+    "revoked_tokens", "Unexpired revoked tokens mirrored in memory.",
+    callback=lambda: {(): len(revocation_store)})
@@ -0,0 +1,270 @@
+import re
+from datetime import datetime
+from typing import Collection, Iterable
+
+from sqlalchemy import delete, func, or_, select, union_all
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import City, Route, RouteStatus
+from core.config import settings
+from core.db_handler import db_handler
+from core.metrics import registry
+
+# Rows per upsert statement of sync_cities
+CITY_UPSERT_BATCH_SIZE = 1000
+
+_WORD_START = re.compile(r"(?:^|(?<=[\s\-']))\w")
+
+
+def normalize_city(name: str) -> str:
+    """
+    Normalize a city name or query for matching: case-folded, single spaces.
+    """
+    return " ".join(name.casefold().split())
+
+
+class _TrieNode:
+    __slots__ = ("children", "top")
+
+    def __init__(self):
+        self.children: dict[str, "_TrieNode"] = {}
+        # Best ranked cities at or below this node, best first
+        self.top: list[str] = []
+
+
+class CityTrie:
+    """
+    An immutable prefix trie over city names.
+
+    Every word of a name is indexed, so "york" suggests "New York". Cities are
+    inserted from the best to the worst ranked (most routes first), and every
+    node keeps the first `max_results` cities that pass through it, so a lookup
+    only walks the query and never the subtree below it.
+    """
+
+    def __init__(self, cities: Iterable[tuple[str, int]], max_results: int):
+        self.max_results = max_results
+        self._root = _TrieNode()
+        self._route_counts: dict[str, int] = {}
+
+        for name, route_count in sorted(cities, key=lambda city: (-city[1], city[0])):
+            self._route_counts[name] = route_count
+            self._insert(name)
+
+    def __len__(self) -> int:
+        return len(self._route_counts)
+
+    def _insert(self, name: str) -> None:
+        key = normalize_city(name)
+        for match in _WORD_START.finditer(key):
+            node = self._root
+            self._add_to_top(node, name)
+            for char in key[match.start():]:
+                node = node.children.setdefault(char, _TrieNode())
+                self._add_to_top(node, name)
+
+    def _add_to_top(self, node: _TrieNode, name: str) -> None:
+        if len(node.top) < self.max_results and name not in node.top:
+            node.top.append(name)
+
+    def suggest(self, query: str, limit: int) -> list[tuple[str, int]]:
+        """
+        Get the best ranked cities with a word starting with `query`.
+
+        :param query: The text typed so far.
+        :param limit: The maximum number of suggestions, at most `max_results`.
+        :return: (name, route count) pairs, best first.
+        """
+        node = self._root
+        for char in normalize_city(query):
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return [(name, self._route_counts[name]) for name in node.top[:limit]]
+
+
+def _route_city_names(names: Collection[str] | None = None):
+    """
+    The origin and destination city names of the routes that aren't deleted, one
+    row per route and end, optionally only those in `names`.
+    """
+    origins = select(Route.origin_city.label("name")).where(Route.status != RouteStatus.DELETED)
+    destinations = (
+        select(Route.destination_city.label("name"))
+        .where(Route.status != RouteStatus.DELETED)
+    )
+    if names is not None:
+        origins = origins.where(Route.origin_city.in_(names))
+        destinations = destinations.where(Route.destination_city.in_(names))
+    return union_all(origins, destinations).subquery()
+
+
+async def sync_cities(
+        session: AsyncSession, names: Collection[str] | None = None
+        ) -> dict[str, int]:
+    """
+    Bring the cities table in line with the origin and destination cities of the
+    routes that aren't deleted. Doesn't commit.
+
+    The route counts are aggregated in the database; search_name is computed with
+    `normalize_city`, the normalization the lookups use, and the rows are upserted
+    in batches of CITY_UPSERT_BATCH_SIZE.
+
+    :param session: The database session to use.
+    :param names: Only sync these cities (e.g. the old and new cities of a changed
+        route), which keeps the statements on the indexes; all of them when None.
+    :return: The route counts of the served cities among `names` (or of all of them).
+    :rtype: dict[str, int]
+    """
+    names_query = _route_city_names(names)
+    result = await session.execute(
+        select(names_query.c.name, func.count()).group_by(names_query.c.name))
+    route_counts = dict(result.tuples().all())
+
+    now = datetime.utcnow()
+    rows = [
+        {
+            "name": name,
+            "search_name": normalize_city(name),
+            "route_count": route_count,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for name, route_count in route_counts.items()
+    ]
+    for offset in range(0, len(rows), CITY_UPSERT_BATCH_SIZE):
+        stmt = insert(City).values(rows[offset:offset + CITY_UPSERT_BATCH_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[City.name],
+            set_={
+                "search_name": stmt.excluded.search_name,
+                "route_count": stmt.excluded.route_count,
+                "updated_at": stmt.excluded.updated_at,
+            },
+            where=or_(
+                City.route_count != stmt.excluded.route_count,
+                City.search_name != stmt.excluded.search_name,
+            ),
+        )
+        await session.execute(stmt)
+
+    if names is None:
+        stale = delete(City).where(City.name.not_in(select(names_query.c.name)))
+    else:
+        stale = delete(City).where(City.name.in_(set(names).difference(route_counts)))
+    await session.execute(stale)
+    return route_counts
+
+
+async def sync_route_cities(session: AsyncSession, names: Collection[str]) -> dict[str, int]:
+    """
+    Sync the given cities of changed routes and return their route counts.
+    Doesn't commit; pass the result to `city_index.update` after committing.
+
+    The routes must already be flushed to the database.
+
+    :param session: The database session of the route change.
+    :param names: The cities the change added or removed.
+    :return: The route counts by city name, 0 for cities no longer served.
+    :rtype: dict[str, int]
+    """
+    route_counts = dict.fromkeys(names, 0)
+    route_counts.update(await sync_cities(session, route_counts.keys()))
+    return route_counts
+
+
+async def search_cities(session: AsyncSession, query: str, limit: int) -> list[tuple[str, int]]:
+    """
+    Fuzzy search of cities by trigram similarity, for queries the trie can't match
+    (e.g. typos). Uses the trigram index on cities.
+
+    :param session: The database session to use.
+    :param query: The text typed so far.
+    :param limit: The maximum number of results.
+    :return: (name, route count) pairs, most similar first.
+    """
+    search_name = normalize_city(query)
+    result = await session.execute(
+        select(City.name, City.route_count)
+        .where(City.search_name.op("%")(search_name))
+        .order_by(
+            func.similarity(City.search_name, search_name).desc(),
+            City.route_count.desc(),
+        )
+        .limit(limit)
+    )
+    return [(name, route_count) for name, route_count in result.all()]
+
+
+class CityIndex:
+    """
+    The in-memory city autocomplete of this worker.
+
+    The trie is rebuilt and swapped in whole, so lookups never see a half-built
+    trie. Workers apply the cities of their own route changes in memory and
+    reload the cities table every city_index_refresh_seconds to pick up changes
+    made by other workers.
+    """
+
+    def __init__(self, max_results: int):
+        self._route_counts: dict[str, int] = {}
+        self._trie = CityTrie((), max_results)
+
+    def __len__(self) -> int:
+        return len(self._trie)
+
+    def suggest(self, query: str, limit: int) -> list[tuple[str, int]]:
+        return self._trie.suggest(query, limit)
+
+    def _build(self, route_counts: dict[str, int]) -> None:
+        self._trie = CityTrie(route_counts.items(), self._trie.max_results)
+        self._route_counts = route_counts
+
+    async def load(self) -> int:
+        """
+        Rebuild the trie from the cities table.
+
+        :return: The number of cities loaded.
+        :rtype: int
+        """
+        async with db_handler.async_session_factory() as session:
+            result = await session.execute(select(City.name, City.route_count))
+            route_counts = dict(result.tuples().all())
+
+        self._build(route_counts)
+        return len(route_counts)
+
+    async def rebuild(self) -> int:
+        """
+        Sync the whole cities table with the routes and reload the trie.
+
+        :return: The number of cities loaded.
+        :rtype: int
+        """
+        async with db_handler.async_session_factory() as session:
+            await sync_cities(session)
+            await session.commit()
+        return await self.load()
+
+    def update(self, route_counts: dict[str, int]) -> None:
+        """
+        Apply the route counts of changed cities (from `sync_route_cities`) without
+        reading the cities table; cities with a count of 0 are removed.
+
+        :param route_counts: The new route counts by city name.
+        """
+        merged = dict(self._route_counts)
+        for name, route_count in route_counts.items():
+            if route_count:
+                merged[name] = route_count
+            else:
+                merged.pop(name, None)
+        self._build(merged)
+
+
+city_index = CityIndex(settings.city_suggest_max_limit)
+
+registry.gauge(
+    "city_index_cities", "Cities in the in-memory autocomplete trie.",
+    callback=lambda: {(): len(city_index)})
@@ -0,0 +1,228 @@
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Iterable
+from uuid import UUID
+
+from fastapi import Request, Response, status
+from sqlalchemy import Select, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Route
+from core.config import settings
+from core.metrics import registry
+
+
+@dataclass(frozen=True)
+class RouteVersion:
+    version: int
+    updated_at: datetime
+
+
+class RouteVersionCache:
+    """
+    An in-process TTL and LRU cache of route versions keyed by route ID.
+
+    Route.version is incremented in the same transaction as every change to a
+    route or to its departures (see `bump_route_versions`), so the version
+    identifies the state of everything the route-scoped catalog endpoints
+    return. Writers call `invalidate` after committing; other workers pick the
+    change up when the entry expires after `ttl_seconds`.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[UUID, tuple[float, RouteVersion]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, session: AsyncSession, route_id: UUID) -> RouteVersion | None:
+        """
+        Get the version of a route, from the cache or else from the database.
+
+        :param session: The database session to use on a cache miss.
+        :param route_id: The ID of the route.
+        :return: The version, or None if the route doesn't exist.
+        :rtype: RouteVersion | None
+        """
+        entry = self._entries.get(route_id)
+        if entry is not None and entry[0] > time.monotonic():
+            self._entries.move_to_end(route_id)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        result = await session.execute(
+            select(Route.version, Route.updated_at).where(Route.id == route_id))
+        row = result.one_or_none()
+        if row is None:
+            self._entries.pop(route_id, None)
+            return None
+
+        version = RouteVersion(row.version, row.updated_at)
+        self._entries[route_id] = (time.monotonic() + self.ttl_seconds, version)
+        self._entries.move_to_end(route_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return version
+
+    def invalidate(self, route_ids: Iterable[UUID]) -> None:
+        """
+        Drop the cached versions of routes.
+
+        :param route_ids: The IDs of the routes.
+        """
+        for route_id in route_ids:
+            self._entries.pop(route_id, None)
+
+
+async def bump_route_versions(
+        session: AsyncSession, route_ids: Iterable[UUID]
+        ) -> dict[UUID, RouteVersion]:
+    """
+    Increment the version of routes whose data or departures changed. Doesn't
+    commit; call `route_versions.invalidate` after committing.
+
+    :param session: The database session of the write.
+    :param route_ids: The IDs of the changed routes.
+    :return: The new versions by route ID, from the UPDATE's RETURNING clause.
+    :rtype: dict[UUID, RouteVersion]
+    """
+    route_ids = set(route_ids)
+    if not route_ids:
+        return {}
+    result = await session.execute(
+        update(Route)
+        .where(Route.id.in_(route_ids))
+        .values(version=Route.version + 1, updated_at=datetime.utcnow())
+        .returning(Route.id, Route.version, Route.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+    return {row.id: RouteVersion(row.version, row.updated_at) for row in result.all()}
+
+
+async def routes_version(
+        session: AsyncSession, query: Select
+        ) -> tuple[int, datetime | None, int]:
+    """
+    Summarize the state of the routes selected by `query` in one aggregate query:
+    any insert, update or delete among them changes the result.
+
+    :param session: The database session to use.
+    :param query: A select of routes.
+    :return: The number of routes, their latest updated_at and the sum of their versions.
+    """
+    routes = query.subquery()
+    result = await session.execute(
+        select(
+            func.count(),
+            func.max(routes.c.updated_at),
+            func.coalesce(func.sum(routes.c.version), 0),
+        ).select_from(routes)
+    )
+    count, last_modified, versions = result.one()
+    return count, last_modified, versions
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Build a weak ETag from the values that identify a response.
+
+    :param parts: E.g. the endpoint name, a version and the query parameters.
+    :return: The quoted weak ETag.
+    :rtype: str
+    """
+    digest = hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def time_bucket() -> int:
+    """
+    The current etag_time_bucket_seconds interval, for the ETag of responses that
+    also depend on the clock (e.g. "upcoming" departures).
+    """
+    return int(time.time() // settings.etag_time_bucket_seconds)
+
+
+def _http_date(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # Weak comparison: W/"x" matches "x"
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque for candidate in header.split(","))
+
+
+def is_not_modified(
+        request: Request, etag: str, last_modified: datetime | None = None
+        ) -> bool:
+    """
+    Evaluate If-None-Match, or If-Modified-Since when there is no If-None-Match.
+
+    :param request: The current request.
+    :param etag: The ETag of the current representation.
+    :param last_modified: The last modification time of the representation, if known.
+    :return: True if the client's copy is current and a 304 can be sent.
+    :rtype: bool
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified.replace(microsecond=0) <= since
+
+
+def set_validators(
+        response: Response, etag: str, last_modified: datetime | None = None
+        ) -> None:
+    """
+    Set ETag, Last-Modified and Cache-Control (clients must revalidate) on a response.
+    """
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    if last_modified is not None:
+        response.headers["Last-Modified"] = _http_date(last_modified)
+
+
+def not_modified(etag: str, last_modified: datetime | None = None) -> Response:
+    """
+    Build a bodyless 304 Not Modified response carrying the validators.
+    """
+    response = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    set_validators(response, etag, last_modified)
+    return response
+
+
+route_versions = RouteVersionCache(
+    settings.route_version_cache_size, settings.route_version_cache_ttl_seconds)
+
+registry.gauge(
+    "route_version_cache_hits", "Route version cache hits since startup.",
+    callback=lambda: {(): route_versions.hits})
+registry.gauge(
+    "route_version_cache_misses", "Route version cache misses since startup.",
+    callback=lambda: {(): route_versions.misses})
@@ -12,6 +12,9 @@ class Settings(BaseSettings):
     api_v1_prefix: str = "api/v1"
     sqlite_db_url: str = f"sqlite+aiosqlite:///{BASE_DIR}/fb.db"
     db_echo: bool = True
+    debug: bool = False
+    # Warn (in debug mode) when one statement shape runs more often in a request
+    sql_repeat_warn_threshold: int = 10
 
     admin_username: str
     admin_email: str
@@ -38,6 +41,23 @@ class Settings(BaseSettings):
     postgres_test_port: str
     postgres_test_db: str
 
+    # Optional read replica, credentials default to the primary ones. The host must
+    # be a streaming replica of the primary (a hot standby): the lag probe reports
+    # 0 on any server that isn't replaying WAL, and the schema is only created on
+    # the primary, so a standalone server would get reads against an empty database
+    postgres_replica_host: str | None = None
+    postgres_replica_port: str | None = None
+    postgres_replica_user: str | None = None
+    postgres_replica_password: str | None = None
+    postgres_replica_db: str | None = None
+    replica_max_lag_seconds: float = 5.0
+    replica_health_check_seconds: float = 10.0
+    replica_health_check_timeout_seconds: float = 2.0
+    # Clients that just wrote are pinned to the primary for this long
+    read_your_writes_seconds: int = 5
+    read_your_writes_cookie: str = "bbs_read_primary"
+    read_your_writes_header: str = "X-Read-Primary"
+
     docker_postgres_user: str
     docker_postgres_password: str
     docker_postgres_db: str
@@ -49,6 +69,99 @@ class Settings(BaseSettings):
 
     schedule_delay_minutes: int = 5
     schedule_interval_minutes: int = 5
+    # The departure timer keeps departures leaving within this window in memory
+    departure_timer_horizon_hours: int = 24
+    # The delayed-departures sweep updates at most batch_size * max_batches rows per cycle
+    delayed_sweep_batch_size: int = 1000
+    delayed_sweep_max_batches: int = 100
+    # Only the worker holding this Postgres advisory lock runs scheduled jobs
+    scheduler_lock_key: int = 4815162342
+    scheduler_leader_heartbeat_seconds: int = 15
+
+    # Logging queue: above the high water mark only 1 in sample_rate records below
+    # WARNING is kept, and records are dropped once the queue is full
+    log_queue_size: int = 10000
+    log_queue_high_water_ratio: float = 0.8
+    log_overflow_sample_rate: int = 10
+
+    # bcrypt cost factor; hashes with another cost are rehashed on the next login
+    bcrypt_rounds: int = 12
+    # Threads running bcrypt, i.e. the maximum number of concurrent hashes
+    password_hash_workers: int = 4
+
+    # Login/refresh admission control: token buckets per client IP and per username,
+    # and a cap on concurrent password verifications beyond which logins get a 503
+    login_ip_rate_per_minute: float = 30.0
+    login_ip_burst: int = 10
+    login_username_rate_per_minute: float = 5.0
+    login_username_burst: int = 5
+    login_max_concurrent_verifications: int = 8
+    admission_max_tracked_keys: int = 100000
+
+    # Decoded claims of verified tokens are cached until the token expires (0 disables)
+    jwt_verified_cache_size: int = 10000
+
+    # Revoked token IDs are mirrored in memory (Bloom filter + exact set), refreshed
+    # from the database every refresh_seconds; expired ones are compacted away
+    token_revocation_refresh_seconds: int = 10
+    token_revocation_compact_minutes: int = 60
+    token_revocation_bloom_bits: int = 1 << 20
+    token_revocation_bloom_hashes: int = 5
+
+    # Authenticated principals are cached per worker; other workers see changes
+    # to a user after at most principal_cache_ttl_seconds
+    principal_cache_size: int = 10000
+    principal_cache_ttl_seconds: float = 30.0
+
+    # City autocomplete: served from an in-memory trie, reloaded every
+    # refresh_seconds; queries of at least fuzzy_min_length characters without a
+    # prefix match fall back to a trigram search in the database
+    city_suggest_max_limit: int = 20
+    city_index_refresh_seconds: int = 60
+    city_fuzzy_min_length: int = 3
+
+    # Journey planner: boardable departures leaving within horizon_days are kept in
+    # memory and reloaded every refresh_minutes; changing buses takes at least
+    # min_transfer_minutes, and journeys have at most max_legs legs and take at
+    # most max_duration_hours
+    journey_horizon_days: int = 14
+    journey_refresh_minutes: int = 10
+    journey_min_transfer_minutes: int = 15
+    journey_max_legs: int = 4
+    journey_max_duration_hours: int = 48
+
+    # Conditional GETs of the catalog: route versions are cached per worker for
+    # ttl_seconds; responses that depend on the clock get a new ETag every
+    # etag_time_bucket_seconds
+    route_version_cache_size: int = 10000
+    route_version_cache_ttl_seconds: float = 5.0
+    etag_time_bucket_seconds: int = 60
+
+    # Timetable patterns are expanded into departures up to horizon_days ahead, by
+    # the leader every extend_interval_hours; pattern times are in timetable_timezone
+    timetable_timezone: str = "UTC"
+    timetable_horizon_days: int = 60
+    timetable_extend_interval_hours: int = 6
+    timetable_insert_batch_size: int = 1000
+
+    # Route updates write departures in statements of at most this many rows,
+    # keeping them under asyncpg's limit of 32767 bind parameters per statement
+    route_departure_batch_size: int = 1000
+
+    # Departure exports are streamed from a server-side cursor in chunks of this many rows
+    export_batch_size: int = 1000
+
+    # Database connection pool
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    db_prepared_statement_cache_size: int = 100
+    db_pool_log_interval_minutes: int = 5
+
+    # Cold import of main:app must stay under this budget (see tests/test_startup.py)
+    startup_import_budget_seconds: float = 3.0
 
     @property
     def postgres_sync_db_url(self) -> str:
@@ -96,6 +209,31 @@ class Settings(BaseSettings):
             f"@{self.postgres_host}:{self.postgres_port}/{self.postgres_db}"
             )
 
+    @property
+    def postgres_replica_async_db_url(self) -> str | None:
+        """Get a database URL for an asynchronous connection to the read replica.
+
+        Returns None when `postgres_replica_host` is not set. Every other part of
+        the URL falls back to the matching primary setting when not set:
+
+            - `postgres_replica_user`
+            - `postgres_replica_password`
+            - `postgres_replica_host`
+            - `postgres_replica_port`
+            - `postgres_replica_db`
+
+        The URL will be in the following format:
+            postgresql+asyncpg://<user>:<password>@<host>:<port>/<db>
+        """
+        if not self.postgres_replica_host:
+            return None
+        return (
+            f"postgresql+asyncpg://{self.postgres_replica_user or self.postgres_user}"
+            f":{self.postgres_replica_password or self.postgres_password}"
+            f"@{self.postgres_replica_host}:{self.postgres_replica_port or self.postgres_port}"
+            f"/{self.postgres_replica_db or self.postgres_db}"
+            )
+
     @property
     def docker_postgres_async_db_url(self) -> str:
         """Get a database URL for an asynchronous PostgreSQL connection to the docker database.
@@ -1,5 +1,6 @@
 from sqlalchemy.orm import DeclarativeBase
-from sqlalchemy import Column, DateTime
+from sqlalchemy import Column, DateTime, text
+from sqlalchemy.schema import CreateColumn
 
 from datetime import datetime
 
@@ -9,3 +10,65 @@ class Base(DeclarativeBase):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(
         DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+# Postgres extensions the models depend on (e.g. trigram indexes on cities)
+REQUIRED_EXTENSIONS = ("pg_trgm",)
+
+
+def create_extensions(connection) -> None:
+    """
+    Create the Postgres extensions in REQUIRED_EXTENSIONS if they don't exist yet.
+
+    Must run before `Base.metadata.create_all()`, since indexes use them.
+    Meant to be run with `AsyncConnection.run_sync()`.
+    """
+    for extension in REQUIRED_EXTENSIONS:
+        connection.execute(text(f"CREATE EXTENSION IF NOT EXISTS {extension}"))
+
+
+# Columns added to existing tables after their creation, as (table, column) in the
+# order they must be added. `add_missing_columns` adds them to older databases.
+UPGRADE_COLUMNS = (
+    ("users", "tokens_valid_after"),
+    ("routes", "version"),
+    ("departures", "timetable_pattern_id"),
+)
+
+
+def _add_column_statement(column: Column, dialect) -> str:
+    ddl = str(CreateColumn(column).compile(dialect=dialect))
+    for foreign_key in column.foreign_keys:
+        target = foreign_key.column
+        ddl += f" REFERENCES {target.table.name} ({target.name})"
+        if foreign_key.ondelete:
+            ddl += f" ON DELETE {foreign_key.ondelete}"
+    return f"ALTER TABLE {column.table.name} ADD COLUMN IF NOT EXISTS {ddl}"
+
+
+def add_missing_columns(connection) -> None:
+    """
+    Add the columns in UPGRADE_COLUMNS to tables created before them.
+
+    `Base.metadata.create_all()` skips existing tables, so their new columns
+    would otherwise never be created. The statements are idempotent. Must run
+    after `create_all()` (new tables referenced by foreign keys exist by then)
+    and before `create_missing_indexes()`, which may index the new columns.
+    Meant to be run with `AsyncConnection.run_sync()`.
+    """
+    for table_name, column_name in UPGRADE_COLUMNS:
+        column = Base.metadata.tables[table_name].c[column_name]
+        connection.execute(text(_add_column_statement(column, connection.dialect)))
+
+
+def create_missing_indexes(connection) -> None:
+    """
+    Create indexes that are declared on the models but missing in the database.
+
+    `Base.metadata.create_all()` only creates indexes together with new tables,
+    so indexes added to existing models would otherwise never be created.
+    Meant to be run with `AsyncConnection.run_sync()`.
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
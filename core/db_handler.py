@@ -1,26 +1,104 @@
+import asyncio
+import logging
+import time
 from asyncio import current_task
 
+from fastapi import Request
+from sqlalchemy import exc, text
 from sqlalchemy.ext.asyncio import (
     create_async_engine, async_sessionmaker,
     async_scoped_session)
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from core.config import settings
+from core.metrics import registry
+from core.query_stats import instrument_engine
+
+logger = logging.getLogger(__name__)
+
+# Replication lag in seconds; 0 when the replica has replayed everything it received
+# (or when the server is not a streaming replica at all).
+REPLICA_LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class PoolStats:
+    """
+    Counters collected while checking connections out of the pool.
+
+    Wait time covers everything spent inside the pool's checkout, i.e. waiting
+    for a free connection and, when the pool is below its limit, opening a new one.
+    """
+
+    def __init__(self):
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def record_wait(self, seconds: float) -> None:
+        self.checkouts += 1
+        self.total_wait_seconds += seconds
+        if seconds > self.max_wait_seconds:
+            self.max_wait_seconds = seconds
+
+    @property
+    def avg_wait_seconds(self) -> float:
+        if not self.checkouts:
+            return 0.0
+        return self.total_wait_seconds / self.checkouts
+
+
+def instrumented_pool_class(stats: PoolStats) -> type[AsyncAdaptedQueuePool]:
+    """
+    Build a queue pool class that reports checkout wait time and timeouts to `stats`.
+
+    A class (instead of pool events) is needed because SQLAlchemy has no event
+    fired before a checkout starts, so the time spent waiting on the queue can't
+    be measured from the outside. The stats object is closed over so it survives
+    `pool.recreate()`, which instantiates the same class again.
+
+    :param stats: The PoolStats instance to report to.
+    :return: A subclass of AsyncAdaptedQueuePool.
+    """
+
+    class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                return super()._do_get()
+            except exc.TimeoutError:
+                stats.checkout_timeouts += 1
+                raise
+            finally:
+                stats.record_wait(time.perf_counter() - start)
+
+    return InstrumentedQueuePool
 
 
 class DatabaseHandler:
     def __init__(
             self, url: str = settings.postgres_async_db_url,
-            echo: bool = settings.db_echo
+            echo: bool = settings.db_echo,
+            read_url: str | None = settings.postgres_replica_async_db_url
             ):
         """
         Initialize the database handler with the given URL and echo setting.
 
+        Pool sizing, timeouts, recycling, pre-ping and asyncpg's prepared statement
+        cache size are taken from the `db_*` settings.
+
         :param url: The URL of the database to connect to. Defaults to the value of the
             `postgres_async_db_url` setting.
         :param echo: Whether to enable echo mode for the database connection. Defaults to the
             value of the `db_echo` setting.
+        :param read_url: The URL of a read-only replica. Defaults to the value of the
+            `postgres_replica_async_db_url` setting. When None, reads use the primary.
         """
-        self.engine = create_async_engine(url=url, echo=echo)
+        self.pool_stats = PoolStats()
+        self.engine = self._create_engine(url, echo, self.pool_stats)
         self.async_session_factory = async_sessionmaker(
             bind=self.engine,
             autoflush=False,
@@ -28,6 +106,127 @@ class DatabaseHandler:
             expire_on_commit=False,
         )
 
+        self.read_pool_stats = PoolStats()
+        self.read_engine = None
+        self.read_session_factory = self.async_session_factory
+        if read_url:
+            self.read_engine = self._create_engine(
+                read_url, echo, self.read_pool_stats)
+            self.read_session_factory = async_sessionmaker(
+                bind=self.read_engine,
+                autoflush=False,
+                autocommit=False,
+                expire_on_commit=False,
+            )
+        self._replica_healthy = False
+        self._replica_checked_at = float("-inf")
+
+    def _create_engine(self, url: str, echo: bool, stats: PoolStats):
+        """
+        Create an async engine using the configured pool settings.
+
+        :param url: The URL of the database to connect to.
+        :param echo: Whether to enable echo mode for the database connection.
+        :param stats: The PoolStats instance the pool reports checkouts to.
+        :return: The created engine, instrumented for per-request query stats.
+        :rtype: AsyncEngine
+        """
+        engine = create_async_engine(
+            url=url,
+            echo=echo,
+            poolclass=instrumented_pool_class(stats),
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+            pool_pre_ping=settings.db_pool_pre_ping,
+            connect_args=self._connect_args(url),
+        )
+        instrument_engine(engine)
+        return engine
+
+    @staticmethod
+    def _connect_args(url: str) -> dict:
+        """
+        Driver specific connection arguments for the given URL.
+
+        :param url: The URL of the database to connect to.
+        :return: Keyword arguments passed to the DBAPI `connect()` call.
+        """
+        if url.startswith("postgresql+asyncpg"):
+            return {
+                "prepared_statement_cache_size": settings.db_prepared_statement_cache_size
+            }
+        return {}
+
+    def pool_status(self, replica: bool = False) -> dict | None:
+        """
+        Get a snapshot of a connection pool.
+
+        :param replica: Report the read replica's pool instead of the primary one.
+        :return: A dictionary with the pool size, connections checked in and out,
+            current overflow, and the checkout counters collected since startup,
+            or None when asked for the replica and none is configured.
+        :rtype: dict | None
+        """
+        engine, stats = self.engine, self.pool_stats
+        if replica:
+            if self.read_engine is None:
+                return None
+            engine, stats = self.read_engine, self.read_pool_stats
+
+        pool = engine.pool
+        return {
+            "pool_size": pool.size(),
+            "max_overflow": settings.db_max_overflow,
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "checkouts": stats.checkouts,
+            "checkout_timeouts": stats.checkout_timeouts,
+            "avg_wait_ms": round(stats.avg_wait_seconds * 1000, 3),
+            "max_wait_ms": round(stats.max_wait_seconds * 1000, 3),
+        }
+
+    async def replica_is_usable(self) -> bool:
+        """
+        Check whether reads can be sent to the replica.
+
+        The replica is probed at most once every `replica_health_check_seconds`;
+        in between, the last result is reused. It is considered unusable when it
+        can't be reached within `replica_health_check_timeout_seconds` or when its
+        replication lag exceeds `replica_max_lag_seconds`.
+
+        :return: True if a replica is configured and healthy, otherwise False.
+        :rtype: bool
+        """
+        if self.read_engine is None:
+            return False
+
+        now = time.monotonic()
+        if now - self._replica_checked_at < settings.replica_health_check_seconds:
+            return self._replica_healthy
+        # Claim the check before awaiting so concurrent requests reuse the last result
+        self._replica_checked_at = now
+
+        try:
+            async with asyncio.timeout(settings.replica_health_check_timeout_seconds):
+                async with self.read_engine.connect() as conn:
+                    lag = await conn.scalar(REPLICA_LAG_QUERY)
+            healthy = float(lag) <= settings.replica_max_lag_seconds
+            if not healthy:
+                logger.warning(
+                    f"Read replica lag {float(lag):.1f}s exceeds "
+                    f"{settings.replica_max_lag_seconds}s, reading from primary.")
+        except Exception as e:
+            healthy = False
+            logger.warning(f"Read replica unavailable, reading from primary: {e}")
+
+        if healthy and not self._replica_healthy:
+            logger.info("Read replica is healthy, routing reads to the replica.")
+        self._replica_healthy = healthy
+        return healthy
+
     def get_scoped_session(self):
         """
         Get a scoped session factory that uses the current task as the scope.
@@ -58,6 +257,31 @@ class DatabaseHandler:
         async with self.async_session_factory() as session:
             yield session
 
+    async def read_session_dependency(self, request: Request):
+        """
+        A dependency that yields a database session for read-only endpoints.
+
+        The session is bound to the read replica when one is configured and healthy.
+        Requests that carry the read-your-writes cookie or header (set right after a
+        write) and requests arriving while the replica is down or lagging get a
+        session bound to the primary instead.
+
+        :param request: The current request.
+        :yield: The database session to use.
+        :rtype: AsyncSession
+        """
+        pinned_to_primary = (
+            settings.read_your_writes_cookie in request.cookies
+            or request.headers.get(settings.read_your_writes_header)
+        )
+        if not pinned_to_primary and await self.replica_is_usable():
+            session_factory = self.read_session_factory
+        else:
+            session_factory = self.async_session_factory
+
+        async with session_factory() as session:
+            yield session
+
     async def scoped_session_dependency(self):
         """
         A dependency that yields a database session and removes it when finished.
@@ -77,3 +301,38 @@ class DatabaseHandler:
 
 
 db_handler = DatabaseHandler()
+
+
+def _pool_metric(key: str):
+    """
+    Build a gauge callback that reads `key` from the primary and replica pool status.
+    """
+    def collect() -> dict[tuple, float]:
+        values = {}
+        for pool, replica in (("primary", False), ("replica", True)):
+            status = db_handler.pool_status(replica=replica)
+            if status is not None:
+                values[(pool,)] = status[key]
+        return values
+
+    return collect
+
+
+registry.gauge(
+    "db_pool_size", "Configured size of the connection pool.",
+    ("pool",), callback=_pool_metric("pool_size"))
+registry.gauge(
+    "db_pool_checked_out_connections", "Connections currently checked out of the pool.",
+    ("pool",), callback=_pool_metric("checked_out"))
+registry.gauge(
+    "db_pool_checked_in_connections", "Idle connections currently in the pool.",
+    ("pool",), callback=_pool_metric("checked_in"))
+registry.gauge(
+    "db_pool_overflow_connections", "Connections currently opened above the pool size.",
+    ("pool",), callback=_pool_metric("overflow"))
+registry.gauge(
+    "db_pool_checkout_timeouts", "Pool checkouts that timed out since startup.",
+    ("pool",), callback=_pool_metric("checkout_timeouts"))
+registry.gauge(
+    "db_pool_max_wait_milliseconds", "Longest pool checkout wait since startup.",
+    ("pool",), callback=_pool_metric("max_wait_ms"))
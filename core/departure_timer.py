@@ -0,0 +1,205 @@
+import asyncio
+import heapq
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Iterable
+from uuid import UUID
+
+from sqlalchemy import select, update
+
+from models import Departure, DepartureStatus
+from core.conditional import bump_route_versions, route_versions
+from core.config import settings
+from core.db_handler import db_handler
+from core.logging import logger
+
+
+class DepartureTimer:
+    """
+    Fires the SCHEDULED -> DELAYED transition of each departure at its exact time.
+
+    Departures are kept in a min-heap ordered by the moment they become delayed
+    (departure_time + schedule_delay_minutes). A background task sleeps until the
+    earliest one is due and is woken up early whenever an earlier one is scheduled.
+    Rescheduled and cancelled departures are removed lazily: the heap entry is
+    only honoured if it still matches the departure's current fire time.
+
+    The periodic sweep in `core.scheduler` remains the source of truth; this
+    timer only makes transitions happen on time instead of on the next poll.
+    """
+
+    def __init__(self):
+        self._heap: list[tuple[float, UUID]] = []
+        self._fire_at: dict[UUID, float] = {}
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._fire_at)
+
+    @staticmethod
+    def _fire_time(departure_time: datetime) -> float:
+        if departure_time.tzinfo is None:
+            departure_time = departure_time.replace(tzinfo=timezone.utc)
+        delay = timedelta(minutes=settings.schedule_delay_minutes)
+        return (departure_time + delay).timestamp()
+
+    def schedule(self, departure_id: UUID, departure_time: datetime) -> None:
+        """
+        Schedule (or reschedule) the transition of a departure.
+
+        :param departure_id: The ID of the departure.
+        :param departure_time: The departure time of the departure.
+        """
+        fire_at = self._fire_time(departure_time)
+        if self._fire_at.get(departure_id) == fire_at:
+            return
+
+        self._fire_at[departure_id] = fire_at
+        heapq.heappush(self._heap, (fire_at, departure_id))
+
+        # Drop stale entries once they outnumber the live ones
+        if len(self._heap) > 2 * len(self._fire_at) + 1024:
+            self._heap = [(t, i) for i, t in self._fire_at.items()]
+            heapq.heapify(self._heap)
+
+        if self._wakeup is not None and self._heap[0][1] == departure_id:
+            self._wakeup.set()
+
+    @staticmethod
+    def in_horizon(departure_time: datetime) -> bool:
+        """
+        Whether a departure leaves within departure_timer_horizon_hours, i.e. is
+        one the timer keeps in memory. Later ones are picked up by `load`.
+        """
+        if departure_time.tzinfo is None:
+            departure_time = departure_time.replace(tzinfo=timezone.utc)
+        horizon_end = datetime.now(timezone.utc) + timedelta(
+            hours=settings.departure_timer_horizon_hours)
+        return departure_time <= horizon_end
+
+    def schedule_departures(self, departures: Iterable[Departure]) -> None:
+        """
+        Schedule every SCHEDULED departure leaving within the horizon and cancel
+        the others, including departures moved beyond the horizon.
+
+        :param departures: Departures that were just created or changed.
+        """
+        for departure in departures:
+            if (departure.status in (None, DepartureStatus.SCHEDULED)
+                    and self.in_horizon(departure.departure_time)):
+                self.schedule(departure.id, departure.departure_time)
+            else:
+                self.cancel(departure.id)
+
+    def cancel(self, departure_id: UUID) -> None:
+        """
+        Cancel the pending transition of a departure, if any.
+
+        :param departure_id: The ID of the departure.
+        """
+        self._fire_at.pop(departure_id, None)
+
+    def pop_due(self, now: float) -> list[UUID]:
+        """
+        Remove and return the departures whose fire time is at or before `now`.
+
+        :param now: A POSIX timestamp.
+        :return: The IDs of the due departures.
+        """
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            fire_at, departure_id = heapq.heappop(self._heap)
+            if self._fire_at.get(departure_id) == fire_at:
+                del self._fire_at[departure_id]
+                due.append(departure_id)
+        return due
+
+    async def load(self) -> int:
+        """
+        Schedule all SCHEDULED departures leaving within departure_timer_horizon_hours.
+
+        Departures that are already past their threshold are included and fire
+        right away.
+
+        :return: The number of departures loaded.
+        :rtype: int
+        """
+        horizon_end = datetime.now(timezone.utc) + timedelta(
+            hours=settings.departure_timer_horizon_hours)
+        async with db_handler.async_session_factory() as session:
+            result = await session.execute(
+                select(Departure.id, Departure.departure_time)
+                .where(
+                    Departure.status == DepartureStatus.SCHEDULED,
+                    Departure.departure_time <= horizon_end
+                )
+            )
+            rows = result.all()
+
+        for departure_id, departure_time in rows:
+            self.schedule(departure_id, departure_time)
+        return len(rows)
+
+    async def _fire(self, departure_ids: list[UUID]) -> None:
+        threshold_time = datetime.now(timezone.utc) - timedelta(
+            minutes=settings.schedule_delay_minutes)
+        async with db_handler.async_session_factory() as session:
+            try:
+                stmt = (
+                    update(Departure)
+                    .where(
+                        Departure.id.in_(departure_ids),
+                        Departure.status == DepartureStatus.SCHEDULED,
+                        Departure.departure_time <= threshold_time
+                    )
+                    .values(status=DepartureStatus.DELAYED)
+                    .returning(Departure.route_id)
+                    .execution_options(synchronize_session=False)
+                )
+                route_ids = (await session.execute(stmt)).scalars().all()
+                await bump_route_versions(session, route_ids)
+                await session.commit()
+                route_versions.invalidate(route_ids)
+                if route_ids:
+                    logger.info(
+                        f"Departure timer set {len(route_ids)} departures to DELAYED.")
+            except Exception as e:
+                # The periodic sweep picks these up on its next cycle
+                logger.error(f"Departure timer failed to update departures: {e}")
+                await session.rollback()
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            due = self.pop_due(time.time())
+            if due:
+                await self._fire(due)
+                continue
+
+            timeout = None
+            if self._heap:
+                timeout = max(self._heap[0][0] - time.time(), 0)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        """Start the timer task on the running event loop."""
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the timer task."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._wakeup = None
+
+
+departure_timer = DepartureTimer()
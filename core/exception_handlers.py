@@ -88,7 +88,7 @@ async def http_exception_handler(
 
     This exception handler catches any HTTPExceptions that occur during
     request processing, logs the error, and returns a JSONResponse object
-    containing the error details.
+    containing the error details and the exception's headers (e.g. Retry-After).
 
     :param request: The current request object.
     :param exc: The HTTPException that occurred.
@@ -98,6 +98,7 @@ async def http_exception_handler(
     return JSONResponse(
         status_code=exc.status_code,
         content={"detail": exc.detail},
+        headers=exc.headers,
     )
 
 
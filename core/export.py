@@ -0,0 +1,142 @@
+import csv
+import enum
+import io
+import json
+import uuid
+from datetime import datetime
+from typing import Any, AsyncIterator, Iterable, Sequence
+
+from sqlalchemy import Select, select
+
+from models import Bus, Departure, Route
+from core.config import settings
+from core.db_handler import db_handler
+from core.logging import logger
+
+# Columns of an exported departure, in CSV column order
+EXPORT_COLUMNS = (
+    Departure.id,
+    Departure.route_id,
+    Route.route_number,
+    Route.origin_city,
+    Route.destination_city,
+    Departure.bus_id,
+    Bus.bus_number,
+    Departure.departure_time,
+    Departure.arrival_time,
+    Departure.status,
+    Departure.is_cancelled,
+    Departure.is_full,
+    Departure.notes,
+)
+EXPORT_FIELDS = tuple(column.key for column in EXPORT_COLUMNS)
+
+
+class ExportFormat(str, enum.Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+
+def _export_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+def departure_export_query(
+        start: datetime | None = None, end: datetime | None = None,
+        route_id: uuid.UUID | None = None
+        ) -> Select:
+    """
+    Build the select of exported departures, flat rows ordered by departure time.
+
+    :param start: Only departures leaving at or after this time.
+    :param end: Only departures leaving before this time.
+    :param route_id: Only departures of this route.
+    :return: The select of EXPORT_COLUMNS.
+    :rtype: Select
+    """
+    stmt = (
+        select(*EXPORT_COLUMNS)
+        .join(Route, Departure.route_id == Route.id)
+        .outerjoin(Bus, Departure.bus_id == Bus.id)
+        .order_by(Departure.departure_time, Departure.id)
+    )
+    if start is not None:
+        stmt = stmt.where(Departure.departure_time >= start)
+    if end is not None:
+        stmt = stmt.where(Departure.departure_time < end)
+    if route_id is not None:
+        stmt = stmt.where(Departure.route_id == route_id)
+    return stmt
+
+
+def format_ndjson(rows: Iterable[Sequence[Any]]) -> str:
+    """
+    Serialize rows of EXPORT_COLUMNS as newline-delimited JSON objects.
+    """
+    return "".join(
+        json.dumps(dict(zip(EXPORT_FIELDS, map(_export_value, row)))) + "\n"
+        for row in rows
+    )
+
+
+def format_csv(rows: Iterable[Sequence[Any]], header: bool = False) -> str:
+    """
+    Serialize rows of EXPORT_COLUMNS as CSV lines, preceded by the header line if
+    `header` is set.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_FIELDS)
+    writer.writerows([_export_value(value) for value in row] for row in rows)
+    return buffer.getvalue()
+
+
+async def stream_departures(stmt: Select, export_format: ExportFormat) -> AsyncIterator[bytes]:
+    """
+    Run an export query on a server-side cursor and yield it serialized, one chunk
+    per export_batch_size rows, so memory use doesn't grow with the result.
+
+    The generator opens its own session (on the read replica when it's usable)
+    because it runs after the endpoint returned and its dependencies were closed.
+    An error after the first chunk can only be logged: the response has started.
+
+    :param stmt: A select from `departure_export_query`.
+    :param export_format: The format of the chunks.
+    :yield: The encoded chunks.
+    """
+    if await db_handler.replica_is_usable():
+        session_factory = db_handler.read_session_factory
+    else:
+        session_factory = db_handler.async_session_factory
+
+    if export_format is ExportFormat.CSV:
+        yield format_csv((), header=True).encode("utf-8")
+
+    exported = 0
+    async with session_factory() as session:
+        try:
+            result = await session.stream(
+                stmt.execution_options(yield_per=settings.export_batch_size))
+            async for rows in result.partitions():
+                if export_format is ExportFormat.CSV:
+                    chunk = format_csv(rows)
+                else:
+                    chunk = format_ndjson(rows)
+                exported += len(rows)
+                yield chunk.encode("utf-8")
+        except Exception as e:
+            logger.error(f"Departure export failed after {exported} rows: {e}")
+            raise
@@ -0,0 +1,378 @@
+import bisect
+from array import array
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Sequence
+from uuid import UUID
+
+from sqlalchemy import select
+
+from models import Departure, DepartureStatus, Route, RouteStatus, RouteStop
+from core.city_index import normalize_city
+from core.config import settings
+from core.db_handler import db_handler
+from core.logging import logger
+from core.metrics import registry
+
+INF = float("inf")
+
+# Departures in these states can still be boarded
+BOARDABLE_STATUSES = (DepartureStatus.SCHEDULED, DepartureStatus.DELAYED)
+
+
+@dataclass(frozen=True)
+class Trip:
+    """
+    One departure as a sequence of timed stops: (city, arrival, departure) with
+    POSIX timestamps.
+    """
+    departure_id: UUID
+    route_id: UUID
+    route_number: str
+    stops: tuple[tuple[str, float, float], ...]
+
+
+@dataclass(frozen=True)
+class JourneyLeg:
+    departure_id: UUID
+    route_id: UUID
+    route_number: str
+    from_city: str
+    to_city: str
+    departure_time: datetime
+    arrival_time: datetime
+
+
+@dataclass(frozen=True)
+class Itinerary:
+    legs: tuple[JourneyLeg, ...]
+
+    @property
+    def departure_time(self) -> datetime:
+        return self.legs[0].departure_time
+
+    @property
+    def arrival_time(self) -> datetime:
+        return self.legs[-1].arrival_time
+
+    @property
+    def transfers(self) -> int:
+        return len(self.legs) - 1
+
+
+def build_trip(
+        departure_id: UUID, route_id: UUID, route_number: str,
+        departure_time: datetime, arrival_time: datetime, distance_km: int,
+        stops: Sequence[tuple[str, int, int]]
+        ) -> Trip:
+    """
+    Time the stops of a departure.
+
+    Only the departure and the final arrival are scheduled, so the driving time
+    (the trip duration minus the dwell times) is spread over the stops in
+    proportion to their distance from the origin.
+
+    :param stops: (city, offset in km, dwell in minutes) per stop, origin first.
+    :return: The timed trip.
+    :rtype: Trip
+    """
+    start = departure_time.timestamp()
+    end = arrival_time.timestamp()
+    dwells = [dwell * 60 for _, _, dwell in stops[1:-1]]
+    driving = max(end - start - sum(dwells), 0)
+
+    timed = []
+    dwelled = 0.0
+    for index, (city, offset_km, dwell_minutes) in enumerate(stops):
+        if index == len(stops) - 1:
+            arrival = end
+        else:
+            arrival = start + dwelled + driving * min(offset_km / (distance_km or 1), 1)
+        departure = arrival + (dwell_minutes * 60 if 0 < index < len(stops) - 1 else 0)
+        timed.append((city, arrival, departure))
+        if 0 < index < len(stops) - 1:
+            dwelled += dwell_minutes * 60
+    return Trip(departure_id, route_id, route_number, tuple(timed))
+
+
+class ConnectionTable:
+    """
+    All connections (hops between consecutive stops of a trip) sorted by departure
+    time, in parallel arrays of doubles and ints rather than one object per hop.
+    """
+
+    def __init__(self, trips: Iterable[Trip]):
+        self.trips: list[Trip] = []
+        self.cities: list[str] = []
+        self._city_ids: dict[str, int] = {}
+
+        connections = []
+        for trip in trips:
+            trip_index = len(self.trips)
+            self.trips.append(trip)
+            for (from_city, _, departure), (to_city, arrival, _) in zip(
+                    trip.stops, trip.stops[1:]):
+                connections.append((
+                    departure, arrival,
+                    self._city_id(from_city), self._city_id(to_city), trip_index))
+        connections.sort(key=lambda connection: (connection[0], connection[1]))
+
+        self.departures = array("d", (c[0] for c in connections))
+        self.arrivals = array("d", (c[1] for c in connections))
+        self.from_stops = array("l", (c[2] for c in connections))
+        self.to_stops = array("l", (c[3] for c in connections))
+        self.trip_indexes = array("l", (c[4] for c in connections))
+
+    def __len__(self) -> int:
+        return len(self.departures)
+
+    def _city_id(self, city: str) -> int:
+        key = normalize_city(city)
+        city_id = self._city_ids.get(key)
+        if city_id is None:
+            city_id = self._city_ids[key] = len(self.cities)
+            self.cities.append(city)
+        return city_id
+
+    def city_id(self, city: str) -> int | None:
+        return self._city_ids.get(normalize_city(city))
+
+    def scan(
+            self, origin: int, destination: int, depart_after: float,
+            min_transfer: float, max_legs: int, max_duration: float
+            ) -> list[Itinerary]:
+        """
+        Round-based Connection Scan: round k finds the earliest arrival with at most
+        k legs, boarding only at stops reached in round k - 1.
+
+        :return: The Pareto-optimal itineraries, fewest legs (and latest arrival) first.
+        """
+        first = bisect.bisect_left(self.departures, depart_after)
+        last = bisect.bisect_right(self.departures, depart_after + max_duration)
+        departures, arrivals = self.departures, self.arrivals
+        from_stops, to_stops, trip_indexes = self.from_stops, self.to_stops, self.trip_indexes
+
+        # Per round: the time each stop is ready for boarding (arrival plus the
+        # transfer time) and the (boarding, alighting) connections that got there
+        ready_prev: dict[int, float] = {origin: depart_after}
+        pointers: list[dict[int, tuple[int, int]]] = [{}]
+        best_arrival = INF
+        itineraries = []
+
+        for _ in range(max_legs):
+            ready = dict(ready_prev)
+            pointer = dict(pointers[-1])
+            boarded: dict[int, int] = {}
+            destination_legs = None
+            improved = False
+
+            for index in range(first, last):
+                departure = departures[index]
+                if departure >= best_arrival:
+                    break
+                trip = trip_indexes[index]
+                boarding = boarded.get(trip)
+                if boarding is None:
+                    if ready_prev.get(from_stops[index], INF) > departure:
+                        continue
+                    boarded[trip] = boarding = index
+
+                stop, arrival = to_stops[index], arrivals[index]
+                if stop == destination:
+                    if arrival < best_arrival:
+                        best_arrival = arrival
+                        destination_legs = (boarding, index)
+                elif stop != origin and arrival + min_transfer < ready.get(stop, INF):
+                    ready[stop] = arrival + min_transfer
+                    pointer[stop] = (boarding, index)
+                    improved = True
+
+            if destination_legs is not None:
+                itineraries.append(
+                    self._itinerary(origin, destination_legs, pointers))
+            if not improved:
+                break
+            ready_prev = ready
+            pointers.append(pointer)
+
+        return itineraries
+
+    def _itinerary(
+            self, origin: int, last_leg: tuple[int, int],
+            pointers: list[dict[int, tuple[int, int]]]
+            ) -> Itinerary:
+        legs = [self._leg(*last_leg)]
+        stop = self.from_stops[last_leg[0]]
+        round_index = len(pointers) - 1
+        while stop != origin:
+            boarding, alighting = pointers[round_index][stop]
+            legs.append(self._leg(boarding, alighting))
+            stop = self.from_stops[boarding]
+            round_index -= 1
+        return Itinerary(tuple(reversed(legs)))
+
+    def _leg(self, boarding: int, alighting: int) -> JourneyLeg:
+        trip = self.trips[self.trip_indexes[boarding]]
+        return JourneyLeg(
+            departure_id=trip.departure_id,
+            route_id=trip.route_id,
+            route_number=trip.route_number,
+            from_city=self.cities[self.from_stops[boarding]],
+            to_city=self.cities[self.to_stops[alighting]],
+            departure_time=datetime.fromtimestamp(self.departures[boarding], tz=timezone.utc),
+            arrival_time=datetime.fromtimestamp(self.arrivals[alighting], tz=timezone.utc),
+        )
+
+
+async def load_trips(route_ids: Iterable[UUID] | None = None) -> list[Trip]:
+    """
+    Load the boardable departures of active routes that leave within the planning
+    horizon, as timed trips.
+
+    :param route_ids: Only load the departures of these routes; all routes when None.
+    :return: The trips.
+    """
+    now = datetime.now(timezone.utc)
+    departures_stmt = (
+        select(
+            Departure.id, Departure.route_id, Departure.departure_time,
+            Departure.arrival_time, Route.route_number, Route.origin_city,
+            Route.destination_city, Route.distance_km, Route.duration_minutes,
+        )
+        .join(Route, Departure.route_id == Route.id)
+        .where(
+            Route.status == RouteStatus.ACTIVE,
+            Departure.status.in_(BOARDABLE_STATUSES),
+            Departure.is_cancelled.is_not(True),
+            Departure.departure_time >= now - timedelta(hours=settings.journey_max_duration_hours),
+            Departure.departure_time <= now + timedelta(days=settings.journey_horizon_days),
+        )
+    )
+    stops_stmt = (
+        select(RouteStop.route_id, RouteStop.city, RouteStop.offset_km, RouteStop.dwell_minutes)
+        .join(Route, RouteStop.route_id == Route.id)
+        .where(Route.status == RouteStatus.ACTIVE)
+        .order_by(RouteStop.route_id, RouteStop.seq)
+    )
+    if route_ids is not None:
+        route_ids = list(route_ids)
+        departures_stmt = departures_stmt.where(Departure.route_id.in_(route_ids))
+        stops_stmt = stops_stmt.where(RouteStop.route_id.in_(route_ids))
+
+    async with db_handler.async_session_factory() as session:
+        departure_rows = (await session.execute(departures_stmt)).all()
+        stop_rows = (await session.execute(stops_stmt)).all()
+
+    stops_by_route: dict[UUID, list[tuple[str, int, int]]] = {}
+    for route_id, city, offset_km, dwell_minutes in stop_rows:
+        stops_by_route.setdefault(route_id, []).append((city, offset_km, dwell_minutes))
+
+    trips = []
+    for row in departure_rows:
+        # Routes without route_stops rows (not backfilled yet) only connect their ends
+        stops = stops_by_route.get(row.route_id) or [
+            (row.origin_city, 0, 0), (row.destination_city, row.distance_km, 0)]
+        arrival_time = row.arrival_time or row.departure_time + timedelta(
+            minutes=row.duration_minutes)
+        trips.append(build_trip(
+            row.id, row.route_id, row.route_number, row.departure_time,
+            arrival_time, row.distance_km, stops))
+    return trips
+
+
+class JourneyPlanner:
+    """
+    Plans multi-leg journeys over the departures kept in memory.
+
+    Trips are stored per departure and replaced per route when routes or their
+    departures change, so an update only reads the affected routes. The sorted
+    connection arrays are re-packed from the trips on the first query after a
+    change. Every worker also reloads all trips every journey_refresh_minutes,
+    which picks up changes made by other workers and moves the horizon forward.
+    """
+
+    def __init__(self):
+        self._trips: dict[UUID, Trip] = {}
+        self._table: ConnectionTable | None = None
+
+    def __len__(self) -> int:
+        return len(self._trips)
+
+    @property
+    def table(self) -> ConnectionTable:
+        if self._table is None:
+            self._table = ConnectionTable(self._trips.values())
+        return self._table
+
+    def set_trips(self, trips: Iterable[Trip]) -> None:
+        """Replace all trips."""
+        self._trips = {trip.departure_id: trip for trip in trips}
+        self._table = None
+
+    def replace_route_trips(self, route_ids: Iterable[UUID], trips: Iterable[Trip]) -> None:
+        """Replace the trips of the given routes."""
+        route_ids = set(route_ids)
+        self._trips = {
+            departure_id: trip for departure_id, trip in self._trips.items()
+            if trip.route_id not in route_ids
+        }
+        self._trips.update((trip.departure_id, trip) for trip in trips)
+        self._table = None
+
+    def plan(
+            self, origin: str, destination: str, depart_after: datetime
+            ) -> list[Itinerary] | None:
+        """
+        Find the Pareto-optimal journeys between two cities: for every number of
+        transfers, the earliest arrival that beats all journeys with fewer transfers.
+
+        :param origin: The origin city (case-insensitive).
+        :param destination: The destination city (case-insensitive).
+        :param depart_after: The earliest departure time.
+        :return: The itineraries, fewest transfers first (so the last one arrives
+            earliest), or None if either city isn't served by any departure.
+        """
+        table = self.table
+        origin_id, destination_id = table.city_id(origin), table.city_id(destination)
+        if origin_id is None or destination_id is None:
+            return None
+        if depart_after.tzinfo is None:
+            depart_after = depart_after.replace(tzinfo=timezone.utc)
+        return table.scan(
+            origin_id, destination_id, depart_after.timestamp(),
+            min_transfer=settings.journey_min_transfer_minutes * 60,
+            max_legs=settings.journey_max_legs,
+            max_duration=settings.journey_max_duration_hours * 3600,
+        )
+
+    async def load(self) -> int:
+        """
+        Reload all trips from the database.
+
+        :return: The number of trips loaded.
+        :rtype: int
+        """
+        trips = await load_trips()
+        self.set_trips(trips)
+        return len(trips)
+
+    async def routes_changed(self, route_ids: Iterable[UUID]) -> None:
+        """
+        Reload the trips of routes that were created, changed or deleted, or whose
+        departures changed.
+
+        Errors are only logged: the change is already committed, and the periodic
+        reload catches up.
+        """
+        route_ids = list(route_ids)
+        try:
+            self.replace_route_trips(route_ids, await load_trips(route_ids))
+        except Exception as e:
+            logger.error(f"Failed to refresh the journey planner: {e}")
+
+
+journey_planner = JourneyPlanner()
+
+registry.gauge(
+    "journey_planner_trips", "Departures loaded into the journey planner.",
+    callback=lambda: {(): len(journey_planner)})
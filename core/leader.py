@@ -0,0 +1,107 @@
+import os
+import socket
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from core.config import settings
+from core.logging import logger
+
+
+class LeaderElection:
+    """
+    Elects a single process to run scheduled jobs using a Postgres advisory lock.
+
+    The lock is session level and is held on a dedicated connection for as long as
+    this process stays leader. When the leader dies, Postgres drops its connection
+    and releases the lock, so the next `campaign()` of another worker wins it.
+    """
+
+    def __init__(
+            self, url: str = settings.postgres_async_db_url,
+            lock_key: int = settings.scheduler_lock_key
+            ):
+        """
+        Initialize the election for the given database and lock key.
+
+        :param url: The URL of the database that holds the lock. Defaults to the
+            value of the `postgres_async_db_url` setting.
+        :param lock_key: The advisory lock key. Defaults to the value of the
+            `scheduler_lock_key` setting.
+        """
+        self.lock_key = lock_key
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.is_leader = False
+        # NullPool: the lock connection must not be shared with or recycled by the app pool
+        self._engine = create_async_engine(url=url, poolclass=NullPool)
+        self._conn: AsyncConnection | None = None
+
+    async def campaign(self) -> bool:
+        """
+        Acquire leadership if it is free, or confirm that it is still held.
+
+        Meant to be called periodically by every worker.
+
+        :return: Whether this process is the leader after the call.
+        :rtype: bool
+        """
+        if self.is_leader:
+            try:
+                await self._conn.execute(text("SELECT 1"))
+                return True
+            except Exception as e:
+                logger.warning(
+                    f"Worker {self.worker_id} lost scheduler leadership: {e}")
+                self.is_leader = False
+                await self._close()
+
+        try:
+            self._conn = await self._engine.connect()
+            # Keep the lock connection out of an open transaction
+            await self._conn.execution_options(isolation_level="AUTOCOMMIT")
+            acquired = await self._conn.scalar(
+                text("SELECT pg_try_advisory_lock(:key)"),
+                {"key": self.lock_key}
+            )
+        except Exception as e:
+            logger.warning(
+                f"Worker {self.worker_id} could not campaign for scheduler leadership: {e}")
+            await self._close()
+            return False
+
+        if not acquired:
+            await self._close()
+            return False
+
+        self.is_leader = True
+        logger.info(f"Worker {self.worker_id} acquired scheduler leadership.")
+        return True
+
+    async def resign(self) -> None:
+        """Release leadership (if held) and close the lock connection."""
+        if self.is_leader:
+            try:
+                await self._conn.execute(
+                    text("SELECT pg_advisory_unlock(:key)"),
+                    {"key": self.lock_key}
+                )
+                logger.info(
+                    f"Worker {self.worker_id} released scheduler leadership.")
+            except Exception as e:
+                logger.warning(
+                    f"Worker {self.worker_id} failed to release scheduler leadership: {e}")
+            self.is_leader = False
+        await self._close()
+        await self._engine.dispose()
+
+    async def _close(self) -> None:
+        if self._conn is not None:
+            try:
+                await self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+
+leader_election = LeaderElection()
@@ -1,7 +1,61 @@
+import atexit
 import logging
 import logging.handlers
+import queue
 
-from core.config import BASE_DIR
+from core.config import BASE_DIR, settings
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    A QueueHandler that never blocks the caller.
+
+    Once the queue is filled above `high_water`, only one in `sample_rate` records
+    below WARNING is kept. When the queue is full, records are dropped. Dropped
+    records are counted and reported with a warning once the queue drains.
+    """
+
+    def __init__(
+            self, log_queue: queue.Queue, high_water: int, sample_rate: int
+            ):
+        super().__init__(log_queue)
+        self.high_water = high_water
+        self.sample_rate = max(sample_rate, 1)
+        self.dropped = 0
+        self._sample_counter = 0
+        self._unreported_drops = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        backlog = self.queue.qsize()
+
+        if backlog >= self.high_water and record.levelno < logging.WARNING:
+            self._sample_counter += 1
+            if self._sample_counter % self.sample_rate:
+                self._drop()
+                return
+
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self._drop()
+            return
+
+        if self._unreported_drops and backlog < self.high_water:
+            dropped, self._unreported_drops = self._unreported_drops, 0
+            try:
+                self.queue.put_nowait(logging.makeLogRecord({
+                    "name": __name__,
+                    "levelno": logging.WARNING,
+                    "levelname": "WARNING",
+                    "msg": f"Log queue overflow: dropped {dropped} records "
+                           f"({self.dropped} since startup).",
+                }))
+            except queue.Full:
+                self._unreported_drops += dropped
+
+    def _drop(self) -> None:
+        self.dropped += 1
+        self._unreported_drops += 1
 
 
 def setup_logging():
@@ -10,6 +64,10 @@ def setup_logging():
 
     Creates a logger that writes all logs to a single file with rotation.
     Also configures console logging for development.
+
+    The root logger only puts records on a bounded queue; a background
+    QueueListener thread does the actual file and console I/O, so logging
+    never blocks the event loop on disk writes or rotation.
     """
     # Create logs directory if it doesn't exist
     logs_dir = BASE_DIR / "logs"
@@ -41,11 +99,24 @@ def setup_logging():
     console_handler.setFormatter(console_formatter)
     console_handler.setLevel(logging.INFO)
 
+    # Queue between the application threads and the writer thread
+    log_queue = queue.Queue(maxsize=settings.log_queue_size)
+    queue_handler = DroppingQueueHandler(
+        log_queue,
+        high_water=int(settings.log_queue_size * settings.log_queue_high_water_ratio),
+        sample_rate=settings.log_overflow_sample_rate,
+    )
+    listener = logging.handlers.QueueListener(
+        log_queue, file_handler, console_handler,
+        respect_handler_level=True
+    )
+    listener.start()
+    atexit.register(listener.stop)
+
     # Configure root logger
     root_logger = logging.getLogger()
     root_logger.setLevel(logging.DEBUG)
-    root_logger.addHandler(file_handler)
-    root_logger.addHandler(console_handler)
+    root_logger.addHandler(queue_handler)
 
     # Suppress some noisy loggers
     logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
@@ -53,8 +124,23 @@ def setup_logging():
     logging.getLogger("sqlalchemy.dialects").setLevel(logging.WARNING)
     logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
 
-    return root_logger
+    return root_logger, queue_handler
+
+
+def get_log_queue_stats() -> dict:
+    """
+    Get the state of the logging queue.
+
+    :return: A dictionary with the current queue backlog, its capacity, and the
+        number of records dropped since startup.
+    :rtype: dict
+    """
+    return {
+        "queued": log_queue_handler.queue.qsize(),
+        "capacity": log_queue_handler.queue.maxsize,
+        "dropped": log_queue_handler.dropped,
+    }
 
 
 # Global logger instance
-logger = setup_logging()
+logger, log_queue_handler = setup_logging()
@@ -0,0 +1,204 @@
+import bisect
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable, Iterable
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric(ABC):
+    """
+    Base class of the in-process metrics.
+
+    Label values are passed positionally in the order of `labelnames`.
+    """
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def samples(self) -> Iterable[str]:
+        """Yield the exposition lines of every label combination."""
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {_escape(self.documentation)}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *label_values, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def samples(self) -> Iterable[str]:
+        # Snapshot under the lock: other threads may add label values meanwhile
+        with self._lock:
+            items = list(self._values.items())
+        for label_values, value in sorted(items):
+            yield (
+                f"{self.name}{_format_labels(self.labelnames, label_values)} "
+                f"{_format_value(value)}"
+            )
+
+
+class Gauge(Metric):
+    """
+    A gauge that is either set explicitly or read from `callback` on every scrape.
+
+    The callback returns a mapping of label value tuples to values.
+    """
+    type_name = "gauge"
+
+    def __init__(
+            self, name: str, documentation: str, labelnames: Iterable[str] = (),
+            callback: Callable[[], dict[tuple, float]] | None = None
+            ):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+        self.callback = callback
+
+    def set(self, value: float, *label_values) -> None:
+        with self._lock:
+            self._values[label_values] = value
+
+    def samples(self) -> Iterable[str]:
+        if self.callback:
+            items = list(self.callback().items())
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        for label_values, value in sorted(items):
+            yield (
+                f"{self.name}{_format_labels(self.labelnames, label_values)} "
+                f"{_format_value(value)}"
+            )
+
+
+class Histogram(Metric):
+    type_name = "histogram"
+
+    def __init__(
+            self, name: str, documentation: str, labelnames: Iterable[str] = (),
+            buckets: Iterable[float] = DEFAULT_BUCKETS
+            ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last one is +Inf), sum]
+        self._values: dict[tuple, list] = {}
+
+    def observe(self, value: float, *label_values) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(label_values)
+            if entry is None:
+                entry = self._values[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = [
+                (label_values, (list(counts), total))
+                for label_values, (counts, total) in self._values.items()
+            ]
+        for label_values, (counts, total) in sorted(items):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield (
+                    f"{self.name}_bucket"
+                    f"{_format_labels(self.labelnames, label_values, le)} {cumulative}"
+                )
+            labels = _format_labels(self.labelnames, label_values)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(
+            self, name: str, documentation: str, labelnames: Iterable[str] = (),
+            callback: Callable[[], dict[tuple, float]] | None = None
+            ) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, callback))
+
+    def histogram(
+            self, name: str, documentation: str, labelnames: Iterable[str] = (),
+            buckets: Iterable[float] = DEFAULT_BUCKETS
+            ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """
+        Render every registered metric in the Prometheus text exposition format.
+
+        :return: The exposition text, ending with a newline.
+        :rtype: str
+        """
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total", "HTTP requests by route template and status code.",
+    ("method", "route", "status"))
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.",
+    ("method", "route"))
+SCHEDULER_JOB_SECONDS = registry.histogram(
+    "scheduler_job_duration_seconds", "Duration of scheduler job runs.",
+    ("job",), buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0))
+SCHEDULER_JOB_LAST_SUCCESS = registry.gauge(
+    "scheduler_job_last_success_timestamp_seconds",
+    "Unix time of the last successful scheduler job run.", ("job",))
+PASSWORD_HASH_SECONDS = registry.histogram(
+    "password_hash_duration_seconds", "Time spent in bcrypt hashing and verification.",
+    ("operation",), buckets=(0.01, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0, 5.0))
@@ -0,0 +1,198 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.config import settings
+from core.logging import logger
+from core.metrics import HTTP_REQUESTS, HTTP_REQUEST_SECONDS
+from core.query_stats import begin_request, end_request
+
+CONTENT_SECURITY_POLICY = (
+    "default-src 'self'; "
+    # Allow Swagger UI scripts and inline evaluation
+    "script-src 'self' https://cdn.jsdelivr.net https://cdnjs.cloudflare.com https://unpkg.com 'unsafe-inline' 'unsafe-eval'; "
+    # Allow Swagger UI CSS
+    "style-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net https://cdnjs.cloudflare.com https://unpkg.com; "
+    # Allow API and Swagger to fetch resources
+    "connect-src 'self' http://localhost:8000; "
+    # Allow images and icons
+    "img-src 'self' data:; "
+)
+
+SAFE_METHODS = frozenset(("GET", "HEAD", "OPTIONS"))
+
+
+class CSPMiddleware:
+    """
+    Adds the Content-Security-Policy header to every HTTP response.
+    """
+
+    def __init__(self, app: ASGIApp, policy: str = CONTENT_SECURITY_POLICY):
+        self.app = app
+        self.header = (b"content-security-policy", policy.encode("latin-1"))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_csp(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), self.header]
+            await send(message)
+
+        await self.app(scope, receive, send_with_csp)
+
+
+class ReadYourWritesMiddleware:
+    """
+    Pins clients to the primary database for a short while after a write.
+
+    Successful non-safe requests get a short-lived cookie which makes
+    `db_handler.read_session_dependency` skip the read replica, so clients
+    read their own writes even when the replica lags behind.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.header = (
+            b"set-cookie",
+            (
+                f"{settings.read_your_writes_cookie}=1; "
+                f"HttpOnly; Max-Age={settings.read_your_writes_seconds}; "
+                f"Path=/; SameSite=lax"
+            ).encode("latin-1")
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                message["headers"] = [*message.get("headers", ()), self.header]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
+
+
+class QueryStatsMiddleware:
+    """
+    Counts the SQL queries executed for a request and the time spent in them.
+
+    Both are exposed in the `Server-Timing` response header (queries run while the
+    body is streamed are not included). In debug mode a warning is logged for
+    every statement shape that ran more than `sql_repeat_warn_threshold` times,
+    which usually points at an N+1 loop.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats, token = begin_request()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                server_timing = stats.server_timing().encode("latin-1")
+                message["headers"] = [
+                    *message.get("headers", ()), (b"server-timing", server_timing)]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            end_request(token)
+
+        if settings.debug:
+            for shape, count in stats.repeated_shapes(settings.sql_repeat_warn_threshold):
+                logger.warning(
+                    f"Possible N+1 in {scope['method']} {scope['path']}: "
+                    f"statement ran {count} times: {shape[:200]}"
+                )
+
+
+class MetricsMiddleware:
+    """
+    Records the count and latency of HTTP requests per route template.
+
+    The route template (e.g. `/api/routes/{route_id}`) is read from the matched
+    route after the request was handled, so raw paths never become label
+    values. Requests to mounted apps are labelled with the mount path and
+    requests that matched no route with UNMATCHED_ROUTE.
+    """
+    UNMATCHED_ROUTE = "<unmatched>"
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        root_path = scope.get("root_path", "")
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            if route is not None:
+                template = route.path
+            elif scope.get("root_path", "") != root_path:
+                template = scope["root_path"] + "/{path}"
+            else:
+                template = self.UNMATCHED_ROUTE
+            method = scope["method"]
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - start_time, method, template)
+            HTTP_REQUESTS.inc(method, template, str(status_code))
+
+
+class RequestLoggingMiddleware:
+    """
+    Logs incoming HTTP requests with their method, path, status code, and
+    processing time.
+
+    This middleware is useful for debugging and monitoring the API.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter_ns()
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            process_time = (time.perf_counter_ns() - start_time) / 1_000_000
+            logger.info(
+                f"{scope['method']} {scope['path']} "
+                f"Status: {status_code} "
+                f"Time: {process_time:.2f}ms"
+            )
@@ -0,0 +1,153 @@
+import base64
+import binascii
+import json
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Sequence
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+PREV_CURSOR_HEADER = "X-Prev-Cursor"
+
+# Limit used when a cursor is given to an endpoint whose limit is optional
+DEFAULT_CURSOR_LIMIT = 100
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def _decode_value(column: InstrumentedAttribute, value: Any) -> Any:
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is uuid.UUID:
+        return uuid.UUID(value)
+    return python_type(value)
+
+
+def encode_cursor(keys: Sequence[Any], direction: str) -> str:
+    """
+    Encode the sort key of a row into an opaque cursor.
+
+    :param keys: The values of the sort columns of the row.
+    :param direction: "next" to continue after the row, "prev" to continue before it.
+    :return: A URL-safe cursor string.
+    :rtype: str
+    """
+    payload = json.dumps(
+        {"k": [_encode_value(key) for key in keys], "d": direction},
+        separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(
+        cursor: str, columns: Sequence[InstrumentedAttribute]
+        ) -> tuple[list[Any], str]:
+    """
+    Decode a cursor created by `encode_cursor` for the given sort columns.
+
+    :param cursor: The cursor string.
+    :param columns: The sort columns of the endpoint.
+    :return: The sort key values and the direction.
+    :raises HTTPException: 400 if the cursor is malformed or doesn't match the columns.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        keys, direction = payload["k"], payload["d"]
+        if direction not in ("next", "prev") or len(keys) != len(columns):
+            raise ValueError("cursor does not match the sort columns")
+        return [_decode_value(c, k) for c, k in zip(columns, keys)], direction
+    except (binascii.Error, UnicodeError, ValueError, KeyError, TypeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid cursor: {e}"
+        )
+
+
+@dataclass
+class Page:
+    items: list
+    next_cursor: str | None
+    prev_cursor: str | None
+
+    def set_headers(self, response: Response) -> None:
+        """Expose the cursors in the X-Next-Cursor and X-Prev-Cursor headers."""
+        if self.next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = self.next_cursor
+        if self.prev_cursor:
+            response.headers[PREV_CURSOR_HEADER] = self.prev_cursor
+
+
+async def paginate(
+        session: AsyncSession,
+        query: Select,
+        columns: Sequence[InstrumentedAttribute],
+        limit: int | None,
+        cursor: str | None = None,
+        offset: int = 0,
+        ) -> Page:
+    """
+    Run `query` ordered by `columns` and return one page of its results.
+
+    With a cursor, the page is selected with a keyset condition on the sort
+    columns (`(a, b) > (:a, :b)`), so deep pages cost the same as the first one
+    when an index covers the columns. Without a cursor, `offset` is applied
+    (kept for backwards compatibility). Either way the page carries cursors to
+    the next and previous pages.
+
+    :param session: The database session to use.
+    :param query: A select of a single entity, without ORDER BY, LIMIT or OFFSET.
+    :param columns: The sort columns; the last one must be unique (e.g. the ID).
+    :param limit: The page size, or None to return every remaining row.
+    :param cursor: A cursor from a previous page, if any.
+    :param offset: The number of rows to skip when no cursor is given.
+    :return: The page.
+    :rtype: Page
+    """
+    direction = "next"
+    if cursor:
+        keys, direction = decode_cursor(cursor, columns)
+        if direction == "next":
+            query = query.where(tuple_(*columns) > tuple_(*keys))
+        else:
+            query = query.where(tuple_(*columns) < tuple_(*keys))
+    elif offset:
+        query = query.offset(offset)
+
+    if direction == "next":
+        query = query.order_by(*columns)
+    else:
+        query = query.order_by(*(column.desc() for column in columns))
+    if limit is not None:
+        query = query.limit(limit + 1)
+
+    result = await session.execute(query)
+    items = list(result.scalars().all())
+    has_more = limit is not None and len(items) > limit
+    items = items[:limit] if limit is not None else items
+    if direction == "prev":
+        items.reverse()
+
+    def key(item) -> list:
+        return [getattr(item, column.key) for column in columns]
+
+    next_cursor = prev_cursor = None
+    if items:
+        # There is a next page if more rows were found going forward, or if we
+        # came here going backwards; symmetrically for the previous page
+        if (direction == "next" and has_more) or direction == "prev":
+            next_cursor = encode_cursor(key(items[-1]), "next")
+        if (direction == "prev" and has_more) or (direction == "next" and (cursor or offset)):
+            prev_cursor = encode_cursor(key(items[0]), "prev")
+    return Page(items=items, next_cursor=next_cursor, prev_cursor=prev_cursor)
@@ -0,0 +1,108 @@
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar, Token
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# Bound parameter lists (e.g. an expanded IN clause) collapse into a single
+# placeholder so the same query with a different number of ids has one shape.
+_PARAMS_RE = re.compile(r"\$\d+(?:\s*,\s*\$\d+)*|%\(\w+\)s(?:\s*,\s*%\(\w+\)s)*|\?(?:\s*,\s*\?)*")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+class QueryStats:
+    """
+    Queries executed while handling a single request.
+    """
+    __slots__ = ("count", "total_seconds", "shapes")
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.shapes: Counter[str] = Counter()
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.total_seconds += seconds
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated_shapes(self, threshold: int) -> list[tuple[str, int]]:
+        """
+        Statement shapes executed more than `threshold` times, most frequent first.
+
+        :param threshold: The number of executions that is still considered fine.
+        :return: A list of (shape, count) tuples.
+        """
+        return [
+            (shape, count) for shape, count in self.shapes.most_common()
+            if count > threshold
+        ]
+
+    def server_timing(self) -> str:
+        """
+        Format the stats as a `Server-Timing` header value.
+
+        :return: e.g. `db;dur=12.34;desc="7 queries"`
+        """
+        return (
+            f'db;dur={self.total_seconds * 1000:.2f};'
+            f'desc="{self.count} queries"'
+        )
+
+
+_current_stats: ContextVar[QueryStats | None] = ContextVar(
+    "query_stats", default=None)
+
+
+def statement_shape(statement: str) -> str:
+    """
+    Normalize a SQL statement so executions differing only in parameters compare equal.
+
+    :param statement: The SQL statement as sent to the DBAPI cursor.
+    :return: The normalized statement.
+    """
+    statement = _PARAMS_RE.sub("?", statement)
+    return _WHITESPACE_RE.sub(" ", statement).strip()
+
+
+def begin_request() -> tuple[QueryStats, Token]:
+    """
+    Start collecting query stats for the current request.
+
+    :return: The stats object and the token to pass to `end_request()`.
+    """
+    stats = QueryStats()
+    return stats, _current_stats.set(stats)
+
+
+def end_request(token: Token) -> None:
+    """Stop collecting query stats for the current request."""
+    _current_stats.reset(token)
+
+
+def _before_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany):
+    context._query_start_time = time.perf_counter()
+
+
+def _after_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, time.perf_counter() - context._query_start_time)
+
+
+def instrument_engine(engine: AsyncEngine | Engine) -> None:
+    """
+    Attach the query counting hooks to an engine.
+
+    Queries run outside of a request (scheduler jobs, startup) are not counted.
+
+    :param engine: The engine to instrument.
+    """
+    sync_engine = getattr(engine, "sync_engine", engine)
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
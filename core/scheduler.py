@@ -1,69 +1,354 @@
+import functools
+import time
+
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
-from sqlalchemy import update
-from datetime import datetime, timedelta
+from sqlalchemy import literal, select, update
+from datetime import datetime, timedelta, timezone
 
 from models import Departure, DepartureStatus
+from auth.revocation import revocation_store
+from core.city_index import city_index
+from core.conditional import bump_route_versions, route_versions
 from core.db_handler import db_handler
+from core.departure_timer import departure_timer
+from core.journey_planner import journey_planner
+from core.leader import leader_election
+from core.timetable import extend_timetables
 from core.logging import logger
+from core.metrics import SCHEDULER_JOB_SECONDS, SCHEDULER_JOB_LAST_SUCCESS
 from core.config import settings
 
 scheduler = AsyncIOScheduler()
 
 
-async def update_delayed_departures_status():
+def leader_only(job):
+    """
+    Make a scheduler job a no-op in every process except the elected leader.
+
+    Every worker runs its own scheduler, so jobs that touch shared data must be
+    wrapped to avoid running once per worker.
+    """
+    @functools.wraps(job)
+    async def wrapper(*args, **kwargs):
+        if not leader_election.is_leader:
+            return None
+        return await job(*args, **kwargs)
+
+    return wrapper
+
+
+def timed_job(job):
+    """
+    Record the duration of every run of a scheduler job and the time of its last
+    successful run (one that didn't raise).
+    """
+    @functools.wraps(job)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            result = await job(*args, **kwargs)
+        finally:
+            SCHEDULER_JOB_SECONDS.observe(time.perf_counter() - started, job.__name__)
+        SCHEDULER_JOB_LAST_SUCCESS.set(time.time(), job.__name__)
+        return result
+
+    return wrapper
+
+
+@leader_only
+@timed_job
+async def update_delayed_departures_status() -> int:
     """
     Updates the status of all delayed departures to DELAYED.
 
     This function is used in the scheduler to periodically update the status of delayed departures.
+
+    Departures are updated in batches of delayed_sweep_batch_size rows, each in its own
+    transaction, so row locks are held briefly. Rows locked by other transactions are
+    skipped and picked up on the next cycle. A cycle stops after delayed_sweep_max_batches
+    batches. The candidate rows are found through the partial index on
+    departure_time WHERE status = 'SCHEDULED'.
+
+    :return: The number of departures updated in this cycle.
+    :rtype: int
     """
+    started = time.perf_counter()
+    threshold_time = datetime.now(timezone.utc) - timedelta(
+        minutes=settings.schedule_delay_minutes)
+    batch_size = settings.delayed_sweep_batch_size
+    # Rendered inline (not as a bind parameter) so that generic prepared plans
+    # can still match the partial index predicate
+    scheduled = literal(
+        DepartureStatus.SCHEDULED, Departure.status.type, literal_execute=True)
+    total_updated = 0
+    batches = 0
+
     async with db_handler.async_session_factory() as session:
         try:
-            current_time = datetime.utcnow()
-            threshold_time = current_time - timedelta(
-                minutes=settings.schedule_delay_minutes)
-
-            stmt = (
-                update(Departure)
-                .where(
-                    Departure.status == DepartureStatus.SCHEDULED,
-                    Departure.departure_time <= threshold_time
+            while batches < settings.delayed_sweep_max_batches:
+                batch_ids = (
+                    select(Departure.id)
+                    .where(
+                        Departure.status == scheduled,
+                        Departure.departure_time <= threshold_time
+                    )
+                    .order_by(Departure.departure_time)
+                    .limit(batch_size)
+                    .with_for_update(skip_locked=True)
                 )
-                .values(status=DepartureStatus.DELAYED)
-                .returning(Departure.id)
-            )
-            result = await session.execute(stmt)
-            updated_ids = result.scalars().all()
-            await session.commit()
-
-            if updated_ids:
-                logger.info(
-                    f"Updated {len(updated_ids)} departures to DELAYED status: {updated_ids}"
+                stmt = (
+                    update(Departure)
+                    .where(
+                        Departure.id.in_(batch_ids),
+                        Departure.status == scheduled
+                    )
+                    .values(status=DepartureStatus.DELAYED)
+                    .returning(Departure.route_id)
+                    .execution_options(synchronize_session=False)
                 )
-            else:
-                logger.info("No departures needed status update on this cycle.")
+                route_ids = (await session.execute(stmt)).scalars().all()
+                await bump_route_versions(session, route_ids)
+                await session.commit()
+                route_versions.invalidate(route_ids)
+
+                batches += 1
+                total_updated += len(route_ids)
+                if len(route_ids) < batch_size:
+                    break
 
         except Exception as e:
             logger.error(f"Error updating delayed departures: {e}")
             await session.rollback()
+            raise
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    logger.info(
+        f"Delayed departures sweep: {total_updated} departures set to DELAYED "
+        f"in {batches} batches ({elapsed_ms:.1f}ms)."
+    )
+    return total_updated
+
+
+@leader_only
+@timed_job
+async def reconcile_departures():
+    """
+    Reconciles departure statuses with the clock.
+
+    Runs the delayed-departures sweep and reloads the upcoming departures into the
+    departure timer, which performs the exact per-departure transitions. This is a
+    fallback for anything the timer missed (e.g. departures written by other workers
+    or directly in the database).
+    """
+    try:
+        await update_delayed_departures_status()
+    finally:
+        try:
+            loaded = await departure_timer.load()
+            logger.info(
+                f"Departure timer reloaded: {loaded} upcoming departures, "
+                f"{len(departure_timer)} pending transitions.")
+        except Exception as e:
+            logger.error(f"Error loading departures into the departure timer: {e}")
+
+
+@leader_only
+@timed_job
+async def extend_timetables_horizon():
+    """
+    Expands the timetable patterns up to timetable_horizon_days ahead.
+
+    This function is used in the scheduler to keep a rolling horizon of departures.
+    It only runs in the leader worker; running it again creates no duplicates.
+    """
+    created = await extend_timetables()
+    logger.info(f"Timetable horizon extended: {created} departures created.")
+
+
+@timed_job
+async def campaign_for_leadership():
+    """
+    Campaigns for scheduler leadership and reconciles departures when it is won.
+
+    This function is used in the scheduler in every worker.
+    """
+    was_leader = leader_election.is_leader
+    if await leader_election.campaign() and not was_leader:
+        await reconcile_departures()
+
+
+@timed_job
+async def refresh_revoked_tokens():
+    """
+    Loads token revocations made by other workers into the in-memory revocation store.
+
+    This function is used in the scheduler in every worker.
+    """
+    await revocation_store.refresh()
+
+
+@timed_job
+async def compact_revoked_tokens():
+    """
+    Drops expired token revocations.
+
+    Every worker prunes its in-memory store; the leader also deletes the expired rows.
+    """
+    dropped = revocation_store.prune()
+    logger.info(
+        f"Revocation store compacted: {dropped} expired tokens dropped, "
+        f"{len(revocation_store)} revoked tokens remaining.")
+    if leader_election.is_leader:
+        await revocation_store.delete_expired()
+
+
+@timed_job
+async def refresh_city_index():
+    """
+    Reloads the city autocomplete trie, picking up route changes made by other workers.
+
+    This function is used in the scheduler in every worker.
+    """
+    await city_index.load()
+
+
+@timed_job
+async def refresh_journey_planner():
+    """
+    Reloads the departures of the journey planner and moves its horizon forward.
+
+    This function is used in the scheduler in every worker.
+    """
+    loaded = await journey_planner.load()
+    logger.info(f"Journey planner reloaded: {loaded} departures.")
+
+
+def log_db_pool_status():
+    """
+    Logs a snapshot of the database connection pool.
+
+    This function is used in the scheduler to periodically report pool pressure.
+    """
+    status = db_handler.pool_status()
+    logger.info(
+        f"DB pool: checked_out={status['checked_out']} "
+        f"checked_in={status['checked_in']} overflow={status['overflow']} "
+        f"avg_wait={status['avg_wait_ms']}ms max_wait={status['max_wait_ms']}ms "
+        f"timeouts={status['checkout_timeouts']}"
+    )
 
 
 def start_scheduler():
     """
     Start the scheduler for automatic departure status updates.
 
-    Adds a job to the scheduler to periodically update the status of delayed departures.
+    Starts the departure timer, which sets departures to DELAYED at their exact threshold time.
+
+    Adds a job that lets this worker campaign for scheduler leadership every
+    scheduler_leader_heartbeat_seconds seconds, starting immediately.
+
+    Adds a job to the scheduler to periodically reconcile departure statuses.
     The job is triggered every schedule_interval_minutes minutes
-    and updates the status of all departures that are delayed by more than schedule_interval_minutes minutes to DELAYED.
+    and updates the status of all departures that are delayed by more than schedule_delay_minutes minutes to DELAYED,
+    then reloads upcoming departures into the departure timer.
+    It only runs in the leader worker.
+
+    Adds jobs that load token revocations into memory every token_revocation_refresh_seconds
+    seconds, starting immediately, and compact expired revocations every
+    token_revocation_compact_minutes minutes.
+
+    Adds a job that expands timetable patterns to a rolling timetable_horizon_days
+    horizon every timetable_extend_interval_hours hours. It only runs in the leader worker.
+
+    Adds a job that reloads the city autocomplete every city_index_refresh_seconds seconds.
+
+    Adds a job that reloads the journey planner every journey_refresh_minutes minutes,
+    starting immediately.
     The scheduler is then started.
     """
+    departure_timer.start()
+
     scheduler.add_job(
-        update_delayed_departures_status,
+        campaign_for_leadership,
+        trigger=IntervalTrigger(
+            seconds=settings.scheduler_leader_heartbeat_seconds,
+            ),
+        id="scheduler_leader_election",
+        name="Scheduler Leader Election",
+        next_run_time=datetime.now(),
+        replace_existing=True
+    )
+
+    scheduler.add_job(
+        reconcile_departures,
         trigger=IntervalTrigger(
             minutes=settings.schedule_interval_minutes,
             ),
-        id="update_delayed_departures_status",
-        name="Update Delayed Departures Status",
+        id="reconcile_departures",
+        name="Reconcile Departure Statuses",
+        replace_existing=True
+    )
+
+    scheduler.add_job(
+        refresh_revoked_tokens,
+        trigger=IntervalTrigger(
+            seconds=settings.token_revocation_refresh_seconds,
+            ),
+        id="refresh_revoked_tokens",
+        name="Refresh Revoked Tokens",
+        next_run_time=datetime.now(),
+        replace_existing=True
+    )
+
+    scheduler.add_job(
+        compact_revoked_tokens,
+        trigger=IntervalTrigger(
+            minutes=settings.token_revocation_compact_minutes,
+            ),
+        id="compact_revoked_tokens",
+        name="Compact Revoked Tokens",
+        replace_existing=True
+    )
+
+    scheduler.add_job(
+        extend_timetables_horizon,
+        trigger=IntervalTrigger(
+            hours=settings.timetable_extend_interval_hours,
+            ),
+        id="extend_timetables_horizon",
+        name="Extend Timetables Horizon",
+        replace_existing=True
+    )
+
+    scheduler.add_job(
+        refresh_city_index,
+        trigger=IntervalTrigger(
+            seconds=settings.city_index_refresh_seconds,
+            ),
+        id="refresh_city_index",
+        name="Refresh City Index",
+        replace_existing=True
+    )
+
+    scheduler.add_job(
+        refresh_journey_planner,
+        trigger=IntervalTrigger(
+            minutes=settings.journey_refresh_minutes,
+            ),
+        id="refresh_journey_planner",
+        name="Refresh Journey Planner",
+        next_run_time=datetime.now(),
+        replace_existing=True
+    )
+
+    scheduler.add_job(
+        log_db_pool_status,
+        trigger=IntervalTrigger(
+            minutes=settings.db_pool_log_interval_minutes,
+            ),
+        id="log_db_pool_status",
+        name="Log DB Pool Status",
         replace_existing=True
     )
 
@@ -71,7 +356,13 @@ def start_scheduler():
     logger.info("Scheduler started for automatic departure status updates.")
 
 
-def shutdown_scheduler():
-    """Shutdown the scheduler for automatic departure status updates."""
+async def shutdown_scheduler():
+    """
+    Shutdown the scheduler for automatic departure status updates.
+
+    Releases scheduler leadership so another worker can take over right away.
+    """
     scheduler.shutdown()
+    await departure_timer.stop()
+    await leader_election.resign()
     logger.info("Scheduler shut down.")
@@ -0,0 +1,203 @@
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterable, Sequence
+from uuid import UUID
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Departure, DepartureStatus, Route, RouteStatus, TimetablePattern
+from core.conditional import bump_route_versions, route_versions
+from core.config import settings
+from core.db_handler import db_handler
+from core.departure_timer import departure_timer
+from core.journey_planner import journey_planner
+from core.logging import logger
+from schemas.timetable import WEEKDAYS
+
+# Routes whose timetables are expanded
+EXPANDED_ROUTE_STATUSES = (RouteStatus.ACTIVE, RouteStatus.SEASONAL)
+
+
+def expand_pattern(
+        departure_times: Sequence[time], weekdays: Iterable[str],
+        valid_from: date, valid_until: date | None, exceptions: Iterable[date],
+        start: date, end: date, tz: ZoneInfo
+        ) -> list[datetime]:
+    """
+    List the departure times of a recurring pattern between two dates.
+
+    :param departure_times: The times of day, in `tz`.
+    :param weekdays: The lower-case names of the weekdays with departures.
+    :param valid_from: The first date of the pattern.
+    :param valid_until: The last date of the pattern, or None if open-ended.
+    :param exceptions: Dates without departures.
+    :param start: The first date to expand.
+    :param end: The last date to expand.
+    :param tz: The time zone of the times of day.
+    :return: The departure times in UTC, in chronological order.
+    """
+    first = max(start, valid_from)
+    last = min(end, valid_until) if valid_until else end
+    days = {WEEKDAYS.index(weekday) for weekday in weekdays}
+    skipped = set(exceptions)
+    times = sorted(departure_times)
+
+    result = []
+    day = first
+    while day <= last:
+        if day.weekday() in days and day not in skipped:
+            result.extend(
+                datetime.combine(day, departure_time, tzinfo=tz).astimezone(timezone.utc)
+                for departure_time in times
+            )
+        day += timedelta(days=1)
+    return result
+
+
+async def expand_timetable(
+        session: AsyncSession, pattern: TimetablePattern, duration_minutes: int, until: date
+        ) -> list[tuple[UUID, datetime]]:
+    """
+    Insert the departures of a pattern from where its last expansion stopped up to
+    `until`. Doesn't commit.
+
+    Rows go in with multi-row INSERTs of timetable_insert_batch_size rows.
+    Departures that already exist for the pattern are skipped through the unique
+    index on (timetable_pattern_id, departure_time), so expanding twice is harmless.
+
+    :param session: The database session to use.
+    :param pattern: The pattern; its expanded_until is moved to `until`.
+    :param duration_minutes: The route duration, used for the arrival times.
+    :param until: The last date to expand.
+    :return: The IDs and departure times of the inserted departures.
+    """
+    start = pattern.valid_from
+    if pattern.expanded_until is not None:
+        start = max(start, pattern.expanded_until + timedelta(days=1))
+    now = datetime.now(timezone.utc)
+
+    departure_times = [
+        departure_time for departure_time in expand_pattern(
+            [time.fromisoformat(value) for value in pattern.departure_times],
+            pattern.weekdays, pattern.valid_from, pattern.valid_until,
+            [date.fromisoformat(value) for value in pattern.exceptions or []],
+            max(start, now.date()), until, ZoneInfo(settings.timetable_timezone),
+        )
+        if departure_time > now
+    ]
+
+    duration = timedelta(minutes=duration_minutes)
+    created_at = datetime.utcnow()
+    batch_size = settings.timetable_insert_batch_size
+    inserted = []
+    for offset in range(0, len(departure_times), batch_size):
+        rows = [
+            {
+                "id": uuid.uuid4(),
+                "route_id": pattern.route_id,
+                "timetable_pattern_id": pattern.id,
+                "departure_time": departure_time,
+                "arrival_time": departure_time + duration,
+                "status": DepartureStatus.SCHEDULED,
+                "is_cancelled": False,
+                "is_full": False,
+                "created_at": created_at,
+                "updated_at": created_at,
+            }
+            for departure_time in departure_times[offset:offset + batch_size]
+        ]
+        stmt = (
+            insert(Departure)
+            .values(rows)
+            .on_conflict_do_nothing(
+                index_elements=[Departure.timetable_pattern_id, Departure.departure_time],
+                index_where=Departure.timetable_pattern_id.is_not(None),
+            )
+            .returning(Departure.id, Departure.departure_time)
+        )
+        inserted.extend((await session.execute(stmt)).all())
+
+    if pattern.expanded_until is None or pattern.expanded_until < until:
+        pattern.expanded_until = until
+    return inserted
+
+
+def expansion_end() -> date:
+    """
+    The last date timetables are expanded to: timetable_horizon_days from today.
+    """
+    return datetime.now(timezone.utc).date() + timedelta(days=settings.timetable_horizon_days)
+
+
+async def timetables_expanded(
+        inserted: Sequence[tuple[UUID, datetime]], route_ids: Iterable[UUID]
+        ) -> None:
+    """
+    Update the route versions, the departure timer and the journey planner once
+    expanded departures are committed.
+
+    :param inserted: The IDs and departure times of the inserted departures.
+    :param route_ids: The routes that got departures.
+    """
+    route_ids = set(route_ids)
+    route_versions.invalidate(route_ids)
+    for departure_id, departure_time in inserted:
+        if departure_timer.in_horizon(departure_time):
+            departure_timer.schedule(departure_id, departure_time)
+    if route_ids:
+        await journey_planner.routes_changed(route_ids)
+
+
+async def extend_timetables(pattern_ids: Iterable[UUID] | None = None) -> int:
+    """
+    Expand the active timetable patterns of active and seasonal routes up to
+    timetable_horizon_days from today, in one transaction.
+
+    Afterwards the route versions, the departure timer and the journey planner
+    are updated for the routes that got departures.
+
+    :param pattern_ids: Only expand these patterns; all of them when None.
+    :return: The number of departures created.
+    :rtype: int
+    """
+    today = datetime.now(timezone.utc).date()
+    until = expansion_end()
+    stmt = (
+        select(TimetablePattern, Route.duration_minutes)
+        .join(Route, TimetablePattern.route_id == Route.id)
+        .where(
+            TimetablePattern.is_active.is_(True),
+            Route.status.in_(EXPANDED_ROUTE_STATUSES),
+            or_(TimetablePattern.expanded_until.is_(None),
+                TimetablePattern.expanded_until < until),
+            or_(TimetablePattern.valid_until.is_(None),
+                TimetablePattern.valid_until >= today),
+        )
+    )
+    if pattern_ids is not None:
+        stmt = stmt.where(TimetablePattern.id.in_(list(pattern_ids)))
+
+    inserted: list[tuple[UUID, datetime]] = []
+    route_ids: set[UUID] = set()
+    async with db_handler.async_session_factory() as session:
+        try:
+            for pattern, duration_minutes in (await session.execute(stmt)).all():
+                rows = await expand_timetable(session, pattern, duration_minutes, until)
+                if rows:
+                    inserted.extend(rows)
+                    route_ids.add(pattern.route_id)
+            await bump_route_versions(session, route_ids)
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+
+    await timetables_expanded(inserted, route_ids)
+    if route_ids:
+        logger.info(
+            f"Timetables expanded until {until}: {len(inserted)} departures "
+            f"created on {len(route_ids)} routes.")
+    return len(inserted)
@@ -1,35 +1,39 @@
-import asyncio
-import time
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
-import typer
 
 from core.config import settings
-from core.database import Base
+from core.database import Base, add_missing_columns, create_extensions, create_missing_indexes
+from core.city_index import city_index
 from core.db_handler import db_handler
+from core.pagination import NEXT_CURSOR_HEADER, PREV_CURSOR_HEADER
 from core.exception_handlers import (
     http_exception_handler, validation_exception_handler,
     integrity_error_handler, sqlalchemy_exception_handler,
     generic_exception_handler
 )
-from core.logging import logger
+from core.middleware import (
+    CSPMiddleware, ReadYourWritesMiddleware, QueryStatsMiddleware,
+    MetricsMiddleware, RequestLoggingMiddleware
+)
 from core.scheduler import start_scheduler, shutdown_scheduler
 from routers.auth_api import router as auth_api_router
 from routers.route_api import router as route_api_router
+from routers.city_api import router as city_api_router
+from routers.journey_api import router as journey_api_router
+from routers.timetable_api import router as timetable_api_router
 from routers.departure_api import router as departure_api_router
 from routers.bus_api import router as bus_api_router
 from routers.auth_pages import router as auth_pages_router
 from routers.routes_pages import router as routes_pages_router
 from routers.buses_pages import router as buses_pages_router
-
-from scripts.create_admin import create_admin_from_env
+from routers.admin_api import router as admin_api_router
+from routers.metrics_api import router as metrics_api_router
 
 
 @asynccontextmanager
@@ -48,11 +52,15 @@ async def lifespan(app: FastAPI):
 
     # Startup
     async with db_handler.engine.begin() as conn:
+        await conn.run_sync(create_extensions)
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(add_missing_columns)
+        await conn.run_sync(create_missing_indexes)
         print("======== All tables created. ========")
 
     # Create admin user
     try:
+        from scripts.create_admin import create_admin_from_env
         await create_admin_from_env()
     except Exception as e:
         print(f"Warning: Failed to create admin user: {e}")
@@ -67,13 +75,19 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             print(f"Warning: Failed to populate test data: {e}")
 
+    # Sync the cities table with the routes and load the city autocomplete
+    try:
+        await city_index.rebuild()
+    except Exception as e:
+        print(f"Warning: Failed to build the city index: {e}")
+
     # Start scheduler
     start_scheduler()
 
     yield
 
     # Shutdown scheduler
-    shutdown_scheduler()
+    await shutdown_scheduler()
 
     # Shutdown
     async with db_handler.engine.begin() as conn:
@@ -103,49 +117,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, PREV_CURSOR_HEADER, "ETag"],
 )
 
 
-@app.middleware("http")
-async def add_csp_header(request: Request, call_next):
-    response = await call_next(request)
-    response.headers["Content-Security-Policy"] = (
-        "default-src 'self'; "
-        # Allow Swagger UI scripts and inline evaluation
-        "script-src 'self' https://cdn.jsdelivr.net https://cdnjs.cloudflare.com https://unpkg.com 'unsafe-inline' 'unsafe-eval'; "
-        # Allow Swagger UI CSS
-        "style-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net https://cdnjs.cloudflare.com https://unpkg.com; "
-        # Allow API and Swagger to fetch resources
-        "connect-src 'self' http://localhost:8000; "
-        # Allow images and icons
-        "img-src 'self' data:; "
-    )
-    return response
-
-
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    """
-    Logs incoming HTTP requests with their method, path, status code, and
-    processing time.
-
-    This middleware is useful for debugging and monitoring the API.
-    """
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = (time.time() - start_time) * 1000
-
-    logger.info(
-        f"{request.method} {request.url.path} "
-        f"Status: {response.status_code} "
-        f"Time: {process_time:.2f}ms"
-    )
-    return response
+# Pure ASGI middleware, the last one added is the outermost
+app.add_middleware(CSPMiddleware)
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(RequestLoggingMiddleware)
 
 
-# Setup Jinja2 templates
-templates = Jinja2Templates(directory="frontend/templates")
-
 # Serve static files (CSS, JS)
 app.mount(
     "/static", StaticFiles(directory="frontend/static"), name="static")
@@ -162,6 +145,15 @@ app.include_router(auth_pages_router)
 app.include_router(route_api_router)
 app.include_router(routes_pages_router)
 
+# Include city router
+app.include_router(city_api_router)
+
+# Include journey router
+app.include_router(journey_api_router)
+
+# Include timetable router
+app.include_router(timetable_api_router)
+
 # Include departure router
 app.include_router(departure_api_router)
 
@@ -169,6 +161,12 @@ app.include_router(departure_api_router)
 app.include_router(bus_api_router)
 app.include_router(buses_pages_router)
 
+# Include admin router
+app.include_router(admin_api_router)
+
+# Include metrics router
+app.include_router(metrics_api_router)
+
 
 @app.get("/")
 async def root():
@@ -183,25 +181,41 @@ async def root():
     return {"message": "Welcome to the Bus Booking System API"}
 
 
-# CLI command for populating test data
-cli_app = typer.Typer()
+def run_cli():
+    """
+    Run the command line interface.
 
+    The CLI and everything it needs is imported here, so serving the app
+    never pays for it.
+    """
+    import asyncio
 
-@cli_app.command()
-def populate_test_data():
-    """Populate the database with test data."""
-    print("Populating test data...")
-    from test_utils.data_populator import populate_test_data
-    asyncio.run(populate_test_data())
-    print("Test data populated successfully!")
+    import typer
 
+    cli_app = typer.Typer()
 
-@cli_app.command()
-def dev():
-    """Run the FastAPI development server."""
-    import uvicorn
-    uvicorn.run("main:app", host="127.0.0.1", port=8000, reload=True)
+    @cli_app.command()
+    def populate_test_data():
+        """Populate the database with test data."""
+        print("Populating test data...")
+        from test_utils.data_populator import populate_test_data
+        asyncio.run(populate_test_data())
+        print("Test data populated successfully!")
 
+    @cli_app.command()
+    def dev():
+        """Run the FastAPI development server."""
+        import uvicorn
+        uvicorn.run("main:app", host="127.0.0.1", port=8000, reload=True)
+
+    @cli_app.command()
+    def startup_profile(limit: int = 25, module: str = "main"):
+        """Print the slowest imports of a cold import of the app."""
+        from scripts.startup_profile import print_profile
+        print_profile(module, limit)
 
-if __name__ == "__main__":
     cli_app()
+
+
+if __name__ == "__main__":
+    run_cli()
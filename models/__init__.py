@@ -1,15 +1,23 @@
 from .user import User, UserRole
 from .route import Route, RouteStatus
+from .route_stop import RouteStop
 from .departure import Departure, DepartureStatus
+from .timetable_pattern import TimetablePattern
 from .bus import Bus, BusType, BusStatus
 from .seat import Seat
 from .bus_route import BusRoute
+from .revoked_token import RevokedToken
+from .city import City
 
 __all__ = [
     "User", "UserRole",
     "Route", "RouteStatus",
+    "RouteStop",
     "Departure", "DepartureStatus",
+    "TimetablePattern",
     "Bus", "BusType", "BusStatus",
     "Seat",
     "BusRoute",
+    "RevokedToken",
+    "City",
     ]
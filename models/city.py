@@ -0,0 +1,35 @@
+from sqlalchemy import Column, String, Integer, Index
+
+from core.database import Base
+
+
+class City(Base):
+    """
+    A city served by at least one route, kept in sync with the routes table by
+    `core.city_index.sync_cities`. Backs the city autocomplete.
+    """
+    __tablename__ = "cities"
+
+    name = Column(String(100), primary_key=True)
+    # Name normalized like the queries (core.city_index.normalize_city), used for
+    # the prefix and trigram searches
+    search_name = Column(String(100), nullable=False)
+    # Number of routes starting or ending in the city, used to rank suggestions
+    route_count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        # Prefix search (LIKE 'abc%') regardless of the database collation
+        Index(
+            "ix_cities_search_name_prefix", "search_name",
+            postgresql_ops={"search_name": "text_pattern_ops"},
+        ),
+        # Substring and fuzzy search; needs the pg_trgm extension
+        Index(
+            "ix_cities_search_name_trgm", "search_name",
+            postgresql_using="gin",
+            postgresql_ops={"search_name": "gin_trgm_ops"},
+        ),
+    )
+
+    def __repr__(self) -> str:
+        return f"<City(name='{self.name}', route_count={self.route_count})>"
@@ -2,7 +2,7 @@ import uuid
 import enum
 
 from sqlalchemy import (
-    Column, Enum, Text, Boolean, ForeignKey, DateTime
+    Column, Enum, Text, Boolean, ForeignKey, DateTime, Index, text
     )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
@@ -20,6 +20,24 @@ class DepartureStatus(enum.Enum):
 
 class Departure(Base):
     __tablename__ = "departures"
+    __table_args__ = (
+        # Partial index backing the delayed-departures sweep (core.scheduler)
+        Index(
+            "ix_departures_scheduled_departure_time",
+            "departure_time",
+            postgresql_where=text("status = 'SCHEDULED'"),
+        ),
+        # Keyset pagination of departures (core.pagination)
+        Index("ix_departures_departure_time_id", "departure_time", "id"),
+        Index("ix_departures_route_id_departure_time_id", "route_id", "departure_time", "id"),
+        # Makes timetable expansion idempotent (ON CONFLICT DO NOTHING, core.timetable)
+        Index(
+            "uq_departures_timetable_pattern_id_departure_time",
+            "timetable_pattern_id", "departure_time",
+            unique=True,
+            postgresql_where=text("timetable_pattern_id IS NOT NULL"),
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     route_id = Column(
@@ -40,6 +58,11 @@ class Departure(Base):
     is_full = Column(Boolean, default=False)
     notes = Column(Text, nullable=True)
 
+    # The timetable pattern this departure was generated from, if any
+    timetable_pattern_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("timetable_patterns.id", ondelete="SET NULL"), nullable=True)
+
     route = relationship("Route", back_populates="departures")
 
     bus = relationship("Bus", back_populates="departures")
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+
+from core.database import Base
+
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    # The `jti` claim of the revoked token
+    jti = Column(String(64), primary_key=True)
+    user_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    # The token's own expiry; the row can be deleted afterwards
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+    # created_at (the revocation time) and updated_at are inherited from the Base class
+
+    def __repr__(self) -> str:
+        return f"<RevokedToken(jti='{self.jti}', user_id={self.user_id})>"
@@ -39,6 +39,9 @@ class Route(Base):
     description = Column(Text, nullable=True)
     notes = Column(Text, nullable=True)
 
+    # Incremented on every change to the route or its departures (core.conditional)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
     created_by_id = Column(
         UUID(as_uuid=True),
         ForeignKey("users.id", ondelete="SET NULL"), nullable=True
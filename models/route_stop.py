@@ -0,0 +1,30 @@
+from sqlalchemy import Column, String, Integer, ForeignKey, Index, func
+from sqlalchemy.dialects.postgresql import UUID
+
+from core.database import Base
+
+
+class RouteStop(Base):
+    """
+    A city a route stops in, including its origin (seq 0) and destination (last seq).
+
+    Normalized copy of Route.origin_city, Route.intermediate_stops and
+    Route.destination_city, written by `routers.utils.sync_route_stops`, so
+    routes can be searched by any city they pass through.
+    """
+    __tablename__ = "route_stops"
+
+    route_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("routes.id", ondelete="CASCADE"), primary_key=True)
+    seq = Column(Integer, primary_key=True)
+    city = Column(String(100), nullable=False)
+    offset_km = Column(Integer, nullable=False, default=0)
+    dwell_minutes = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return f"<RouteStop(route_id={self.route_id}, seq={self.seq}, city='{self.city}')>"
+
+
+# Case-insensitive "routes through city" lookups
+Index("ix_route_stops_city_lower", func.lower(RouteStop.city))
@@ -0,0 +1,47 @@
+import uuid
+
+from sqlalchemy import Column, Date, Boolean, ForeignKey, JSON
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+
+from core.database import Base
+
+
+class TimetablePattern(Base):
+    """
+    A recurring timetable of a route: departures at the same times of day on the
+    given weekdays between valid_from and valid_until, except on the exception dates.
+
+    Patterns are expanded into departures by `core.timetable`, up to
+    timetable_horizon_days ahead; expanded_until is the last date expanded so far.
+    """
+    __tablename__ = "timetable_patterns"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    route_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("routes.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    # "HH:MM" times of day, in the timetable_timezone
+    departure_times = Column(JSON, nullable=False)
+    # Lower-case weekday names, like Route.operating_days
+    weekdays = Column(JSON, nullable=False)
+    valid_from = Column(Date, nullable=False)
+    valid_until = Column(Date, nullable=True)
+    # ISO dates without departures
+    exceptions = Column(JSON, nullable=True)
+
+    is_active = Column(Boolean, nullable=False, default=True)
+    expanded_until = Column(Date, nullable=True)
+
+    created_by_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+
+    route = relationship("Route")
+
+    def __repr__(self) -> str:
+        return (
+            f"<TimetablePattern(route_id={self.route_id}, "
+            f"times={self.departure_times}, weekdays={self.weekdays})>"
+        )
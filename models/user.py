@@ -1,7 +1,7 @@
 import enum
 import uuid
 
-from sqlalchemy import Column, String, Enum, Boolean
+from sqlalchemy import Column, String, Enum, Boolean, DateTime, Index, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -24,6 +24,8 @@ class User(Base):
     username = Column(String(50), unique=True, index=True, nullable=False)
     email = Column(String(255), unique=True, index=True, nullable=False)
     password_hash = Column(String(255), nullable=False)
+    # Tokens issued before this time (UTC, whole seconds) are rejected
+    tokens_valid_after = Column(DateTime, nullable=True, index=True)
 
     # User role
     role = Column(Enum(UserRole), default=UserRole.CUSTOMER, nullable=False)
@@ -80,3 +82,9 @@ class User(Base):
     @property
     def is_staff(self) -> bool:
         return self.role == UserRole.STAFF
+
+
+# Functional indexes backing the case-insensitive lookups
+# (routers.utils.get_user_by_username_or_email, routers.utils.find_user_conflicts)
+Index("ix_users_username_lower", func.lower(User.username))
+Index("ix_users_email_lower", func.lower(User.email))
@@ -0,0 +1,89 @@
+from fastapi import APIRouter, Depends
+
+from auth.dependencies import get_admin_claims
+from auth.jwt_utils import jwt_manager
+from auth.principal_cache import Principal, principal_cache
+from core.db_handler import db_handler
+from core.logging import get_log_queue_stats
+
+router = APIRouter(prefix="/api/admin", tags=["Admin API"])
+
+
+@router.get(
+    "/db/pool",
+    summary="Get database pool statistics",
+    description="Get live connection pool statistics for the primary and replica engines"
+)
+async def get_db_pool_status(
+    current_user: Principal = Depends(get_admin_claims)
+) -> dict:
+    """
+    Get live connection pool statistics for the primary and replica engines.
+
+    Returns:
+    - pool_size, max_overflow: the configured pool limits.
+    - checked_in, checked_out, overflow: the current state of the pool.
+    - checkouts, checkout_timeouts, avg_wait_ms, max_wait_ms: checkout counters
+    collected since startup.
+    - replica: the same statistics for the read replica's pool, or None when
+    no replica is configured.
+    """
+    return {
+        **db_handler.pool_status(),
+        "replica": db_handler.pool_status(replica=True),
+    }
+
+
+@router.get(
+    "/logging",
+    summary="Get logging queue statistics",
+    description="Get the backlog of the logging queue and the number of dropped records"
+)
+async def get_logging_status(
+    current_user: Principal = Depends(get_admin_claims)
+) -> dict:
+    """
+    Get the backlog of the logging queue and the number of dropped records.
+
+    Returns:
+    - queued: records waiting for the writer thread.
+    - capacity: the maximum size of the queue.
+    - dropped: records dropped or sampled out since startup.
+    """
+    return get_log_queue_stats()
+
+
+@router.get(
+    "/auth/principal-cache",
+    summary="Get principal cache statistics",
+    description="Get the size and hit/miss counters of the authenticated principal cache"
+)
+async def get_principal_cache_status(
+    current_user: Principal = Depends(get_admin_claims)
+) -> dict:
+    """
+    Get the size and hit/miss counters of this worker's principal cache.
+
+    Returns:
+    - size, max_size: the number of cached principals and the cache capacity.
+    - hits, misses: cache lookups since startup.
+    """
+    return principal_cache.stats()
+
+
+@router.get(
+    "/auth/token-cache",
+    summary="Get verified token cache statistics",
+    description="Get the size and hit/miss counters of the verified token cache"
+)
+async def get_token_cache_status(
+    current_user: Principal = Depends(get_admin_claims)
+) -> dict:
+    """
+    Get the size and hit/miss counters of this worker's verified token cache.
+
+    Returns:
+    - size, max_size: the number of cached tokens and the cache capacity.
+    - hits, misses: token verifications since startup.
+    """
+    return jwt_manager.verified_cache_stats()
@@ -1,6 +1,8 @@
+from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 
@@ -14,12 +16,15 @@ from core.db_handler import db_handler
 from core.logging import logger
 from auth.pass_utils import pwd_utils
 from auth.jwt_utils import jwt_manager
-from auth.dependencies import get_current_user, get_admin_user
+from auth.admission import login_admission
+from auth.dependencies import (
+    security, get_current_user, get_current_user_record, get_admin_user)
+from auth.principal_cache import Principal, principal_cache
+from auth.revocation import revocation_store
 
 from .utils import (
-    get_user_by_username, get_user_by_email,
     get_user_by_username_or_email,
-    check_user_exists
+    find_user_conflicts, check_user_exists
     )
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication API"])
@@ -49,24 +54,22 @@ async def register_user(
     :return: UserResponse instance containing the newly created user's details.
     """
     try:
-        # Check if username already exists
-        existing_username = await get_user_by_username(user_data.username, session)
-        if existing_username:
+        # Check if username or email already exist
+        username_taken, email_taken = await find_user_conflicts(
+            user_data.username, user_data.email, session)
+        if username_taken:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Username already exists."
             )
-
-        # Check if email already exists
-        existing_email = await get_user_by_email(user_data.email, session)
-        if existing_email:
+        if email_taken:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already exists."
             )
 
         # Hash the password
-        hashed_password = pwd_utils.hash_password(user_data.password)
+        hashed_password = await pwd_utils.hash_password_async(user_data.password)
 
         # Create new user instance
         new_user = User(
@@ -119,7 +122,7 @@ async def register_user(
 async def update_current_user_profile(
     user_data: UserUpdate,
     session: AsyncSession = Depends(db_handler.session_dependency),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user_record)
 ) -> UserResponse:
     """
     Update the profile information of the currently authenticated user.
@@ -138,23 +141,20 @@ async def update_current_user_profile(
     :raises HTTPException: If the username or email already exists, or if an unexpected error occurs while updating the user profile.
     """
     try:
-        # Check for username uniqueness (exclude current user)
-        if user_data.username:
-            existing_user = await get_user_by_username(user_data.username, session)
-            if existing_user and existing_user.id != current_user.id:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Username already exists."
-                )
-
-        # Check for email uniqueness (exclude current user)
-        if user_data.email:
-            existing_user = await get_user_by_email(user_data.email, session)
-            if existing_user and existing_user.id != current_user.id:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Email already exists."
-                )
+        # Check for username and email uniqueness (exclude current user)
+        username_taken, email_taken = await find_user_conflicts(
+            user_data.username, user_data.email, session,
+            exclude_user_id=current_user.id)
+        if username_taken:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Username already exists."
+            )
+        if email_taken:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Email already exists."
+            )
 
         current_user.username = user_data.username if user_data.username else current_user.username
         current_user.email = user_data.email if user_data.email else current_user.email
@@ -164,10 +164,15 @@ async def update_current_user_profile(
 
         session.add(current_user)
         await session.commit()
+        principal_cache.invalidate(current_user.id)
         await session.refresh(current_user)
 
         return current_user
 
+    except HTTPException:
+        await session.rollback()
+        raise
+
     except IntegrityError as e:
         await session.rollback()
         logger.error(f"Database integrity error during profile update: {e}")
@@ -193,13 +198,15 @@ async def update_current_user_profile(
 async def change_current_user_password(
     password_data: PasswordChangeSchema,
     session: AsyncSession = Depends(db_handler.session_dependency),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user_record)
 ) -> dict:
     """
     Change the password of the currently authenticated user.
 
     This endpoint takes in a PasswordChangeSchema object containing the current password and the new password.
     It verifies the current password and then hashes the new password and updates the user's password hash in the database.
+    All tokens issued before the change, including the one used for this request, stop being accepted;
+    the user has to log in again.
 
     If the current password is incorrect, a 400 Bad Request response is returned with a detail message indicating that the current password is incorrect.
 
@@ -213,7 +220,7 @@ async def change_current_user_password(
     """
     try:
         # Verify current password
-        if not pwd_utils.verify_password(
+        if not await pwd_utils.verify_password_async(
             password_data.current_password, current_user.password_hash
         ):
             raise HTTPException(
@@ -222,11 +229,14 @@ async def change_current_user_password(
             )
 
         # Hash the new password
-        hashed_new_password = pwd_utils.hash_password(password_data.new_password)
+        hashed_new_password = await pwd_utils.hash_password_async(password_data.new_password)
         current_user.password_hash = hashed_new_password
+        # Invalidate the tokens issued so far
+        revocation_store.invalidate_user_tokens(current_user)
 
         session.add(current_user)
         await session.commit()
+        principal_cache.invalidate(current_user.id)
 
         logger.info(f"User password changed: {current_user.id} - <{current_user.username}>")
         return {"message": "Password changed successfully."}
@@ -252,7 +262,7 @@ async def change_current_user_password(
 async def register_admin(
     admin_data: AdminCreate,
     session: AsyncSession = Depends(db_handler.session_dependency),
-    current_user: User = Depends(get_admin_user),
+    current_user: Principal = Depends(get_admin_user),
 ):
     """
     Create a new admin user account with email and username validation.
@@ -282,7 +292,7 @@ async def register_admin(
         admin = User(
             username=admin_data.username,
             email=admin_data.email,
-            password_hash=pwd_utils.hash_password(admin_data.password),
+            password_hash=await pwd_utils.hash_password_async(admin_data.password),
             role=UserRole.ADMIN,
             first_name=admin_data.first_name,
             last_name=admin_data.last_name,
@@ -320,7 +330,7 @@ async def register_admin(
 async def delete_current_user(
         password_confirmation: PasswordConfirmationSchema,
         session: AsyncSession = Depends(db_handler.session_dependency),
-        current_user: User = Depends(get_current_user)
+        current_user: User = Depends(get_current_user_record)
         ) -> UserDeleteResponse:
     """
     Delete the account of the currently authenticated user (soft delete).
@@ -343,7 +353,7 @@ async def delete_current_user(
     """
     try:
         # Verify if password is correct
-        if not pwd_utils.verify_password(
+        if not await pwd_utils.verify_password_async(
                 password_confirmation.password, current_user.password_hash):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -354,8 +364,10 @@ async def delete_current_user(
         current_user.is_active = False
         current_user.email = f"deleted_{current_user.id}_{current_user.email}"
         current_user.username = f"deleted_{current_user.id}_{current_user.username}"
+        revocation_store.invalidate_user_tokens(current_user)
 
         await session.commit()
+        principal_cache.invalidate(current_user.id)
 
         logger.info(f"User account deleted (soft): {current_user.id} - {current_user.username}")
 
@@ -383,7 +395,7 @@ async def delete_current_user(
 async def admin_delete_user(
     user_id: UUID,
     session: AsyncSession = Depends(db_handler.session_dependency),
-    current_user: User = Depends(get_admin_user)
+    current_user: Principal = Depends(get_admin_user)
 ) -> UserDeleteResponse:
     """
     Admin endpoint to delete a user account by user ID (soft delete).
@@ -432,8 +444,10 @@ async def admin_delete_user(
         target_user.is_active = False
         target_user.email = f"deleted_{target_user.id}_{target_user.email}"
         target_user.username = f"deleted_{target_user.id}_{target_user.username}"
+        revocation_store.invalidate_user_tokens(target_user)
 
         await session.commit()
+        principal_cache.invalidate(target_user.id)
 
         logger.info(
             f"User (id: {target_user.id} <{original_username}>) \
@@ -467,7 +481,7 @@ async def admin_hard_delete_user(
     user_id: UUID,
     password_confirmation: PasswordConfirmationSchema,
     session: AsyncSession = Depends(db_handler.session_dependency),
-    current_user: User = Depends(get_admin_user)
+    current_user: Principal = Depends(get_admin_user)
 ) -> dict:
     """
     Admin endpoint to permanently delete a user account.
@@ -490,8 +504,9 @@ async def admin_hard_delete_user(
     """
     try:
         # Verify admin password
-        if not pwd_utils.verify_password(
-                password_confirmation.password, current_user.password_hash):
+        admin = await session.get(User, current_user.id)
+        if not admin or not await pwd_utils.verify_password_async(
+                password_confirmation.password, admin.password_hash):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Invalid admin password confirmation"
@@ -515,9 +530,15 @@ async def admin_hard_delete_user(
         deleted_username = target_user.username
         deleted_id = target_user.id
 
+        # Reject the user's tokens in this worker. The watermark is deleted with
+        # the row, so other workers reject them once the principal cache entry
+        # expires (claims-only admin endpoints: once the token expires)
+        revocation_store.invalidate_user_tokens(target_user)
+
         # Hard delete (will cascade to related records)
         await session.delete(target_user)
         await session.commit()
+        principal_cache.invalidate(deleted_id)
 
         logger.critical(
             f"User (id: {deleted_id} <{deleted_username}>) \
@@ -553,7 +574,7 @@ async def admin_hard_delete_user(
 async def admin_reactivate_user(
     user_id: UUID,
     session: AsyncSession = Depends(db_handler.session_dependency),
-    current_user: User = Depends(get_admin_user)
+    current_user: Principal = Depends(get_admin_user)
 ) -> UserResponse:
     """
     Admin endpoint to reactivate a soft-deleted user account by user ID.
@@ -595,6 +616,7 @@ async def admin_reactivate_user(
             user.email = user.email.replace(f"deleted_{user.id}_", "", 1)
 
         await session.commit()
+        principal_cache.invalidate(user.id)
         await session.refresh(user)
 
         logger.info(
@@ -625,6 +647,7 @@ async def admin_reactivate_user(
 )
 async def login_user(
     login_data: UserLogin,
+    request: Request,
     session: AsyncSession = Depends(db_handler.session_dependency)
 ) -> TokenResponse:
     """
@@ -634,13 +657,21 @@ async def login_user(
     The endpoint requires a username or email and a password to be provided.
     If the username/email or password is incorrect, a 401 Unauthorized response is returned.
     If the user account is inactive, a 401 Unauthorized response is returned with a detail message indicating that the user account is inactive.
+    If the stored hash was made with a different bcrypt cost than `bcrypt_rounds`, the password is rehashed.
+    If the client IP or the username exceeded its login rate, a 429 Too Many Requests response is returned.
+    If too many password verifications are already running, a 503 Service Unavailable response is returned.
     If an unexpected error occurs during login, a 500 Internal Server Error response is returned.
 
     :param login_data: UserLogin instance containing the user's credentials.
+    :param request: The incoming request, used for the client IP.
     :param session: The database session to use.
     :return: A TokenResponse object containing the generated JWT tokens.
     :raises HTTPException: If the username/email or password is incorrect, or if the user account is inactive, or if an unexpected error occurs during login.
     """
+    login_admission.check_rate(
+        "login", request.client.host if request.client else None,
+        login_data.username_or_email)
+
     try:
         # Find user by username or email
         user = await get_user_by_username_or_email(
@@ -653,7 +684,10 @@ async def login_user(
             )
 
         # Verify password
-        if not pwd_utils.verify_password(login_data.password, user.password_hash):
+        async with login_admission.verification_slot("login"):
+            password_valid = await pwd_utils.verify_password_async(
+                login_data.password, user.password_hash)
+        if not password_valid:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect username/email or password",
@@ -680,6 +714,17 @@ async def login_user(
 
         logger.info(f"User logged in: {user.id} - <{user.username}>")
 
+        # Rehash the password if the configured cost factor changed
+        if pwd_utils.needs_rehash(user.password_hash):
+            user_id = user.id
+            try:
+                user.password_hash = await pwd_utils.hash_password_async(login_data.password)
+                await session.commit()
+                logger.info(f"Password rehashed with cost {pwd_utils.rounds}: {user_id}")
+            except Exception as e:
+                await session.rollback()
+                logger.error(f"Error rehashing password of user {user_id}: {e}")
+
         return TokenResponse(
             access_token=access_token,
             refresh_token=refresh_token,
@@ -687,6 +732,9 @@ async def login_user(
             expires_in=jwt_manager.access_token_expire_minutes * 2
         )
 
+    except HTTPException:
+        raise
+
     except Exception as e:
         logger.error(f"Error during user login: {e}")
         raise HTTPException(
@@ -703,6 +751,7 @@ async def login_user(
 )
 async def refresh_token(
     token_data: TokenRefresh,
+    request: Request,
     session: AsyncSession = Depends(db_handler.session_dependency)
 ) -> TokenResponse:
     """
@@ -712,9 +761,15 @@ async def refresh_token(
 
     If the user associated with the refresh token is inactive, a 401 Unauthorized response is returned.
 
+    If the refresh token was revoked, or issued before the user's last password change,
+    a 401 Unauthorized response is returned.
+
+    If the client IP exceeded its refresh rate, a 429 Too Many Requests response is returned.
+
     If an unexpected error occurs while refreshing the token, a 500 Internal Server Error response is returned.
 
     :param token_data: The refresh token data.
+    :param request: The incoming request, used for the client IP.
     :return: A new access token and refresh token.
     :raises HTTPException: If the refresh token is invalid, expired, or if the associated user is inactive.
     """
@@ -723,6 +778,9 @@ async def refresh_token(
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    login_admission.check_rate(
+        "refresh", request.client.host if request.client else None)
+
     try:
         # Verify refresh token
         payload = jwt_manager.verify_token(token_data.refresh_token)
@@ -733,6 +791,10 @@ async def refresh_token(
         if payload.get("type") != "refresh":
             raise credentials_exception
 
+        # Check that the token was not revoked on logout
+        if revocation_store.is_revoked(payload.get("jti")):
+            raise credentials_exception
+
         # Extract user
         user_id: int = payload.get("user_id")
         if not user_id:
@@ -741,6 +803,8 @@ async def refresh_token(
         user = await session.get(User, user_id)
         if not user or not user.is_active:
             raise credentials_exception
+        if not Principal.from_user(user).accepts_token_issued_at(payload.get("iat")):
+            raise credentials_exception
 
         # Create new tokens
         token_data = {
@@ -772,31 +836,51 @@ async def refresh_token(
 
 @router.post(
     "/logout",
-    summary="Logout user (client-side token discard)",
-    description="Client should discard tokens; server does not track token state"
+    summary="Logout user",
+    description="Revoke the access token and, if provided, the refresh token"
 )
 async def logout_user(
-    current_user: User = Depends(get_current_user)
+    token_data: Optional[TokenRefresh] = None,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    session: AsyncSession = Depends(db_handler.session_dependency),
+    current_user: Principal = Depends(get_current_user)
 ) -> dict:
     """
-    Client should discard tokens; server does not track token state.
+    Revoke the access token and, if provided, the refresh token.
 
-    This endpoint is purely informative and does not perform any server-side action.
-    It is intended to be used by clients to notify the server that a user has logged out,
-    and that the associated token should be discarded.
-
-    The server does not store any information about tokens, and does not revoke or blacklist
-    tokens when a user logs out.
+    The access token used for this request is revoked until it expires. If the request
+    body contains a refresh token of the same user, it is revoked as well; otherwise it
+    is ignored. Revoked tokens are rejected by every worker within
+    token_revocation_refresh_seconds (immediately by this one).
 
     The endpoint returns a message indicating that the user has been successfully logged out,
-    as well as instructions to discard the token from client storage.
+    as well as instructions to discard the tokens from client storage.
 
+    :param token_data: The refresh token to revoke, optional.
+    :param credentials: The bearer credentials of the request.
+    :param session: The database session to use.
+    :param current_user: The currently authenticated user.
     :return: A dictionary containing a message and instructions.
     """
+    tokens = [jwt_manager.verify_token(credentials.credentials)]
+    if token_data is not None:
+        refresh_payload = jwt_manager.verify_token(token_data.refresh_token)
+        if (
+            refresh_payload is not None
+            and refresh_payload.get("type") == "refresh"
+            and refresh_payload.get("user_id") == str(current_user.id)
+        ):
+            tokens.append(refresh_payload)
+
+    for payload in tokens:
+        if payload and payload.get("jti") and payload.get("exp"):
+            await revocation_store.revoke(
+                session, payload["jti"], current_user.id, payload["exp"])
+
     logger.info(f"User logged out: {current_user.id} - <{current_user.username}>")
     return {
         "message": "Successfully logged out",
-        "instructions": "Please remove the token from client storage"
+        "instructions": "Please remove the tokens from client storage"
     }
 
 
@@ -807,7 +891,7 @@ async def logout_user(
     description="Get information about the currently authenticated user"
 )
 async def get_current_user_info(
-        current_user: User = Depends(get_current_user)) -> UserResponse:
+        current_user: User = Depends(get_current_user_record)) -> UserResponse:
     """
     Get information about the currently authenticated user.
 
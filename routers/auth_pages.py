@@ -1,11 +1,8 @@
-from fastapi.templating import Jinja2Templates
 from fastapi.responses import FileResponse
 from fastapi import APIRouter
 
 router = APIRouter(prefix="/auth", tags=["Authentication Pages"])
 
-templates = Jinja2Templates(directory="frontend/templates")
-
 
 @router.get("/register")
 async def register_page():
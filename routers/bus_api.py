@@ -2,20 +2,23 @@ import string
 from uuid import UUID
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update, delete
 from sqlalchemy.orm import selectinload
 from sqlalchemy.exc import IntegrityError
 
-from models import User, Bus, BusType, BusStatus, BusRoute, Seat, Departure
+from models import Bus, BusType, BusStatus, BusRoute, Seat, Departure
 from schemas.bus import (
     BusCreate, BusResponse,
     BusUpdate, BusListItem
 )
-from auth.dependencies import get_admin_user
+from auth.dependencies import get_admin_user, get_admin_claims
+from auth.principal_cache import Principal
+from core.conditional import bump_route_versions, route_versions
 from core.db_handler import db_handler
 from core.logging import logger
+from core.pagination import paginate
 
 router = APIRouter(prefix="/api/buses", tags=["Buses API"])
 
@@ -29,7 +32,7 @@ router = APIRouter(prefix="/api/buses", tags=["Buses API"])
 async def create_bus(
     bus_data: BusCreate,
     session: AsyncSession = Depends(db_handler.session_dependency),
-    current_user: User = Depends(get_admin_user)
+    current_user: Principal = Depends(get_admin_user)
 ):
     """
     Create a new bus with the provided details.
@@ -126,21 +129,25 @@ async def create_bus(
     description="Get a list of all buses"
 )
 async def get_buses(
+    response: Response,
     offset: int = Query(0, ge=0),
     limit: int = Query(16, ge=1, le=100),
+    cursor: Optional[str] = None,
     bus_number: Optional[str] = None,
     manufacturer: Optional[str] = None,
     model: Optional[str] = None,
     bus_type: Optional[BusType] = Query(None, alias="type"),
     status_filter: Optional[BusStatus] = Query(None, alias="status"),
-    current_user: User = Depends(get_admin_user),
+    current_user: Principal = Depends(get_admin_claims),
     session: AsyncSession = Depends(db_handler.session_dependency)
 ):
     """
     Get a list of all buses.
 
     Parameters:
-    - offset: The number of buses to skip before returning the result.
+    - cursor: An X-Next-Cursor or X-Prev-Cursor value from a previous page.
+    - offset: The number of buses to skip before returning the result,
+    ignored when a cursor is given (kept for backwards compatibility).
     - limit: The maximum number of buses to return in the result.
     - bus_number: Filter by bus number.
     - manufacturer: Filter by manufacturer.
@@ -153,6 +160,8 @@ async def get_buses(
     the bus number, license plate, bus name, bus type,
     capacity, distance, estimated duration, base price,
     status, is accessible, description, notes.
+    Buses are ordered by bus number; the cursors of the neighbouring pages are
+    returned in the X-Next-Cursor and X-Prev-Cursor response headers.
 
     Raises:
     - HTTPException: if there is an unexpected error during bus retrieval.
@@ -173,12 +182,14 @@ async def get_buses(
             query = query.where(Bus.status == status_filter)
 
         # Apply pagination
-        query = query.offset(offset).limit(limit)
+        page = await paginate(
+            session, query, (Bus.bus_number, Bus.id), limit, cursor, offset)
+        page.set_headers(response)
 
-        result = await session.execute(query)
-        buses = result.scalars().all()
+        return page.items
 
-        return buses
+    except HTTPException:
+        raise
 
     except Exception as e:
         logger.error(f"Unexpected error during bus retrieval: {str(e)}")
@@ -196,7 +207,7 @@ async def get_buses(
 )
 async def get_bus(
     bus_id: UUID,
-    current_user: User = Depends(get_admin_user),
+    current_user: Principal = Depends(get_admin_claims),
     session: AsyncSession = Depends(db_handler.session_dependency)
 ):
     """
@@ -239,7 +250,7 @@ async def get_bus(
 async def update_bus(
     bus_id: UUID,
     bus_data: BusUpdate,
-    current_user: User = Depends(get_admin_user),
+    current_user: Principal = Depends(get_admin_user),
     session: AsyncSession = Depends(db_handler.session_dependency)
 ):
     """
@@ -267,6 +278,10 @@ async def update_bus(
                 detail=f"Bus with ID {bus_id} not found."
             )
 
+        # Departures served by the bus show its details, so their routes change too
+        served_routes = select(Departure.route_id).where(Departure.bus_id == bus_id)
+        affected_route_ids = set((await session.execute(served_routes)).scalars())
+
         if bus_data.bus_number and bus_data.bus_number != bus.bus_number:
             stmt = select(Bus).where(Bus.bus_number == bus_data.bus_number)
             existing_bus = await session.execute(stmt)
@@ -329,7 +344,12 @@ async def update_bus(
                     seat = Seat(bus_id=bus_id, seat_number=seat_number)
                     session.add(seat)
 
+        await session.flush()
+        affected_route_ids.update((await session.execute(served_routes)).scalars())
+        await bump_route_versions(session, affected_route_ids)
+
         await session.commit()
+        route_versions.invalidate(affected_route_ids)
         await session.refresh(bus)
 
         logger.info(
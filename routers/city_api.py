@@ -0,0 +1,49 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from schemas.city import CitySuggestion
+from core.city_index import city_index, search_cities
+from core.config import settings
+from core.db_handler import db_handler
+
+router = APIRouter(prefix="/api/cities", tags=["Cities API"])
+
+
+@router.get(
+    "/suggest",
+    response_model=List[CitySuggestion],
+    summary="Suggest cities",
+    description="Autocomplete city names for route search"
+)
+async def suggest_cities(
+    q: str = Query("", max_length=100),
+    limit: int = Query(10, ge=1, le=settings.city_suggest_max_limit),
+    session: AsyncSession = Depends(db_handler.read_session_dependency)
+):
+    """
+    Suggest cities with a word starting with the given text, e.g. "yo" and
+    "new y" both suggest "New York". Suggestions are ranked by the number of
+    routes serving the city.
+
+    Prefix matches are served from memory. Only when there is none and the
+    query has at least city_fuzzy_min_length characters is a trigram
+    similarity search run in the database, so typos still get suggestions. The
+    session only connects to the database when that search runs.
+
+    Parameters:
+    - q (str): The text typed so far; the most served cities are returned when empty.
+    - limit (int): The maximum number of suggestions.
+
+    Returns:
+    - A list of CitySuggestion objects with the city name and its number of routes.
+    """
+    suggestions = city_index.suggest(q, limit)
+    if not suggestions and len(q.strip()) >= settings.city_fuzzy_min_length:
+        suggestions = await search_cities(session, q, limit)
+
+    return [
+        CitySuggestion(name=name, route_count=route_count)
+        for name, route_count in suggestions
+    ]
@@ -2,15 +2,27 @@ from uuid import UUID
 from typing import List, Optional
 from datetime import datetime, timedelta, date
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy import select, distinct, func, and_
 from sqlalchemy.orm import selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from core.conditional import (
+    bump_route_versions, route_versions, make_etag, time_bucket,
+    is_not_modified, not_modified, set_validators
+)
 from core.db_handler import db_handler
+from core.departure_timer import departure_timer
+from core.export import (
+    EXPORT_MEDIA_TYPES, ExportFormat, departure_export_query, stream_departures
+)
+from core.journey_planner import journey_planner
 from core.logging import logger
-from auth.dependencies import get_admin_user
-from models import Departure, User, DepartureStatus
+from core.pagination import DEFAULT_CURSOR_LIMIT, paginate
+from auth.dependencies import get_admin_user, get_admin_claims
+from auth.principal_cache import Principal
+from models import Departure, DepartureStatus
 from schemas.departure import DepartureResponse, DepartureResponsePublic, DepartureUpdateStatus
 
 
@@ -44,7 +56,7 @@ async def update_departure_status(
     departure_id: UUID,
     status_update: DepartureUpdateStatus,
     session: AsyncSession = Depends(db_handler.session_dependency),
-    current_user: User = Depends(get_admin_user)
+    current_user: Principal = Depends(get_admin_user)
 ):
     departure = await session.get(Departure, departure_id)
     if not departure:
@@ -64,9 +76,14 @@ async def update_departure_status(
     if status_update.notes:
         departure.notes = status_update.notes
 
+    await bump_route_versions(session, [departure.route_id])
     await session.commit()
+    route_versions.invalidate([departure.route_id])
     await session.refresh(departure)
 
+    departure_timer.schedule_departures([departure])
+    await journey_planner.routes_changed([departure.route_id])
+
     logger.info(f"Departure {departure_id} status updated from {old_status.value} to {departure.status.value} by user {current_user.id}")
 
     return departure
@@ -80,31 +97,41 @@ async def update_departure_status(
         )
 async def get_departures_for_route(
     route_id: UUID,
-    session: AsyncSession = Depends(db_handler.session_dependency)
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(db_handler.read_session_dependency)
 ):
     """
     Get all departures for a route by provided route_id.
 
     Parameters:
     - route_id (UUID): The ID of the route for which to retrieve departures.
+    - limit (int, optional): The maximum number of departures to return. All of them
+    are returned when omitted (and no cursor is given).
+    - cursor (str, optional): An X-Next-Cursor or X-Prev-Cursor value from a previous page.
 
     Returns:
-    - A list of DepartureResponse objects, each containing the departure details.
+    - A list of DepartureResponse objects, each containing the departure details,
+    ordered by departure time. The cursors of the neighbouring pages are returned
+    in the X-Next-Cursor and X-Prev-Cursor response headers.
 
     Raises:
-    - None
+    - HTTPException: 400 if the cursor is invalid.
     """
-    result = await session.execute(
+    if cursor and limit is None:
+        limit = DEFAULT_CURSOR_LIMIT
+
+    query = (
         select(Departure)
         .options(selectinload(Departure.route))
         .where(Departure.route_id == route_id)
     )
-    departures = result.scalars().all()
+    page = await paginate(
+        session, query, (Departure.departure_time, Departure.id), limit, cursor)
+    page.set_headers(response)
 
-    if not departures:
-        return []
-
-    return departures
+    return page.items
 
 
 @router.get(
@@ -114,23 +141,37 @@ async def get_departures_for_route(
     description="Get all departures"
 )
 async def get_departures(
-    current_user: User = Depends(get_admin_user),
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+    current_user: Principal = Depends(get_admin_claims),
     session: AsyncSession = Depends(db_handler.session_dependency)
 ):
     """
     Get all departures.
 
+    Parameters:
+    - limit (int, optional): The maximum number of departures to return. All of them
+    are returned when omitted (and no cursor is given).
+    - cursor (str, optional): An X-Next-Cursor or X-Prev-Cursor value from a previous page.
+
     Returns:
-    - A list of DepartureResponse objects, each containing the departure details.
+    - A list of DepartureResponse objects, each containing the departure details,
+    ordered by departure time. The cursors of the neighbouring pages are returned
+    in the X-Next-Cursor and X-Prev-Cursor response headers.
 
     Raises:
-    - None
+    - HTTPException: 400 if the cursor is invalid.
     """
-    result = await session.execute(
-        select(Departure)
-        .options(selectinload(Departure.route))
-        )
-    departures = result.scalars().all()
+    if cursor and limit is None:
+        limit = DEFAULT_CURSOR_LIMIT
+
+    page = await paginate(
+        session,
+        select(Departure).options(selectinload(Departure.route)),
+        (Departure.departure_time, Departure.id), limit, cursor)
+    page.set_headers(response)
+    departures = page.items
 
     if not departures:
         return []
@@ -138,6 +179,50 @@ async def get_departures(
     return departures
 
 
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    summary="Export departures",
+    description="Stream departures as NDJSON or CSV"
+)
+async def export_departures(
+    export_format: ExportFormat = Query(ExportFormat.NDJSON, alias="format"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    route_id: Optional[UUID] = None,
+    current_user: Principal = Depends(get_admin_claims)
+):
+    """
+    Export departures, streamed as the rows are read from the database.
+
+    Parameters:
+    - format (str): "ndjson" (one JSON object per line, the default) or "csv".
+    - start (datetime, optional): Only departures leaving at or after this time.
+    - end (datetime, optional): Only departures leaving before this time.
+    - route_id (UUID, optional): Only departures of this route.
+
+    Returns:
+    - A streaming response with the departures ordered by departure time, including
+    the route number, cities and bus number.
+
+    Raises:
+    - HTTPException: 400 if end is not after start.
+    """
+    if start is not None and end is not None and end <= start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="End must be after start"
+        )
+
+    stmt = departure_export_query(start, end, route_id)
+    filename = f"departures.{export_format.value}"
+    return StreamingResponse(
+        stream_departures(stmt, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
 @router.get(
     "/by_route/{route_id}/calendar/{year}/{month}",
     summary="Get departure dates for calendar view",
@@ -147,8 +232,18 @@ async def get_departures_for_calendar(
     route_id: UUID,
     year: int,
     month: int,
-    session: AsyncSession = Depends(db_handler.session_dependency)
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(db_handler.read_session_dependency)
 ) -> dict:
+    # Conditional GET on the route version; no departures for unknown routes
+    version = await route_versions.get(session, route_id)
+    if version is None:
+        return {"departure_dates": []}
+    etag = make_etag("calendar", route_id, version.version, year, month)
+    if is_not_modified(request, etag, version.updated_at):
+        return not_modified(etag, version.updated_at)
+
     # Getting first day of month
     start_date = datetime(year, month, 1)
     # Getting last day of the month (first day of next month minus 1 day)
@@ -172,6 +267,7 @@ async def get_departures_for_calendar(
     result = await session.execute(stmt)
     dates = [row[0] for row in result.all()]
 
+    set_validators(response, etag, version.updated_at)
     return {"departure_dates": dates}
 
 
@@ -183,12 +279,17 @@ async def get_departures_for_calendar(
 )
 async def get_upcoming_departures_for_route(
     route_id: UUID,
+    request: Request,
+    response: Response,
     days_ahead: int = 7,
-    session: AsyncSession = Depends(db_handler.session_dependency)
+    session: AsyncSession = Depends(db_handler.read_session_dependency)
 ):
     """
     Get upcoming departures for a route within the specified number of days.
 
+    The ETag combines the route version with the current etag_time_bucket_seconds
+    interval, since departures drop out of the window as time passes.
+
     Parameters:
     - route_id (UUID): The ID of the route
     - days_ahead (int): Number of days to look ahead (default: 7)
@@ -196,6 +297,13 @@ async def get_upcoming_departures_for_route(
     Returns:
     - List of DepartureResponse objects
     """
+    version = await route_versions.get(session, route_id)
+    if version is None:
+        return []
+    etag = make_etag("upcoming", route_id, version.version, days_ahead, time_bucket())
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+
     now = datetime.now()
     end_date = now + timedelta(days=days_ahead)
     stmt = (
@@ -217,6 +325,7 @@ async def get_upcoming_departures_for_route(
     result = await session.execute(stmt)
     departures = result.scalars().all()
 
+    set_validators(response, etag)
     if not departures:
         return []
 
@@ -234,11 +343,16 @@ async def get_daily_departures(
     year: int,
     month: int,
     day: int,
-    session: AsyncSession = Depends(db_handler.session_dependency)
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(db_handler.read_session_dependency)
 ):
     """
     Get all departures for a route on a specific date.
 
+    The response carries an ETag and Last-Modified derived from the route version;
+    a matching If-None-Match or If-Modified-Since gets a 304.
+
     Parameters:
     - route_id (UUID): The ID of the route
     - year (int): Year (e.g., 2025)
@@ -248,6 +362,13 @@ async def get_daily_departures(
     Returns:
     - List of DepartureResponse objects for that date
     """
+    version = await route_versions.get(session, route_id)
+    if version is None:
+        return []
+    etag = make_etag("daily", route_id, version.version, year, month, day)
+    if is_not_modified(request, etag, version.updated_at):
+        return not_modified(etag, version.updated_at)
+
     # Creating date object for the specified day
     target_date = date(year, month, day)
     # Creating datetime range for the day
@@ -273,6 +394,7 @@ async def get_daily_departures(
     result = await session.execute(stmt)
     departures = result.scalars().all()
 
+    set_validators(response, etag, version.updated_at)
     if not departures:
         return []
 
@@ -0,0 +1,62 @@
+from datetime import date, datetime, time, timezone
+
+from fastapi import APIRouter, HTTPException, Query, status
+
+from schemas.journey import JourneyPlanResponse
+from core.journey_planner import journey_planner
+
+router = APIRouter(prefix="/api/journeys", tags=["Journeys API"])
+
+
+@router.get(
+    "/plan",
+    response_model=JourneyPlanResponse,
+    summary="Plan a journey",
+    description="Find journeys between two cities, including ones with transfers"
+)
+async def plan_journey(
+    origin: str = Query(..., min_length=1, max_length=100),
+    destination: str = Query(..., min_length=1, max_length=100),
+    travel_date: date = Query(..., alias="date"),
+    after: time = Query(time(0, 0), description="Earliest departure time (UTC)")
+):
+    """
+    Plan a journey between two cities, combining departures of different routes
+    when there is no direct one. Transfers take at least journey_min_transfer_minutes.
+
+    Parameters:
+    - origin (str): The origin city (case-insensitive).
+    - destination (str): The destination city (case-insensitive).
+    - date (date): The travel date.
+    - after (time, optional): The earliest departure time on that date, in UTC.
+
+    Returns:
+    - A JourneyPlanResponse with the earliest arriving itinerary, the itinerary with
+    the fewest transfers, and the best itinerary for every number of transfers in
+    between. The itineraries are empty when there is no connection.
+
+    Raises:
+    - HTTPException: 400 if the origin and the destination are the same city.
+    - HTTPException: 404 if either city is not served by any upcoming departure.
+    """
+    if origin.strip().casefold() == destination.strip().casefold():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Origin and destination must be different cities."
+        )
+
+    depart_after = datetime.combine(travel_date, after, tzinfo=timezone.utc)
+    itineraries = journey_planner.plan(origin, destination, depart_after)
+    if itineraries is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No upcoming departures serve the origin or the destination."
+        )
+
+    return JourneyPlanResponse(
+        origin=origin,
+        destination=destination,
+        earliest_arrival=itineraries[-1] if itineraries else None,
+        fewest_transfers=itineraries[0] if itineraries else None,
+        itineraries=itineraries,
+    )
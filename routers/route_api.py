@@ -2,23 +2,40 @@ from uuid import UUID
 from typing import List, Optional
 from datetime import timedelta, timezone
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy import select, func
 from sqlalchemy.exc import IntegrityError
 
-from models import User, Route, RouteStatus, Departure
+from models import Route, RouteStatus, RouteStop, Departure
 from schemas.route import (
     RouteCreate, RouteResponse, RouteListItem,
     RouteUpdate
 )
 from auth.dependencies import get_admin_user
+from auth.principal_cache import Principal
+from core.city_index import city_index, sync_route_cities
+from core.conditional import (
+    bump_route_versions, route_versions, routes_version,
+    make_etag, is_not_modified, not_modified, set_validators
+)
 from core.db_handler import db_handler
+from core.departure_timer import departure_timer
+from core.journey_planner import journey_planner
 from core.logging import logger
+from core.pagination import paginate
+from routers.utils import reconcile_route_departures, sync_route_stops
 
 router = APIRouter(prefix="/api/routes", tags=["Routes API"])
 
+# Route fields that decide which cities appear in the city autocomplete
+CITY_FIELDS = frozenset(("origin_city", "destination_city", "status"))
+# Route fields copied into the route_stops table
+STOP_FIELDS = frozenset(
+    ("origin_city", "destination_city", "distance_km", "intermediate_stops"))
+
 
 @router.post(
     "/",
@@ -30,7 +47,7 @@ router = APIRouter(prefix="/api/routes", tags=["Routes API"])
 async def create_route(
     route_data: RouteCreate,
     session: AsyncSession = Depends(db_handler.session_dependency),
-    current_user: User = Depends(get_admin_user)
+    current_user: Principal = Depends(get_admin_user)
 ) -> RouteResponse:
     """
     Create a new route with the provided details.
@@ -86,6 +103,7 @@ async def create_route(
 
         session.add(new_route)
         await session.flush()  # Get new_route.id before committing
+        await sync_route_stops(new_route, session)
 
         # Create departures if provided
         if route_data.departures:
@@ -112,6 +130,9 @@ async def create_route(
 
                 session.add(new_departure)
 
+        city_counts = await sync_route_cities(
+            session, {new_route.origin_city, new_route.destination_city})
+
         await session.commit()
         await session.refresh(new_route)
 
@@ -123,6 +144,10 @@ async def create_route(
         result = await session.execute(stmt)
         new_route_with_departures = result.scalar_one()
 
+        departure_timer.schedule_departures(new_route_with_departures.departures)
+        city_index.update(city_counts)
+        await journey_planner.routes_changed([new_route.id])
+
         logger.info(f"Route: {new_route.route_number} (from {new_route.origin_city} to {new_route.destination_city}) created successfully.")
 
         return new_route_with_departures
@@ -152,12 +177,15 @@ async def create_route(
     description="Get a filtered and paginated list of routes"
 )
 async def get_routes(
+    request: Request,
+    response: Response,
     offset: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
     origin_city: Optional[str] = None,
     destination_city: Optional[str] = None,
     status_filter: Optional[RouteStatus] = Query(None, alias="status"),
-    session: AsyncSession = Depends(db_handler.session_dependency)
+    session: AsyncSession = Depends(db_handler.read_session_dependency)
 ):
     """
     Get a filtered and paginated list of routes.
@@ -167,10 +195,18 @@ async def get_routes(
     - destination_city: the destination city of the route
     - status_filter: the status of the route (ACTIVE, INACTIVE, or DELETED)
 
-    Pagination:
-    - offset: the number of routes to skip before returning the result
+    Pagination (routes are ordered by route number):
+    - cursor: an X-Next-Cursor or X-Prev-Cursor value from a previous page
+    - offset: the number of routes to skip before returning the result,
+    ignored when a cursor is given (kept for backwards compatibility)
     - limit: the maximum number of routes to return in the result
 
+    The cursors of the neighbouring pages are returned in the X-Next-Cursor and
+    X-Prev-Cursor response headers.
+
+    The response carries an ETag and Last-Modified; a matching If-None-Match gets
+    a 304 after a single aggregate query.
+
     Returns:
     - a list of RouteListItem objects, each containing:
     the route number, route name, origin city, destination city,
@@ -191,12 +227,24 @@ async def get_routes(
         if status_filter:
             query = query.where(Route.status == status_filter)
 
+        count, last_modified, versions = await routes_version(session, query)
+        etag = make_etag(
+            "routes", count, last_modified, versions,
+            str(request.url.query))
+        # Deletions don't move last_modified, so only the ETag is compared
+        if is_not_modified(request, etag):
+            return not_modified(etag, last_modified)
+
         # Apply pagination
-        query = query.offset(offset).limit(limit)
-        result = await session.execute(query)
-        routes = result.scalars().all()
+        page = await paginate(
+            session, query, (Route.route_number, Route.id), limit, cursor, offset)
+        page.set_headers(response)
+        set_validators(response, etag, last_modified)
 
-        return routes
+        return page.items
+
+    except HTTPException:
+        raise
 
     except Exception as e:
         logger.error(f"Unexpected error during route retrieval: {str(e)}")
@@ -206,6 +254,54 @@ async def get_routes(
         )
 
 
+@router.get(
+    "/through",
+    response_model=List[RouteListItem],
+    summary="Get routes through a city",
+    description="Get the routes starting, ending or stopping in a city"
+)
+async def get_routes_through_city(
+    response: Response,
+    city: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    status_filter: Optional[RouteStatus] = Query(None, alias="status"),
+    session: AsyncSession = Depends(db_handler.read_session_dependency)
+):
+    """
+    Get the routes whose origin, destination or any intermediate stop is the given
+    city (case-insensitive), in a single query on the route_stops city index.
+
+    Filters:
+    - city: the city the routes pass through
+    - status_filter: the status of the route (ACTIVE, INACTIVE, or DELETED)
+
+    Pagination (routes are ordered by route number):
+    - cursor: an X-Next-Cursor or X-Prev-Cursor value from a previous page
+    - limit: the maximum number of routes to return in the result
+
+    Returns:
+    - a list of RouteListItem objects.
+
+    Raises:
+    - HTTPException: 400 if the cursor is invalid.
+    """
+    query = select(Route).where(
+        Route.id.in_(
+            select(RouteStop.route_id)
+            .where(func.lower(RouteStop.city) == city.strip().lower())
+        )
+    )
+    if status_filter:
+        query = query.where(Route.status == status_filter)
+
+    page = await paginate(
+        session, query, (Route.route_number, Route.id), limit, cursor)
+    page.set_headers(response)
+
+    return page.items
+
+
 @router.get(
     "/{route_id}",
     response_model=RouteResponse,
@@ -214,11 +310,17 @@ async def get_routes(
 )
 async def get_route(
     route_id: UUID,
-    session: AsyncSession = Depends(db_handler.session_dependency)
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(db_handler.read_session_dependency)
 ) -> RouteResponse:
     """
     Retrieve a route by its ID.
 
+    The response carries an ETag and Last-Modified derived from the route version.
+    A matching If-None-Match or If-Modified-Since gets a 304, usually without
+    querying the database (route versions are cached).
+
     Args:
         route_id (UUID): The ID of the route to retrieve.
 
@@ -228,6 +330,16 @@ async def get_route(
     Raises:
         HTTPException: If the route with the given ID is not found.
     """
+    version = await route_versions.get(session, route_id)
+    if version is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Route with ID {route_id} not found."
+        )
+    etag = make_etag("route", route_id, version.version)
+    if is_not_modified(request, etag, version.updated_at):
+        return not_modified(etag, version.updated_at)
+
     stmt = (
         select(Route)
         .where(Route.id == route_id)
@@ -241,6 +353,7 @@ async def get_route(
             detail=f"Route with ID {route_id} not found."
         )
 
+    set_validators(response, etag, version.updated_at)
     return route
 
 
@@ -254,7 +367,7 @@ async def update_route(
     route_id: UUID,
     route_data: RouteUpdate,
     session: AsyncSession = Depends(db_handler.session_dependency),
-    current_user: User = Depends(get_admin_user)
+    current_user: Principal = Depends(get_admin_user)
 ) -> RouteResponse:
     """
     Update a route by its ID.
@@ -271,85 +384,13 @@ async def update_route(
         HTTPException: If there is an unexpected error during route update.
     """
     try:
-        stmt = (
-            select(Route)
-            .options(selectinload(Route.departures))
-            .where(Route.id == route_id)
-        )
-        result = await session.execute(stmt)
-        route = result.scalar_one_or_none()
+        route = await session.get(Route, route_id)
         if not route:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Route with ID {route_id} not found."
             )
 
-        # Handle departures update using indices
-        if hasattr(route_data, 'departures') and route_data.departures is not None:
-            # Get current departures
-            current_departures = route.departures or []
-
-            # Create mapping of original indices to database departures
-            original_index_to_departure = {}
-            for i, dep in enumerate(current_departures):
-                original_index_to_departure[i] = dep
-
-            submitted_deps = route_data.departures or []
-
-            # Delete departures not in submitted list
-            submitted_indices = {
-                dep.original_index
-                for dep in submitted_deps
-                if dep.original_index is not None and dep.original_index >= 0
-            }
-            for i, dep in enumerate(current_departures):
-                if i not in submitted_indices:
-                    await session.delete(dep)
-
-            # Update existing departures and create new ones
-            for submitted in submitted_deps:
-                original_index = submitted.original_index
-
-                if original_index is not None and original_index >= 0:
-                    # Update existing departure
-                    dep = original_index_to_departure.get(original_index)
-                    if dep:
-                        dep.departure_time = submitted.departure_time
-                        if submitted.arrival_time is not None:
-                            dep.arrival_time = submitted.arrival_time
-                        else:
-                            # Calculate arival_time if not provided
-                            departure_datetime = submitted.departure_time
-                            if departure_datetime.tzinfo is None:
-                                departure_datetime = departure_datetime.replace(
-                                    tzinfo=timezone.utc
-                                )
-                            dep.arrival_time = departure_datetime + timedelta(
-                                minutes=route.duration_minutes
-                            )
-                        dep.notes = submitted.notes
-                else:
-                    # Create new departure
-                    departure_time = submitted.departure_time
-                    arrival_time = submitted.arrival_time
-                    if arrival_time is None:
-                        # Calculate arival_time if not provided
-                        if departure_time.tzinfo is None:
-                            departure_time = departure_time.replace(
-                                tzinfo=timezone.utc
-                            )
-                        arrival_time = departure_time + timedelta(
-                            minutes=route.duration_minutes
-                        )
-
-                    new_dep = Departure(
-                        route_id=route_id,
-                        departure_time=departure_time,
-                        arrival_time=arrival_time,
-                        notes=submitted.notes
-                    )
-                    session.add(new_dep)
-
         # Update route excluding fields that are not passed
         update_data = route_data.model_dump(exclude_unset=True)
 
@@ -358,30 +399,52 @@ async def update_route(
                 stop.model_dump() for stop in route_data.intermediate_stops
             ]
 
-        # Remove departures from update data to avoid conflicts
+        # Departures are reconciled separately below
         update_data.pop("departures", None)
 
+        # Cities served before the update, whose route counts may drop
+        old_cities = {route.origin_city, route.destination_city}
+
         # Update route
         for key, value in update_data.items():
             setattr(route, key, value)
+        await session.flush()
 
-        await session.commit()
-        await session.refresh(route)
+        city_counts = None
+        if CITY_FIELDS.intersection(update_data):
+            city_counts = await sync_route_cities(
+                session, old_cities | {route.origin_city, route.destination_city})
 
-        # Re-query route to get updated departures
-        requery_stmt = (
-            select(Route)
-            .options(selectinload(Route.departures))
-            .where(Route.id == route_id)
-        )
+        if STOP_FIELDS.intersection(update_data):
+            await sync_route_stops(route, session)
 
-        requery_result = await session.execute(requery_stmt)
-        updated_route = requery_result.scalar_one()
+        # Reconcile departures by ID in three set-based statements
+        changes = None
+        if route_data.departures is not None:
+            changes = await reconcile_route_departures(
+                route, route_data.departures, session)
+
+        version = (await bump_route_versions(session, [route_id]))[route_id]
+
+        await session.commit()
+        route_versions.invalidate([route_id])
+        # The bump's RETURNING has the new version, no need to re-read the route
+        set_committed_value(route, "version", version.version)
+        set_committed_value(route, "updated_at", version.updated_at)
+
+        # Keep the departure timer in sync with added, moved and removed departures
+        if changes is not None:
+            for departure_id in changes.deleted_ids:
+                departure_timer.cancel(departure_id)
+            departure_timer.schedule_departures(changes.updated + changes.inserted)
+        if city_counts is not None:
+            city_index.update(city_counts)
+        await journey_planner.routes_changed([route_id])
 
         logger.info(
             f"Route updated: {route.route_number} by {current_user.username}")
 
-        return updated_route
+        return route
 
     except HTTPException:
         await session.rollback()
@@ -405,7 +468,7 @@ async def update_route(
 async def delete_route(
     route_id: UUID,
     session: AsyncSession = Depends(db_handler.session_dependency),
-    current_user: User = Depends(get_admin_user)
+    current_user: Principal = Depends(get_admin_user)
 ) -> None:
     """
     Delete a route by its ID.
@@ -429,7 +492,13 @@ async def delete_route(
             )
 
         await session.delete(route)
+        await session.flush()
+        city_counts = await sync_route_cities(
+            session, {route.origin_city, route.destination_city})
         await session.commit()
+        route_versions.invalidate([route_id])
+        city_index.update(city_counts)
+        await journey_planner.routes_changed([route_id])
 
         logger.info(
             f"Route {route.route_number} deleted by {current_user.username}.")
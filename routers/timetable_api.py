@@ -0,0 +1,175 @@
+from typing import List
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from auth.dependencies import get_admin_user, get_admin_claims
+from auth.principal_cache import Principal
+from core.conditional import bump_route_versions, route_versions
+from core.db_handler import db_handler
+from core.departure_timer import departure_timer
+from core.journey_planner import journey_planner
+from core.logging import logger
+from core.timetable import (
+    EXPANDED_ROUTE_STATUSES, expand_timetable, expansion_end, timetables_expanded
+)
+from models import Departure, DepartureStatus, Route, TimetablePattern
+from schemas.timetable import (
+    TimetablePatternCreate, TimetablePatternCreateResponse, TimetablePatternResponse
+)
+
+router = APIRouter(prefix="/api/routes", tags=["Timetables API"])
+
+
+@router.post(
+    "/{route_id}/timetables",
+    response_model=TimetablePatternCreateResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Add a recurring timetable to a route",
+    description="Create a timetable pattern and generate its departures"
+)
+async def create_timetable_pattern(
+    route_id: UUID,
+    pattern_data: TimetablePatternCreate,
+    session: AsyncSession = Depends(db_handler.session_dependency),
+    current_user: Principal = Depends(get_admin_user)
+):
+    """
+    Add a recurring timetable to a route and generate its departures up to
+    timetable_horizon_days ahead, in one transaction. Departures are only
+    generated for active and seasonal routes. The scheduler keeps extending the
+    timetable afterwards.
+
+    Parameters:
+    - route_id (UUID): The ID of the route.
+    - pattern_data (TimetablePatternCreate): The times of day, weekdays, date range
+    and exception dates of the timetable.
+
+    Returns:
+    - The created pattern with the number of departures generated.
+
+    Raises:
+    - HTTPException: 404 if the route is not found.
+    """
+    route = await session.get(Route, route_id)
+    if not route:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Route with ID {route_id} not found."
+        )
+
+    pattern = TimetablePattern(
+        route_id=route_id,
+        departure_times=[
+            departure_time.strftime("%H:%M") for departure_time in pattern_data.departure_times],
+        weekdays=pattern_data.weekdays,
+        valid_from=pattern_data.valid_from,
+        valid_until=pattern_data.valid_until,
+        exceptions=[exception.isoformat() for exception in pattern_data.exceptions],
+        created_by_id=current_user.id,
+    )
+    session.add(pattern)
+    await session.flush()
+
+    # Expand in the same transaction, so a failure doesn't leave the pattern behind
+    inserted = []
+    if route.status in EXPANDED_ROUTE_STATUSES:
+        inserted = await expand_timetable(
+            session, pattern, route.duration_minutes, expansion_end())
+    route_ids = [route_id] if inserted else []
+    await bump_route_versions(session, route_ids)
+    await session.commit()
+    await timetables_expanded(inserted, route_ids)
+
+    logger.info(
+        f"Timetable {pattern.id} added to route {route.route_number} by "
+        f"{current_user.username}: {len(inserted)} departures created.")
+
+    return TimetablePatternCreateResponse(
+        **TimetablePatternResponse.model_validate(pattern).model_dump(),
+        departures_created=len(inserted),
+    )
+
+
+@router.get(
+    "/{route_id}/timetables",
+    response_model=List[TimetablePatternResponse],
+    summary="Get the timetables of a route",
+    description="Get the recurring timetable patterns of a route"
+)
+async def get_timetable_patterns(
+    route_id: UUID,
+    current_user: Principal = Depends(get_admin_claims),
+    session: AsyncSession = Depends(db_handler.read_session_dependency)
+):
+    """
+    Get the recurring timetable patterns of a route.
+
+    Parameters:
+    - route_id (UUID): The ID of the route.
+
+    Returns:
+    - A list of TimetablePatternResponse objects, oldest first.
+    """
+    result = await session.execute(
+        select(TimetablePattern)
+        .where(TimetablePattern.route_id == route_id)
+        .order_by(TimetablePattern.created_at)
+    )
+    return result.scalars().all()
+
+
+@router.delete(
+    "/{route_id}/timetables/{pattern_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Remove a timetable from a route",
+    description="Delete a timetable pattern and its future scheduled departures"
+)
+async def delete_timetable_pattern(
+    route_id: UUID,
+    pattern_id: UUID,
+    session: AsyncSession = Depends(db_handler.session_dependency),
+    current_user: Principal = Depends(get_admin_user)
+) -> None:
+    """
+    Delete a timetable pattern together with the departures it generated that are
+    still SCHEDULED. Departures that already left or changed status are kept.
+
+    Parameters:
+    - route_id (UUID): The ID of the route.
+    - pattern_id (UUID): The ID of the timetable pattern.
+
+    Raises:
+    - HTTPException: 404 if the pattern is not found on the route.
+    """
+    pattern = await session.get(TimetablePattern, pattern_id)
+    if not pattern or pattern.route_id != route_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Timetable {pattern_id} not found on route {route_id}."
+        )
+
+    result = await session.execute(
+        delete(Departure)
+        .where(
+            Departure.timetable_pattern_id == pattern_id,
+            Departure.status == DepartureStatus.SCHEDULED,
+        )
+        .returning(Departure.id)
+        .execution_options(synchronize_session=False)
+    )
+    removed_ids = result.scalars().all()
+    await session.delete(pattern)
+    await bump_route_versions(session, [route_id])
+    await session.commit()
+
+    route_versions.invalidate([route_id])
+    for departure_id in removed_ids:
+        departure_timer.cancel(departure_id)
+    await journey_planner.routes_changed([route_id])
+
+    logger.info(
+        f"Timetable {pattern_id} removed from route {route_id} by "
+        f"{current_user.username}: {len(removed_ids)} departures deleted.")
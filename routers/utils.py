@@ -1,8 +1,21 @@
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Sequence
+from uuid import UUID
+
 from fastapi import HTTPException, status
-from sqlalchemy import select, or_, func
+from sqlalchemy import (
+    select, or_, func, false, delete, insert, update, values, column, all_, bindparam,
+    DateTime, Text
+)
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from models import User
+from models import User, Route, RouteStop, Departure, DepartureStatus
+from core.config import settings
+from schemas.route import DepartureUpdate
 
 exc_codes = {
     400: status.HTTP_400_BAD_REQUEST,
@@ -67,10 +80,14 @@ async def get_user_by_username_or_email(
     """
     Fetch a user by their username or email.
 
+    The comparison is case-insensitive and uses the lower() functional indexes
+    on both columns.
+
     :param username_or_email: The username or email of the user to fetch.
     :param session: The database session to use.
     :return: The user if found, or None if not found.
     """
+    username_or_email = username_or_email.lower()
     result = await session.execute(
         select(User).where(
             or_(
@@ -83,14 +100,282 @@ async def get_user_by_username_or_email(
     return user
 
 
+async def find_user_conflicts(
+        username: str | None,
+        email: str | None,
+        session: AsyncSession,
+        exclude_user_id: UUID | None = None
+) -> tuple[bool, bool]:
+    """
+    Check in a single query whether a username and an email are already taken.
+
+    The comparison is case-insensitive, like the login lookup, and uses the
+    lower() indexes on both columns.
+
+    :param username: The username to check, or None to skip it.
+    :param email: The email to check, or None to skip it.
+    :param session: The database session to use.
+    :param exclude_user_id: A user whose own username and email don't count, e.g.
+        the user updating their profile.
+    :return: Whether the username is taken and whether the email is taken.
+    """
+    username_match = (
+        func.lower(User.username) == username.lower()) if username else false()
+    email_match = (func.lower(User.email) == email.lower()) if email else false()
+    if not username and not email:
+        return False, False
+
+    stmt = select(
+        func.coalesce(func.bool_or(username_match), False),
+        func.coalesce(func.bool_or(email_match), False),
+    ).where(or_(username_match, email_match))
+    if exclude_user_id is not None:
+        stmt = stmt.where(User.id != exclude_user_id)
+
+    result = await session.execute(stmt)
+    username_exists, email_exists = result.one()
+    return bool(username_exists), bool(email_exists)
+
+
 async def check_user_exists(
         username: str,
         email: str,
         session: AsyncSession
 ) -> bool:
-    user_by_username = await get_user_by_username(username, session)
-    if user_by_username:
-        return True
-    user_by_email = await get_user_by_email(email, session)
+    """
+    Check in a single query whether a username or an email is already taken.
+
+    :param username: The username to check.
+    :param email: The email to check.
+    :param session: The database session to use.
+    :return: True if either is taken, otherwise False.
+    """
+    return any(await find_user_conflicts(username, email, session))
+
+
+def route_stop_rows(route: Route) -> list[dict]:
+    """
+    Build the route_stops rows of a route: its origin, intermediate stops in
+    order of distance, and destination.
+
+    :param route: The route, with its intermediate stops as stored in the JSON column.
+    :return: One dictionary of RouteStop column values per stop.
+    """
+    stops = sorted(
+        route.intermediate_stops or [],
+        key=lambda stop: stop.get("distance_from_origin_km") or 0
+    )
+    rows = [{"city": route.origin_city, "offset_km": 0, "dwell_minutes": 0}]
+    rows.extend(
+        {
+            "city": stop["city"],
+            "offset_km": stop.get("distance_from_origin_km") or 0,
+            "dwell_minutes": stop.get("stop_duration_minutes") or 0,
+        }
+        for stop in stops
+    )
+    rows.append(
+        {"city": route.destination_city, "offset_km": route.distance_km, "dwell_minutes": 0})
+
+    for seq, row in enumerate(rows):
+        row["route_id"] = route.id
+        row["seq"] = seq
+    return rows
+
+
+async def sync_route_stops(route: Route, session: AsyncSession) -> None:
+    """
+    Replace the route_stops rows of a route. Doesn't commit.
+
+    The route must already be flushed to the database.
+
+    :param route: The route to sync.
+    :param session: The database session to use.
+    """
+    await session.execute(delete(RouteStop).where(RouteStop.route_id == route.id))
+    await session.execute(insert(RouteStop), route_stop_rows(route))
+
+
+@dataclass
+class DepartureChanges:
+    """
+    The outcome of `reconcile_route_departures`: the IDs of the deleted departures
+    and the (id, departure_time, status) rows of the updated and inserted ones.
+    """
+    deleted_ids: list[UUID]
+    updated: list[Row]
+    inserted: list[Row]
+
+
+def _arrival_time(submitted: DepartureUpdate, duration_minutes: int) -> datetime:
+    if submitted.arrival_time is not None:
+        return submitted.arrival_time
+    departure_time = submitted.departure_time
+    if departure_time.tzinfo is None:
+        departure_time = departure_time.replace(tzinfo=timezone.utc)
+    return departure_time + timedelta(minutes=duration_minutes)
+
+
+def _resolve_submitted_departures(
+        submitted: Sequence[DepartureUpdate], indexed_ids: Sequence[UUID]
+) -> tuple[dict[UUID, DepartureUpdate], list[DepartureUpdate]]:
+    """
+    Split submitted departures into existing ones, by ID, and new ones.
+
+    :param submitted: The submitted departures.
+    :param indexed_ids: The route's departure IDs ordered by departure time, for
+        submissions with a (deprecated) `original_index`.
+    :return: The existing departures by ID and the new departures.
+    :raises HTTPException: 400 if an index is out of range or a departure is
+        submitted more than once.
+    """
+    existing: dict[UUID, DepartureUpdate] = {}
+    new = []
+    for dep in submitted:
+        departure_id = dep.id
+        if departure_id is None and dep.original_index is not None and dep.original_index >= 0:
+            if dep.original_index >= len(indexed_ids):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"No departure at index {dep.original_index} on this route."
+                )
+            departure_id = indexed_ids[dep.original_index]
+        if departure_id is None:
+            new.append(dep)
+        elif departure_id in existing:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Departure {departure_id} was submitted more than once."
+            )
+        else:
+            existing[departure_id] = dep
+    return existing, new
+
+
+def _delete_unsubmitted_departures(route_id: UUID, kept_ids: list[UUID]):
+    """
+    The DELETE of a route's departures that weren't resubmitted, except those
+    generated from timetable patterns. The kept IDs go in one array parameter,
+    so their number isn't limited by the bind parameter limit.
+    """
+    kept = bindparam("kept_ids", kept_ids, type_=ARRAY(PG_UUID(as_uuid=True)))
+    return (
+        delete(Departure)
+        .where(
+            Departure.route_id == route_id,
+            Departure.timetable_pattern_id.is_(None),
+            Departure.id != all_(kept),
+        )
+        .returning(Departure.id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _update_submitted_departures(route_id: UUID, rows: list[tuple]):
+    """
+    The UPDATE ... FROM (VALUES ...) of a batch of resubmitted departures, given
+    as (id, departure_time, arrival_time, notes) tuples.
+    """
+    submitted = values(
+        column("id", PG_UUID(as_uuid=True)),
+        column("departure_time", DateTime(timezone=True)),
+        column("arrival_time", DateTime(timezone=True)),
+        column("notes", Text),
+        name="submitted",
+    ).data(rows)
+    return (
+        update(Departure)
+        .where(Departure.id == submitted.c.id, Departure.route_id == route_id)
+        .values(
+            departure_time=submitted.c.departure_time,
+            arrival_time=submitted.c.arrival_time,
+            notes=submitted.c.notes,
+        )
+        .returning(Departure.id, Departure.departure_time, Departure.status)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def reconcile_route_departures(
+        route: Route, submitted: Sequence[DepartureUpdate], session: AsyncSession
+) -> DepartureChanges:
+    """
+    Make the departures of a route match the submitted list with set-based
+    statements: one DELETE of the departures that weren't submitted, UPDATE ...
+    FROM (VALUES ...) of the submitted existing departures and multi-row INSERTs
+    of the new ones, both in batches of route_departure_batch_size rows.
+    Doesn't commit.
+
+    Departures generated from timetable patterns are never deleted here, since
+    the route form doesn't list them; they go away with their pattern.
+    Existing departures are identified by `id`. Submissions without an ID but
+    with a non-negative `original_index` (deprecated) refer to the route's
+    departures ordered by departure time. Missing arrival times are computed from
+    the route duration.
+
+    :param route: The route, with its updated duration.
+    :param submitted: The departures the route should have.
+    :param session: The database session to use.
+    :return: The deleted, updated and inserted departures.
+    :raises HTTPException: 400 if a submitted ID or index matches no departure of the
+        route, or if a departure is submitted twice (by ID or by index).
+    """
+    if any(
+            dep.id is None and dep.original_index is not None and dep.original_index >= 0
+            for dep in submitted):
+        result = await session.execute(
+            select(Departure.id)
+            .where(Departure.route_id == route.id)
+            .order_by(Departure.departure_time, Departure.id)
+        )
+        indexed_ids = result.scalars().all()
+    else:
+        indexed_ids = []
+
+    existing, new = _resolve_submitted_departures(submitted, indexed_ids)
+
+    result = await session.execute(_delete_unsubmitted_departures(route.id, list(existing)))
+    deleted_ids = result.scalars().all()
+
+    batch_size = settings.route_departure_batch_size
+    updated = []
+    existing_rows = [
+        (departure_id, dep.departure_time, _arrival_time(dep, route.duration_minutes), dep.notes)
+        for departure_id, dep in existing.items()
+    ]
+    for offset in range(0, len(existing_rows), batch_size):
+        result = await session.execute(
+            _update_submitted_departures(route.id, existing_rows[offset:offset + batch_size]))
+        updated.extend(result.all())
+    unknown = set(existing).difference(row.id for row in updated)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Departures not found on this route: {', '.join(map(str, unknown))}"
+        )
+
+    inserted = []
+    now = datetime.utcnow()
+    for offset in range(0, len(new), batch_size):
+        result = await session.execute(
+            insert(Departure)
+            .values([
+                {
+                    "id": uuid.uuid4(),
+                    "route_id": route.id,
+                    "departure_time": dep.departure_time,
+                    "arrival_time": _arrival_time(dep, route.duration_minutes),
+                    "notes": dep.notes,
+                    "status": DepartureStatus.SCHEDULED,
+                    "is_cancelled": False,
+                    "is_full": False,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for dep in new[offset:offset + batch_size]
+            ])
+            .returning(Departure.id, Departure.departure_time, Departure.status)
+        )
+        inserted.extend(result.all())
 
-    return user_by_email is not None
+    return DepartureChanges(deleted_ids=deleted_ids, updated=updated, inserted=inserted)
@@ -0,0 +1,9 @@
+from pydantic import BaseModel
+
+
+class CitySuggestion(BaseModel):
+    """
+    City Suggestion Schema
+    """
+    name: str
+    route_count: int
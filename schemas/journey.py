@@ -0,0 +1,45 @@
+from datetime import datetime
+from typing import List, Optional
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict
+
+
+class JourneyLegResponse(BaseModel):
+    """
+    Journey Leg Schema: a ride on one departure.
+    """
+    model_config = ConfigDict(from_attributes=True)
+
+    departure_id: UUID
+    route_id: UUID
+    route_number: str
+    from_city: str
+    to_city: str
+    departure_time: datetime
+    arrival_time: datetime
+
+
+class ItineraryResponse(BaseModel):
+    """
+    Itinerary Schema
+    """
+    model_config = ConfigDict(from_attributes=True)
+
+    departure_time: datetime
+    arrival_time: datetime
+    transfers: int
+    legs: List[JourneyLegResponse]
+
+
+class JourneyPlanResponse(BaseModel):
+    """
+    Journey Plan Schema.
+    `itineraries` holds the best journey for every number of transfers, fewest
+    transfers first; the last one arrives earliest.
+    """
+    origin: str
+    destination: str
+    earliest_arrival: Optional[ItineraryResponse] = None
+    fewest_transfers: Optional[ItineraryResponse] = None
+    itineraries: List[ItineraryResponse]
@@ -109,8 +109,12 @@ class RouteCreate(RouteBase):
 
 class DepartureUpdate(BaseModel):
     """
-    Departure Update Schema for route updates
+    Departure Update Schema for route updates.
+    Existing departures are identified by `id`; `original_index` (the position in
+    the route's departures ordered by departure time) is deprecated. Departures
+    with neither are created.
     """
+    id: Optional[UUID] = None
     original_index: Optional[int] = None
     departure_time: datetime
     arrival_time: Optional[datetime] = None
@@ -0,0 +1,76 @@
+from datetime import date, datetime, time
+from typing import List, Optional
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict, field_validator, model_validator
+
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+
+class TimetablePatternCreate(BaseModel):
+    """
+    Timetable Pattern Create Schema.
+    Departure times are times of day in the configured timetable time zone.
+    """
+    departure_times: List[time]
+    weekdays: List[str] = list(WEEKDAYS)
+    valid_from: date
+    valid_until: Optional[date] = None
+    exceptions: List[date] = []
+
+    @field_validator("departure_times")
+    @classmethod
+    def validate_departure_times(cls, value: List[time]) -> List[time]:
+        if not value:
+            raise ValueError("At least one departure time is required")
+        if len(value) > 96:
+            raise ValueError("At most 96 departure times per day are allowed")
+        return sorted({departure_time.replace(second=0, microsecond=0, tzinfo=None)
+                       for departure_time in value})
+
+    @field_validator("weekdays")
+    @classmethod
+    def validate_weekdays(cls, value: List[str]) -> List[str]:
+        weekdays = {weekday.strip().lower() for weekday in value}
+        if not weekdays:
+            raise ValueError("At least one weekday is required")
+        unknown = weekdays.difference(WEEKDAYS)
+        if unknown:
+            raise ValueError(f"Unknown weekdays: {', '.join(sorted(unknown))}")
+        return [weekday for weekday in WEEKDAYS if weekday in weekdays]
+
+    @model_validator(mode="after")
+    def validate_date_range(self):
+        if self.valid_until is not None and self.valid_until < self.valid_from:
+            raise ValueError("valid_until must not be before valid_from")
+        return self
+
+
+class TimetablePatternResponse(BaseModel):
+    """
+    Timetable Pattern Response Schema
+    """
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    route_id: UUID
+    departure_times: List[time]
+    weekdays: List[str]
+    valid_from: date
+    valid_until: Optional[date] = None
+    exceptions: List[date] = []
+    is_active: bool
+    expanded_until: Optional[date] = None
+    created_at: datetime
+
+    @field_validator("exceptions", mode="before")
+    @classmethod
+    def validate_exceptions(cls, value):
+        return value or []
+
+
+class TimetablePatternCreateResponse(TimetablePatternResponse):
+    """
+    Timetable Pattern Create Response Schema, with the number of departures generated.
+    """
+    departures_created: int
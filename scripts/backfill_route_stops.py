@@ -0,0 +1,53 @@
+"""
+Fill the route_stops table from the routes' origin, intermediate stops and destination.
+
+Needed once for routes created before the route_stops table existed; routes
+created or changed through the API keep their stops in sync themselves. Routes
+are processed in batches, each committed on its own, and re-running the script
+is safe.
+
+Usage:
+    python -m scripts.backfill_route_stops [batch_size]
+"""
+import asyncio
+import sys
+
+from sqlalchemy import select
+
+from models import Route
+from core.db_handler import db_handler
+from routers.utils import sync_route_stops
+
+
+async def backfill_route_stops(batch_size: int) -> int:
+    """
+    Rewrite the stops of every route.
+
+    :param batch_size: The number of routes per transaction.
+    :return: The number of routes processed.
+    :rtype: int
+    """
+    processed = 0
+    last_id = None
+    while True:
+        async with db_handler.async_session_factory() as session:
+            stmt = select(Route).order_by(Route.id).limit(batch_size)
+            if last_id is not None:
+                stmt = stmt.where(Route.id > last_id)
+            routes = (await session.execute(stmt)).scalars().all()
+            if not routes:
+                return processed
+
+            for route in routes:
+                await sync_route_stops(route, session)
+            await session.commit()
+
+        processed += len(routes)
+        last_id = routes[-1].id
+        print(f"{processed} routes processed")
+
+
+if __name__ == "__main__":
+    total = asyncio.run(
+        backfill_route_stops(int(sys.argv[1]) if len(sys.argv) > 1 else 500))
+    print(f"======== Stops of {total} routes backfilled. ========")
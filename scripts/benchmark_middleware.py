@@ -0,0 +1,138 @@
+"""
+Benchmark the per-request overhead of the HTTP middleware stack.
+
+Compares the previous `@app.middleware("http")` (BaseHTTPMiddleware) versions of
+the CSP, read-your-writes, query stats and request logging middleware with the
+pure ASGI classes in `core.middleware`. Requests are sent straight into the ASGI
+app, so the numbers only contain routing, the endpoint and the middleware.
+
+Usage:
+    python -m scripts.benchmark_middleware [requests]
+"""
+import asyncio
+import logging
+import sys
+import time
+
+from fastapi import FastAPI, Request
+
+from core.middleware import (
+    CONTENT_SECURITY_POLICY,
+    CSPMiddleware, ReadYourWritesMiddleware,
+    QueryStatsMiddleware, RequestLoggingMiddleware
+)
+from core.config import settings
+from core.logging import logger
+from core.query_stats import begin_request, end_request
+
+
+def build_bare_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"status": "ok"}
+
+    return app
+
+
+def build_base_http_app() -> FastAPI:
+    app = build_bare_app()
+
+    @app.middleware("http")
+    async def add_csp_header(request: Request, call_next):
+        response = await call_next(request)
+        response.headers["Content-Security-Policy"] = CONTENT_SECURITY_POLICY
+        return response
+
+    @app.middleware("http")
+    async def mark_recent_write(request: Request, call_next):
+        response = await call_next(request)
+        if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+            response.set_cookie(
+                settings.read_your_writes_cookie, "1",
+                max_age=settings.read_your_writes_seconds,
+                httponly=True, samesite="lax"
+            )
+        return response
+
+    @app.middleware("http")
+    async def sql_instrumentation(request: Request, call_next):
+        stats, token = begin_request()
+        try:
+            response = await call_next(request)
+        finally:
+            end_request(token)
+        response.headers.append("Server-Timing", stats.server_timing())
+        return response
+
+    @app.middleware("http")
+    async def log_requests(request: Request, call_next):
+        start_time = time.time()
+        response = await call_next(request)
+        process_time = (time.time() - start_time) * 1000
+        logger.info(
+            f"{request.method} {request.url.path} "
+            f"Status: {response.status_code} "
+            f"Time: {process_time:.2f}ms"
+        )
+        return response
+
+    return app
+
+
+def build_asgi_app() -> FastAPI:
+    app = build_bare_app()
+    app.add_middleware(CSPMiddleware)
+    app.add_middleware(ReadYourWritesMiddleware)
+    app.add_middleware(QueryStatsMiddleware)
+    app.add_middleware(RequestLoggingMiddleware)
+    return app
+
+
+async def run(app: FastAPI, requests: int) -> float:
+    """
+    Send `requests` GET /ping requests to the app.
+
+    :return: The mean time per request in microseconds.
+    """
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": "/ping", "raw_path": b"/ping",
+        "root_path": "", "query_string": b"", "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 1234), "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    # Warm up routing and the middleware stack
+    for _ in range(200):
+        await app(dict(scope), receive, send)
+
+    start = time.perf_counter_ns()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter_ns() - start) / requests / 1000
+
+
+async def main(requests: int) -> None:
+    # Keep the logging queue out of the measurement
+    logging.disable(logging.INFO)
+
+    bare = await run(build_bare_app(), requests)
+    base_http = await run(build_base_http_app(), requests)
+    asgi = await run(build_asgi_app(), requests)
+
+    print(f"Requests per variant: {requests}")
+    print(f"{'variant':<22}{'us/request':>12}{'overhead':>12}")
+    print(f"{'no middleware':<22}{bare:>12.1f}{0:>12.1f}")
+    print(f"{'@app.middleware':<22}{base_http:>12.1f}{base_http - bare:>12.1f}")
+    print(f"{'pure ASGI':<22}{asgi:>12.1f}{asgi - bare:>12.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000))
@@ -0,0 +1,69 @@
+"""
+Benchmark the per-request cost of authenticating a request.
+
+Runs the `get_current_user` dependency with the same access token, as the
+frontend does until the token expires, once with the verified token cache
+disabled (a full `jwt.decode` per request) and once with it enabled. The
+principal is served from the principal cache in both runs, so no database
+is involved.
+
+Usage:
+    python -m scripts.benchmark_token_cache [requests]
+"""
+import asyncio
+import logging
+import sys
+import time
+import uuid
+
+from fastapi.security import HTTPAuthorizationCredentials
+
+from models import UserRole
+from auth.dependencies import get_current_user
+from auth.jwt_utils import jwt_manager
+from auth.principal_cache import Principal, principal_cache
+
+
+async def run(credentials: HTTPAuthorizationCredentials, requests: int) -> float:
+    """
+    Authenticate `requests` requests with the given credentials.
+
+    :return: The mean time per request in microseconds.
+    """
+    for _ in range(200):
+        await get_current_user(credentials, session=None)
+
+    start = time.perf_counter_ns()
+    for _ in range(requests):
+        await get_current_user(credentials, session=None)
+    return (time.perf_counter_ns() - start) / requests / 1000
+
+
+async def main(requests: int) -> None:
+    logging.disable(logging.INFO)
+
+    principal = Principal(
+        id=uuid.uuid4(), username="benchmark", role=UserRole.CUSTOMER, is_active=True)
+    principal_cache.set(principal)
+    token = jwt_manager.create_access_token(data={
+        "user_id": principal.id,
+        "username": principal.username,
+        "email": "benchmark@example.com",
+        "role": principal.role.value
+    })
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    cache_size = jwt_manager.verified_cache_size
+    jwt_manager.verified_cache_size = 0
+    uncached = await run(credentials, requests)
+    jwt_manager.verified_cache_size = cache_size
+    cached = await run(credentials, requests)
+
+    print(f"Requests per variant: {requests}")
+    print(f"{'variant':<22}{'us/request':>12}")
+    print(f"{'jwt.decode':<22}{uncached:>12.1f}")
+    print(f"{'verified token cache':<22}{cached:>12.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000))
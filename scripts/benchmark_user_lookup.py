@@ -0,0 +1,111 @@
+"""
+Benchmark the login lookup and the registration existence check on 1M users.
+
+Builds a temporary copy of the `users` table with generated users (nothing is
+written to the real table) and times:
+- the case-insensitive login lookup (`get_user_by_username_or_email`) with only
+  the plain username/email indexes, then with the lower() functional indexes;
+- the registration existence check as two queries and as the single query
+  used by `find_user_conflicts`.
+
+Requires the configured Postgres database.
+
+Usage:
+    python -m scripts.benchmark_user_lookup [users] [lookups]
+"""
+import asyncio
+import random
+import sys
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from core.db_handler import db_handler
+
+LOGIN_LOOKUP = text("""
+    SELECT * FROM users_bench
+    WHERE lower(username) = :value OR lower(email) = :value
+""")
+USERNAME_EXISTS = text("SELECT id FROM users_bench WHERE username = :username")
+EMAIL_EXISTS = text("SELECT id FROM users_bench WHERE email = :email")
+CONFLICTS = text("""
+    SELECT coalesce(bool_or(username = :username), false),
+           coalesce(bool_or(email = :email), false)
+    FROM users_bench
+    WHERE username = :username OR email = :email
+""")
+
+
+async def create_users(conn: AsyncConnection, users: int) -> None:
+    await conn.execute(text(
+        "CREATE TEMPORARY TABLE users_bench (LIKE users INCLUDING DEFAULTS)"))
+    await conn.execute(text("""
+        INSERT INTO users_bench (id, username, email, password_hash, role, is_active, is_verified)
+        SELECT gen_random_uuid(), 'user_' || i, 'user_' || i || '@example.com',
+               'x', 'CUSTOMER', true, true
+        FROM generate_series(1, :users) AS i
+    """), {"users": users})
+    await conn.execute(text("CREATE UNIQUE INDEX ON users_bench (username)"))
+    await conn.execute(text("CREATE UNIQUE INDEX ON users_bench (email)"))
+    await conn.execute(text("ANALYZE users_bench"))
+
+
+async def time_queries(conn: AsyncConnection, queries: list) -> float:
+    """
+    Run the (statement, parameters) pairs in `queries`.
+
+    :return: The mean time per item in milliseconds.
+    """
+    start = time.perf_counter()
+    for statements in queries:
+        for stmt, params in statements:
+            await conn.execute(stmt, params)
+    return (time.perf_counter() - start) * 1000 / len(queries)
+
+
+async def plan(conn: AsyncConnection, stmt, params: dict) -> str:
+    result = await conn.execute(text(f"EXPLAIN {stmt.text}"), params)
+    return result.scalars().first().strip()
+
+
+async def main(users: int, lookups: int) -> None:
+    ids = [random.randint(1, users) for _ in range(lookups)]
+    logins = [
+        [(LOGIN_LOOKUP, {"value": f"user_{i}@example.com"})] for i in ids]
+
+    async with db_handler.engine.connect() as conn:
+        print(f"Creating {users} users...")
+        await create_users(conn, users)
+
+        plain = await time_queries(conn, logins)
+        plain_plan = await plan(conn, LOGIN_LOOKUP, logins[0][0][1])
+
+        await conn.execute(text("CREATE INDEX ON users_bench (lower(username))"))
+        await conn.execute(text("CREATE INDEX ON users_bench (lower(email))"))
+        await conn.execute(text("ANALYZE users_bench"))
+        functional = await time_queries(conn, logins)
+        functional_plan = await plan(conn, LOGIN_LOOKUP, logins[0][0][1])
+
+        checks = [(f"new_{i}", f"new_{i}@example.com") for i in ids]
+        two_queries = await time_queries(conn, [
+            [(USERNAME_EXISTS, {"username": u}), (EMAIL_EXISTS, {"email": e})]
+            for u, e in checks])
+        one_query = await time_queries(conn, [
+            [(CONFLICTS, {"username": u, "email": e})] for u, e in checks])
+
+        await conn.rollback()
+
+    print(f"Lookups per variant: {lookups}")
+    print(f"{'variant':<32}{'ms/op':>10}")
+    print(f"{'login, plain indexes':<32}{plain:>10.3f}    {plain_plan}")
+    print(f"{'login, lower() indexes':<32}{functional:>10.3f}    {functional_plan}")
+    print(f"{'existence check, 2 queries':<32}{two_queries:>10.3f}")
+    print(f"{'existence check, 1 query':<32}{one_query:>10.3f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 200,
+    ))
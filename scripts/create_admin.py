@@ -49,7 +49,7 @@ async def create_admin_from_env() -> None:
                 id=uuid4(),
                 username=username,
                 email=email,
-                password_hash=pwd_utils.hash_password(password),
+                password_hash=await pwd_utils.hash_password_async(password),
                 role=UserRole.ADMIN,
                 is_active=True,
                 is_verified=True  # Admin is pre-verified
@@ -1,6 +1,6 @@
 import asyncio
 
-from core.database import Base
+from core.database import Base, create_extensions
 from core.db_handler import db_handler
 
 
@@ -9,6 +9,7 @@ async def recreate_database():
         await conn.run_sync(Base.metadata.drop_all)
         print("======== All tables dropped. ========")
 
+        await conn.run_sync(create_extensions)
         await conn.run_sync(Base.metadata.create_all)
         print("======== All tables created. ========")
 
@@ -0,0 +1,91 @@
+"""
+Profile the cold import of the application.
+
+Imports a module in a fresh interpreter with `-X importtime` and reports the
+slowest imports by cumulative time.
+
+Usage:
+    python main.py startup-profile [--limit N] [--module main]
+"""
+import subprocess
+import sys
+from dataclasses import dataclass
+
+from core.config import BASE_DIR
+
+
+@dataclass(frozen=True)
+class ImportTiming:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(output: str) -> list[ImportTiming]:
+    """
+    Parse the `-X importtime` lines written to stderr.
+
+    :param output: The stderr output of the interpreter.
+    :return: One entry per imported module, in import order.
+    :rtype: list[ImportTiming]
+    """
+    timings = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            # The header line
+            continue
+        name = fields[2].rstrip()
+        module = name.lstrip()
+        timings.append(ImportTiming(
+            module=module,
+            self_us=int(fields[0]),
+            cumulative_us=int(fields[1]),
+            depth=(len(name) - len(module) - 1) // 2,
+        ))
+    return timings
+
+
+def profile_import(module: str = "main") -> tuple[list[ImportTiming], float]:
+    """
+    Import `module` in a fresh interpreter and collect its import times.
+
+    :param module: The module to import.
+    :return: The import timings and the wall-clock import time in seconds.
+    :rtype: tuple[list[ImportTiming], float]
+    """
+    code = (
+        "import time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "print(time.perf_counter() - start)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=BASE_DIR,
+        capture_output=True, text=True, check=True
+    )
+    return parse_importtime(result.stderr), float(result.stdout.strip().splitlines()[-1])
+
+
+def print_profile(module: str = "main", limit: int = 25) -> None:
+    """
+    Print the slowest imports of `module` by cumulative time.
+
+    :param module: The module to import.
+    :param limit: The number of imports to show.
+    """
+    timings, wall_seconds = profile_import(module)
+    print(f"Cold import of {module}: {wall_seconds * 1000:.1f}ms "
+          f"({len(timings)} modules)")
+    print(f"{'self [us]':>10} | {'cumulative':>10} | module")
+    for timing in sorted(timings, key=lambda t: t.cumulative_us, reverse=True)[:limit]:
+        print(f"{timing.self_us:>10} | {timing.cumulative_us:>10} | "
+              f"{'  ' * timing.depth}{timing.module}")
+
+
+if __name__ == "__main__":
+    print_profile(*sys.argv[1:2])
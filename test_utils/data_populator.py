@@ -10,6 +10,7 @@ from models import (
     Departure, DepartureStatus,
     Bus, BusStatus, BusType)
 from auth.pass_utils import pwd_utils
+from routers.utils import sync_route_stops
 
 fake = Faker()
 
@@ -74,6 +75,9 @@ async def create_test_routes(
         session.add(route)
         routes.append(route)
 
+    await session.flush()
+    for route in routes:
+        await sync_route_stops(route, session)
     await session.commit()
     for route in routes:
         await session.refresh(route)
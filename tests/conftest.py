@@ -6,7 +6,7 @@ from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from main import app
-from core.database import Base
+from core.database import Base, create_extensions
 from core.config import settings
 from core.db_handler import db_handler
 from .test_utils import create_test_admin_user
@@ -38,6 +38,7 @@ def setup_test_db():
         engine = create_async_engine(url=TEST_DB_URL, echo=False, pool_pre_ping=True)
 
         async with engine.begin() as conn:
+            await conn.run_sync(create_extensions)
             await conn.run_sync(Base.metadata.create_all)
 
         async_session = sessionmaker(
@@ -86,6 +87,7 @@ def client():
             yield session
 
     app.dependency_overrides[db_handler.session_dependency] = get_test_session
+    app.dependency_overrides[db_handler.read_session_dependency] = get_test_session
 
     client = httpx.AsyncClient(transport=ASGITransport(app=app), base_url="http://testserver")
     yield client
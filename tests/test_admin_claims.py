@@ -0,0 +1,43 @@
+import time
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+from models import UserRole
+from auth.dependencies import get_admin_claims
+from auth.jwt_utils import jwt_manager
+from auth.revocation import revocation_store
+
+
+def make_credentials(user_id: uuid.UUID, role: UserRole) -> HTTPAuthorizationCredentials:
+    token = jwt_manager.create_access_token(
+        {"user_id": user_id, "username": "admin_user", "role": role.value})
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+@pytest.mark.asyncio
+async def test_admin_claims_authorize_from_the_token():
+    """Test that admins are authorized and other roles are rejected without a database."""
+    admin_id = uuid.uuid4()
+
+    principal = await get_admin_claims(make_credentials(admin_id, UserRole.ADMIN))
+    assert principal.id == admin_id
+    assert principal.role == UserRole.ADMIN
+
+    with pytest.raises(HTTPException) as exc_info:
+        await get_admin_claims(make_credentials(uuid.uuid4(), UserRole.CUSTOMER))
+    assert exc_info.value.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_admin_claims_reject_tokens_issued_before_the_watermark():
+    """Test that a watermark in the revocation store rejects older tokens."""
+    admin_id = uuid.uuid4()
+    credentials = make_credentials(admin_id, UserRole.ADMIN)
+    revocation_store._watermarks[admin_id] = time.time() + 60
+
+    with pytest.raises(HTTPException) as exc_info:
+        await get_admin_claims(credentials)
+    assert exc_info.value.status_code == 401
@@ -0,0 +1,37 @@
+import pytest
+from fastapi import HTTPException
+
+from auth.admission import LoginAdmission, RateLimiter
+
+
+def test_token_bucket_refills_over_time():
+    """Test that a bucket allows a burst, then one request per refill interval."""
+    limiter = RateLimiter(rate_per_minute=60, burst=2, max_keys=10)
+
+    assert limiter.acquire("1.2.3.4", now=0) == 0
+    assert limiter.acquire("1.2.3.4", now=0) == 0
+    assert limiter.acquire("1.2.3.4", now=0) == pytest.approx(1.0)
+    assert limiter.acquire("5.6.7.8", now=0) == 0
+    assert limiter.acquire("1.2.3.4", now=1.0) == 0
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_and_overload_are_shed_with_retry_after():
+    """Test that empty buckets answer 429 and a full verification pool answers 503."""
+    admission = LoginAdmission(
+        ip_limiter=RateLimiter(60, 10, 10),
+        username_limiter=RateLimiter(60, 1, 10),
+        max_verifications=1,
+    )
+    admission.check_rate("login", "1.2.3.4", "Alice")
+    with pytest.raises(HTTPException) as exc_info:
+        admission.check_rate("login", "1.2.3.4", "alice")
+    assert exc_info.value.status_code == 429
+    assert exc_info.value.headers["Retry-After"] == "1"
+
+    with pytest.raises(HTTPException) as exc_info:
+        async with admission.verification_slot("login"):
+            async with admission.verification_slot("login"):
+                pass
+    assert exc_info.value.status_code == 503
+    assert admission.verifications == 0
@@ -0,0 +1,51 @@
+from core.city_index import CityIndex, CityTrie, normalize_city
+
+
+def make_trie(max_results: int = 5) -> CityTrie:
+    return CityTrie(
+        [("Newark", 3), ("New York", 10), ("Yonkers", 1), ("Sankt Sebastian", 2)],
+        max_results)
+
+
+def test_suggestions_are_ranked_by_route_count():
+    """Test that prefix matches are returned with the most served city first."""
+    trie = make_trie()
+
+    assert trie.suggest("new", 5) == [("New York", 10), ("Newark", 3)]
+    assert trie.suggest("  NEW   y", 5) == [("New York", 10)]
+    assert trie.suggest("x", 5) == []
+
+
+def test_every_word_is_indexed_once():
+    """Test that later words of a name match, without duplicate suggestions."""
+    trie = make_trie()
+
+    assert trie.suggest("yo", 5) == [("New York", 10), ("Yonkers", 1)]
+    assert trie.suggest("s", 5) == [("Sankt Sebastian", 2)]
+
+
+def test_limits():
+    """Test that the empty query returns the top cities and limits are honoured."""
+    trie = make_trie(max_results=2)
+
+    assert trie.suggest("", 10) == [("New York", 10), ("Newark", 3)]
+    assert trie.suggest("", 1) == [("New York", 10)]
+    assert len(trie) == 4
+
+
+def test_normalize_city():
+    """Test that names are case-folded and their whitespace collapsed."""
+    assert normalize_city("  Saint\tPetersburg ") == "saint petersburg"
+    assert normalize_city("Straße") == normalize_city("STRASSE") == "strasse"
+
+
+def test_index_update_applies_changed_cities():
+    """Test that route count changes are applied in memory and unserved cities dropped."""
+    index = CityIndex(5)
+    index.update({"New York": 10, "Newark": 3, "Yonkers": 1})
+
+    index.update({"Newark": 12, "Yonkers": 0, "New Haven": 2})
+
+    assert index.suggest("new", 5) == [("Newark", 12), ("New York", 10), ("New Haven", 2)]
+    assert index.suggest("yo", 5) == [("New York", 10)]
+    assert len(index) == 3
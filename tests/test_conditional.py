@@ -0,0 +1,65 @@
+from datetime import datetime
+
+from fastapi import Request
+
+from core.conditional import is_not_modified, make_etag, not_modified
+
+LAST_MODIFIED = datetime(2025, 5, 1, 12, 0, 0, 500000)
+
+
+def make_request(**headers: str) -> Request:
+    return Request({
+        "type": "http",
+        "headers": [
+            (name.replace("_", "-").encode(), value.encode())
+            for name, value in headers.items()
+        ],
+    })
+
+
+def test_etag_depends_on_every_part():
+    """Test that ETags are weak and change with any of their parts."""
+    assert make_etag("route", 1) == make_etag("route", 1)
+    assert make_etag("route", 1) != make_etag("route", 2)
+    assert make_etag("route", 1).startswith('W/"')
+
+
+def test_if_none_match():
+    """Test weak comparison, lists of tags and the wildcard."""
+    etag = make_etag("route", 1)
+
+    assert is_not_modified(make_request(if_none_match=etag), etag)
+    assert is_not_modified(make_request(if_none_match=etag.removeprefix("W/")), etag)
+    assert is_not_modified(make_request(if_none_match=f'"other", {etag}'), etag)
+    assert is_not_modified(make_request(if_none_match="*"), etag)
+    assert not is_not_modified(make_request(if_none_match='"other"'), etag)
+    assert not is_not_modified(make_request(), etag)
+
+
+def test_if_modified_since():
+    """Test that If-Modified-Since is compared at second precision and ignored
+    when If-None-Match is present."""
+    etag = make_etag("route", 1)
+
+    assert is_not_modified(
+        make_request(if_modified_since="Thu, 01 May 2025 12:00:00 GMT"), etag, LAST_MODIFIED)
+    assert not is_not_modified(
+        make_request(if_modified_since="Thu, 01 May 2025 11:59:59 GMT"), etag, LAST_MODIFIED)
+    assert not is_not_modified(
+        make_request(if_modified_since="garbage"), etag, LAST_MODIFIED)
+    assert not is_not_modified(
+        make_request(
+            if_none_match='"other"', if_modified_since="Thu, 01 May 2025 12:00:00 GMT"),
+        etag, LAST_MODIFIED)
+
+
+def test_not_modified_response():
+    """Test that the 304 response has no body and carries the validators."""
+    etag = make_etag("route", 1)
+
+    response = not_modified(etag, LAST_MODIFIED)
+
+    assert response.status_code == 304
+    assert response.body == b""
+    assert response.headers["etag"] == etag
+    assert response.headers["last-modified"] == "Thu, 01 May 2025 12:00:00 GMT"
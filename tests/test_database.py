@@ -0,0 +1,38 @@
+from sqlalchemy.dialects import postgresql
+
+import models  # noqa: F401 (registers the tables on Base.metadata)
+from core.database import UPGRADE_COLUMNS, Base, _add_column_statement
+
+
+def _statement(table_name: str, column_name: str) -> str:
+    column = Base.metadata.tables[table_name].c[column_name]
+    return _add_column_statement(column, postgresql.dialect())
+
+
+def test_upgrade_columns_exist_on_models():
+    """Test that every upgrade column is declared on its model."""
+    for table_name, column_name in UPGRADE_COLUMNS:
+        assert column_name in Base.metadata.tables[table_name].c
+
+
+def test_add_column_statement_is_idempotent():
+    """Test that added columns are skipped when they already exist."""
+    assert _statement("users", "tokens_valid_after") == (
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS "
+        "tokens_valid_after TIMESTAMP WITHOUT TIME ZONE"
+    )
+
+
+def test_add_column_statement_fills_existing_rows():
+    """Test that a server default gives existing rows a value for a NOT NULL column."""
+    assert _statement("routes", "version") == (
+        "ALTER TABLE routes ADD COLUMN IF NOT EXISTS version INTEGER DEFAULT '1' NOT NULL"
+    )
+
+
+def test_add_column_statement_includes_foreign_key():
+    """Test that an added foreign key column references its table with its ON DELETE rule."""
+    assert _statement("departures", "timetable_pattern_id") == (
+        "ALTER TABLE departures ADD COLUMN IF NOT EXISTS timetable_pattern_id UUID "
+        "REFERENCES timetable_patterns (id) ON DELETE SET NULL"
+    )
@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from core.config import settings
+from core.departure_timer import DepartureTimer
+from models import Departure, DepartureStatus
+
+
+def test_pop_due_respects_threshold():
+    """Test that a departure fires only once its delay threshold has passed."""
+    timer = DepartureTimer()
+    departure_id = uuid4()
+    departure_time = datetime(2030, 1, 1, 8, 0, tzinfo=timezone.utc)
+    timer.schedule(departure_id, departure_time)
+
+    threshold = departure_time + timedelta(minutes=settings.schedule_delay_minutes)
+
+    assert timer.pop_due(threshold.timestamp() - 1) == []
+    assert timer.pop_due(threshold.timestamp()) == [departure_id]
+    assert len(timer) == 0
+
+
+def test_reschedule_and_cancel_drop_stale_entries():
+    """Test that rescheduled and cancelled departures don't fire at their old time."""
+    timer = DepartureTimer()
+    moved, cancelled = uuid4(), uuid4()
+    departure_time = datetime(2030, 1, 1, 8, 0, tzinfo=timezone.utc)
+    timer.schedule(moved, departure_time)
+    timer.schedule(cancelled, departure_time)
+
+    timer.schedule(moved, departure_time + timedelta(hours=2))
+    timer.cancel(cancelled)
+
+    first_threshold = departure_time + timedelta(
+        minutes=settings.schedule_delay_minutes, hours=1)
+    assert timer.pop_due(first_threshold.timestamp()) == []
+    assert timer.pop_due(
+        (first_threshold + timedelta(hours=1)).timestamp()) == [moved]
+
+
+def test_schedule_departures_keeps_only_the_horizon():
+    """Test that departures beyond the horizon are not kept, and are dropped when moved there."""
+    timer = DepartureTimer()
+    soon = Departure(
+        id=uuid4(), status=DepartureStatus.SCHEDULED,
+        departure_time=datetime.now(timezone.utc) + timedelta(hours=1))
+    later = Departure(
+        id=uuid4(), status=DepartureStatus.SCHEDULED,
+        departure_time=datetime.now(timezone.utc) + timedelta(
+            hours=settings.departure_timer_horizon_hours + 1))
+
+    timer.schedule_departures([soon, later])
+    assert len(timer) == 1
+
+    soon.departure_time = later.departure_time
+    timer.schedule_departures([soon])
+    assert len(timer) == 0
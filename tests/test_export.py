@@ -0,0 +1,57 @@
+import csv
+import io
+import json
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy.dialects import postgresql
+
+from core.export import EXPORT_FIELDS, departure_export_query, format_csv, format_ndjson
+from models import DepartureStatus
+
+DEPARTURE_ROW = (
+    uuid.UUID("00000000-0000-0000-0000-000000000001"),
+    uuid.UUID("00000000-0000-0000-0000-000000000002"),
+    "R-1", "Kyiv", "Lviv", None, None,
+    datetime(2026, 1, 5, 8, 0, tzinfo=timezone.utc),
+    datetime(2026, 1, 5, 14, 0, tzinfo=timezone.utc),
+    DepartureStatus.SCHEDULED, False, False, "Platform 3, \"north\"",
+)
+
+
+def test_format_ndjson_writes_one_object_per_line():
+    """Test that every row becomes one JSON object with plain values."""
+    lines = format_ndjson([DEPARTURE_ROW, DEPARTURE_ROW]).splitlines()
+
+    assert len(lines) == 2
+    item = json.loads(lines[0])
+    assert list(item) == list(EXPORT_FIELDS)
+    assert item["id"] == "00000000-0000-0000-0000-000000000001"
+    assert item["departure_time"] == "2026-01-05T08:00:00+00:00"
+    assert item["status"] == "SCHEDULED"
+    assert item["bus_id"] is None
+
+
+def test_format_csv_quotes_values_and_writes_header_once():
+    """Test that chunks concatenate into one valid CSV document."""
+    document = format_csv([], header=True) + format_csv([DEPARTURE_ROW]) + format_csv([DEPARTURE_ROW])
+
+    rows = list(csv.reader(io.StringIO(document)))
+    assert rows[0] == list(EXPORT_FIELDS)
+    assert len(rows) == 3
+    assert rows[1][EXPORT_FIELDS.index("notes")] == 'Platform 3, "north"'
+    assert rows[1][EXPORT_FIELDS.index("status")] == "SCHEDULED"
+
+
+def test_departure_export_query_applies_filters():
+    """Test that the time range and route filters end up in the query."""
+    stmt = departure_export_query(
+        datetime(2026, 1, 1, tzinfo=timezone.utc), datetime(2026, 2, 1, tzinfo=timezone.utc),
+        uuid.uuid4())
+
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert "departures.departure_time >= " in sql
+    assert "departures.departure_time < " in sql
+    assert "departures.route_id = " in sql
+    assert "LEFT OUTER JOIN buses" in sql
+    assert sql.endswith("ORDER BY departures.departure_time, departures.id")
@@ -0,0 +1,90 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from core.journey_planner import ConnectionTable, build_trip
+from schemas.journey import JourneyPlanResponse
+
+DAY = datetime(2030, 1, 1, tzinfo=timezone.utc)
+MINUTE = 60
+
+
+def at(hour: int, minute: int = 0) -> datetime:
+    return DAY + timedelta(hours=hour, minutes=minute)
+
+
+def trip(route_number: str, departure: datetime, arrival: datetime, *cities: str):
+    stops = [(city, index * 100, 0) for index, city in enumerate(cities)]
+    return build_trip(
+        uuid.uuid4(), uuid.uuid4(), route_number, departure, arrival,
+        (len(cities) - 1) * 100, stops)
+
+
+def plan(table: ConnectionTable, origin: str, destination: str, min_transfer: int = 15):
+    return table.scan(
+        table.city_id(origin), table.city_id(destination), DAY.timestamp(),
+        min_transfer=min_transfer * MINUTE, max_legs=4, max_duration=48 * 3600)
+
+
+def test_transfer_beats_slow_direct_trip():
+    """Test that a faster two-leg journey is returned next to the direct one."""
+    table = ConnectionTable([
+        trip("DIRECT", at(8), at(20), "Kyiv", "Lviv"),
+        trip("K-R", at(8), at(12), "Kyiv", "Rivne"),
+        trip("R-L", at(12, 30), at(15), "Rivne", "Lviv"),
+    ])
+
+    direct, with_transfer = plan(table, "kyiv", "LVIV")
+
+    assert direct.transfers == 0 and direct.arrival_time == at(20)
+    assert with_transfer.transfers == 1 and with_transfer.arrival_time == at(15)
+    assert [leg.route_number for leg in with_transfer.legs] == ["K-R", "R-L"]
+    assert with_transfer.legs[0].to_city == "Rivne"
+
+
+def test_minimum_transfer_time_is_respected():
+    """Test that a connection leaving too soon after the arrival is not used."""
+    table = ConnectionTable([
+        trip("K-R", at(8), at(12), "Kyiv", "Rivne"),
+        trip("R-L tight", at(12, 10), at(14), "Rivne", "Lviv"),
+        trip("R-L", at(12, 20), at(15), "Rivne", "Lviv"),
+    ])
+
+    [itinerary] = plan(table, "Kyiv", "Lviv")
+
+    assert itinerary.legs[-1].route_number == "R-L"
+    assert plan(table, "Kyiv", "Lviv", min_transfer=5)[0].arrival_time == at(14)
+
+
+def test_staying_on_board_through_intermediate_stops():
+    """Test that riding through a stop is one leg and intermediate stops are timed."""
+    table = ConnectionTable([trip("K-Z-R-L", at(8), at(14), "Kyiv", "Zhytomyr", "Rivne", "Lviv")])
+
+    [itinerary] = plan(table, "Zhytomyr", "Lviv")
+
+    assert itinerary.transfers == 0
+    assert itinerary.departure_time == at(10)
+    assert itinerary.arrival_time == at(14)
+
+
+def test_no_connection_and_unknown_city():
+    """Test that unconnected and unknown cities give no itineraries."""
+    table = ConnectionTable([
+        trip("L-K", at(8), at(12), "Lviv", "Kyiv"),
+        trip("O-D", at(8), at(12), "Odesa", "Dnipro"),
+    ])
+
+    assert plan(table, "Kyiv", "Lviv") == []
+    assert table.city_id("Kharkiv") is None
+
+
+def test_plan_response_schema():
+    """Test that planned itineraries fit the journey plan response schema."""
+    table = ConnectionTable([trip("K-L", at(8), at(14), "Kyiv", "Lviv")])
+    itineraries = plan(table, "Kyiv", "Lviv")
+
+    response = JourneyPlanResponse(
+        origin="Kyiv", destination="Lviv", earliest_arrival=itineraries[-1],
+        fewest_transfers=itineraries[0], itineraries=itineraries)
+
+    assert response.earliest_arrival.legs[0].route_number == "K-L"
+    assert response.itineraries[0].transfers == 0
@@ -0,0 +1,33 @@
+import time
+from datetime import timedelta
+
+from auth.jwt_utils import JWTManager
+
+
+def test_verified_tokens_are_cached_up_to_the_size_limit():
+    """Test that repeated verifications hit the cache and the cache stays bounded."""
+    manager = JWTManager()
+    manager.verified_cache_size = 2
+    tokens = [manager.create_access_token({"user_id": str(i)}) for i in range(3)]
+
+    for token in tokens:
+        assert manager.verify_token(token)["type"] == "access"
+    claims = manager.verify_token(tokens[2])
+    claims["user_id"] = "changed"
+
+    assert manager.verify_token(tokens[2])["user_id"] == "2"
+    assert manager.verified_cache_stats() == {
+        "size": 2, "max_size": 2, "hits": 2, "misses": 3}
+
+
+def test_cached_token_is_evicted_at_expiry():
+    """Test that a cached token is rejected once it has expired."""
+    manager = JWTManager()
+    token = manager.create_access_token(
+        {"user_id": "1"}, expires_delta=timedelta(seconds=1))
+
+    assert manager.verify_token(token) is not None
+    time.sleep(1.1)
+
+    assert manager.verify_token(token) is None
+    assert manager.verified_cache_stats()["size"] == 0
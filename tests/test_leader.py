@@ -0,0 +1,22 @@
+import pytest
+
+from core.leader import leader_election
+from core.scheduler import leader_only
+
+
+@pytest.mark.asyncio
+async def test_leader_only_job_skipped_in_follower(monkeypatch):
+    """Test that leader-only jobs don't run in a worker that isn't the leader."""
+    calls = []
+
+    @leader_only
+    async def job():
+        calls.append(1)
+        return "ran"
+
+    monkeypatch.setattr(leader_election, "is_leader", False)
+    assert await job() is None
+
+    monkeypatch.setattr(leader_election, "is_leader", True)
+    assert await job() == "ran"
+    assert calls == [1]
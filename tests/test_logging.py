@@ -0,0 +1,33 @@
+import logging
+import queue
+
+from core.logging import DroppingQueueHandler
+
+
+def _record(level: int) -> logging.LogRecord:
+    return logging.makeLogRecord({"levelno": level, "msg": "message"})
+
+
+def test_full_queue_drops_without_blocking():
+    """Test that records are dropped and counted once the queue is full."""
+    log_queue = queue.Queue(maxsize=2)
+    handler = DroppingQueueHandler(log_queue, high_water=2, sample_rate=1)
+
+    for _ in range(5):
+        handler.enqueue(_record(logging.WARNING))
+
+    assert log_queue.qsize() == 2
+    assert handler.dropped == 3
+
+
+def test_backlog_samples_low_level_records():
+    """Test that above the high water mark only warnings and sampled records are kept."""
+    log_queue = queue.Queue(maxsize=100)
+    handler = DroppingQueueHandler(log_queue, high_water=0, sample_rate=5)
+
+    for _ in range(10):
+        handler.enqueue(_record(logging.INFO))
+    handler.enqueue(_record(logging.ERROR))
+
+    assert handler.dropped == 8
+    assert log_queue.qsize() == 3
@@ -0,0 +1,43 @@
+import pytest
+
+from core.metrics import Metric, MetricsRegistry
+
+
+def test_counter_and_gauge_render_in_prometheus_text_format():
+    """Test that counters and callback gauges render as Prometheus samples."""
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests.", ("route", "status"))
+    registry.gauge("pool_size", "Pool size.", ("pool",), callback=lambda: {("primary",): 5})
+
+    requests.inc("/api/routes/{route_id}", "200")
+    requests.inc("/api/routes/{route_id}", "200")
+
+    text = registry.render()
+
+    assert "# TYPE requests_total counter" in text
+    assert 'requests_total{route="/api/routes/{route_id}",status="200"} 2' in text
+    assert 'pool_size{pool="primary"} 5' in text
+    assert text.endswith("\n")
+
+
+def test_histogram_buckets_are_cumulative():
+    """Test that histogram buckets, sum and count follow the exposition format."""
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+
+    for value in (0.05, 0.5, 0.5, 3.0):
+        latency.observe(value, "/")
+
+    lines = registry.render().splitlines()
+
+    assert 'latency_seconds_bucket{route="/",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{route="/",le="1"} 3' in lines
+    assert 'latency_seconds_bucket{route="/",le="+Inf"} 4' in lines
+    assert 'latency_seconds_sum{route="/"} 4.05' in lines
+    assert 'latency_seconds_count{route="/"} 4' in lines
+
+
+def test_metric_base_class_is_abstract():
+    """Test that metrics must implement samples."""
+    with pytest.raises(TypeError):
+        Metric("base", "No samples.")
@@ -0,0 +1,41 @@
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from core.pagination import decode_cursor, encode_cursor
+from models import Departure, Route
+
+
+def test_cursor_round_trip():
+    """Test that a datetime and UUID sort key survives encoding, without padding."""
+    columns = (Departure.departure_time, Departure.id)
+    keys = [datetime(2025, 5, 1, 8, 30, tzinfo=timezone.utc), uuid.uuid4()]
+
+    cursor = encode_cursor(keys, "prev")
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor, columns) == (keys, "prev")
+
+
+def test_cursor_round_trip_string_key():
+    """Test that a string and UUID sort key survives encoding."""
+    columns = (Route.route_number, Route.id)
+    keys = ["R-100", uuid.uuid4()]
+
+    assert decode_cursor(encode_cursor(keys, "next"), columns) == (keys, "next")
+
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor",
+    encode_cursor(["R-100"], "next"),
+    encode_cursor(["R-100", str(uuid.uuid4())], "sideways"),
+    encode_cursor(["R-100", "not-a-uuid"], "next"),
+])
+def test_invalid_cursor_is_rejected(cursor):
+    """Test that malformed cursors are rejected with a 400."""
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor(cursor, (Route.route_number, Route.id))
+
+    assert exc_info.value.status_code == 400
@@ -0,0 +1,54 @@
+import asyncio
+import threading
+
+import pytest
+
+from auth.pass_utils import PasswordUtils
+
+
+def test_needs_rehash_when_cost_factor_changes():
+    """Test that hashes made with another cost factor are flagged for rehashing."""
+    old = PasswordUtils(rounds=4, workers=1)
+    new = PasswordUtils(rounds=5, workers=1)
+    hashed = old.hash_password("password123")
+
+    assert not old.needs_rehash(hashed)
+    assert new.needs_rehash(hashed)
+    assert new.verify_password("password123", hashed)
+
+
+@pytest.mark.asyncio
+async def test_async_hash_and_verify_run_on_the_worker_pool():
+    """Test that the async variants hash and verify without leaving work queued."""
+    pwd = PasswordUtils(rounds=4, workers=2)
+
+    hashed = await pwd.hash_password_async("password123")
+    results = await asyncio.gather(
+        pwd.verify_password_async("password123", hashed),
+        pwd.verify_password_async("wrong", hashed),
+        pwd.verify_password_async("password123", hashed),
+    )
+
+    assert results == [True, False, True]
+    assert pwd.queued == 0
+    assert pwd.running == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_call_leaves_the_queue():
+    """Test that a call cancelled before a worker picked it up is not counted as queued."""
+    pwd = PasswordUtils(rounds=4, workers=1)
+    release = threading.Event()
+    busy = asyncio.create_task(pwd._run(release.wait, 5))
+    waiting = asyncio.create_task(pwd._run(pwd.hash_password, "password123"))
+    await asyncio.sleep(0.05)
+    assert pwd.queued == 1
+
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    release.set()
+    await busy
+
+    assert pwd.queued == 0
+    assert pwd.running == 0
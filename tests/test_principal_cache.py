@@ -0,0 +1,39 @@
+import uuid
+
+from models import UserRole
+from auth.principal_cache import Principal, PrincipalCache
+
+
+def make_principal() -> Principal:
+    return Principal(
+        id=uuid.uuid4(), username="user", role=UserRole.CUSTOMER, is_active=True)
+
+
+def test_lru_eviction_and_counters():
+    """Test that the least recently used principal is evicted and lookups are counted."""
+    cache = PrincipalCache(max_size=2, ttl_seconds=60)
+    first, second, third = make_principal(), make_principal(), make_principal()
+
+    cache.set(first)
+    cache.set(second)
+    assert cache.get(first.id) == first
+    cache.set(third)
+
+    assert cache.get(second.id) is None
+    assert cache.get(first.id) == first
+    assert cache.get(third.id) == third
+    assert cache.stats() == {"size": 2, "max_size": 2, "hits": 3, "misses": 1}
+
+
+def test_expired_and_invalidated_entries_are_misses():
+    """Test that expired and invalidated principals are not returned."""
+    cache = PrincipalCache(max_size=10, ttl_seconds=0)
+    principal = make_principal()
+    cache.set(principal)
+    assert cache.get(principal.id) is None
+
+    cache.ttl_seconds = 60
+    cache.set(principal)
+    cache.invalidate(principal.id)
+    assert cache.get(principal.id) is None
+    assert len(cache) == 0
@@ -0,0 +1,24 @@
+from core.query_stats import QueryStats, statement_shape
+
+
+def test_statement_shape_ignores_parameter_lists():
+    """Test that IN lists of different length share one statement shape."""
+    short = "SELECT departures.id FROM departures WHERE departures.id IN ($1, $2)"
+    long = "SELECT departures.id\nFROM departures WHERE departures.id IN ($1, $2, $3, $4)"
+
+    assert statement_shape(short) == statement_shape(long)
+
+
+def test_repeated_shapes_above_threshold():
+    """Test that only shapes executed more than the threshold are reported."""
+    stats = QueryStats()
+    for _ in range(4):
+        stats.record("SELECT * FROM departures WHERE departures.id = $1::UUID", 0.001)
+    stats.record("SELECT * FROM buses WHERE buses.id = $1::UUID", 0.001)
+
+    repeated = stats.repeated_shapes(threshold=3)
+
+    assert stats.count == 5
+    assert len(repeated) == 1
+    assert repeated[0][1] == 4
+    assert stats.server_timing().endswith('desc="5 queries"')
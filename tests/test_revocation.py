@@ -0,0 +1,40 @@
+import time
+import uuid
+
+from models import UserRole
+from auth.principal_cache import Principal
+from auth.revocation import BloomFilter, RevocationStore
+
+
+def test_bloom_filter_has_no_false_negatives():
+    """Test that every added value is reported as possibly present."""
+    bloom = BloomFilter(size_bits=1 << 12, hashes=4)
+    values = [uuid.uuid4().hex for _ in range(200)]
+    for value in values:
+        bloom.add(value)
+
+    assert all(bloom.might_contain(value) for value in values)
+    assert not BloomFilter(1 << 12, 4).might_contain(values[0])
+
+
+def test_prune_drops_expired_revocations():
+    """Test that expired token IDs are no longer reported as revoked after pruning."""
+    store = RevocationStore(bloom_bits=1 << 12, bloom_hashes=4)
+    store._add("live", time.time() + 60)
+    store._add("expired", time.time() - 1)
+
+    assert store.is_revoked("live") and store.is_revoked("expired")
+    assert not store.is_revoked("other") and not store.is_revoked(None)
+    assert store.prune() == 1
+    assert store.is_revoked("live") and not store.is_revoked("expired")
+
+
+def test_tokens_issued_before_watermark_are_rejected():
+    """Test the per-user tokens_valid_after watermark."""
+    principal = Principal(
+        id=uuid.uuid4(), username="user", role=UserRole.CUSTOMER,
+        is_active=True, tokens_valid_after=1000.0)
+
+    assert not principal.accepts_token_issued_at(999)
+    assert not principal.accepts_token_issued_at(None)
+    assert principal.accepts_token_issued_at(1000)
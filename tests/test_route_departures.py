@@ -0,0 +1,192 @@
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from models import Departure, Route, TimetablePattern
+from routers.utils import (
+    _arrival_time, _delete_unsubmitted_departures, _resolve_submitted_departures,
+    _update_submitted_departures, reconcile_route_departures
+)
+from schemas.route import DepartureUpdate
+
+DEPARTURE_TIME = datetime(2030, 1, 5, 8, 0, tzinfo=timezone.utc)
+
+
+def compile_sql(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.asyncpg.dialect()))
+
+
+def test_departure_update_accepts_id_and_legacy_index():
+    """Test that existing departures can be referenced by ID or by the deprecated index."""
+    departure_id = uuid4()
+    by_id = DepartureUpdate(id=str(departure_id), departure_time="2026-01-05T08:00:00Z")
+    legacy = DepartureUpdate(original_index=0, departure_time="2026-01-05T08:00:00Z")
+
+    assert by_id.id == departure_id
+    assert by_id.original_index is None
+    assert legacy.id is None
+    assert legacy.original_index == 0
+
+
+def test_arrival_time_defaults_to_route_duration():
+    """Test that a missing arrival time is the departure time plus the route duration."""
+    dep = DepartureUpdate(departure_time=datetime(2026, 1, 5, 8, 0))
+
+    assert _arrival_time(dep, 90) == datetime(2026, 1, 5, 9, 30, tzinfo=timezone.utc)
+
+
+def test_arrival_time_keeps_submitted_value():
+    """Test that a submitted arrival time is kept as is."""
+    arrival = datetime(2026, 1, 5, 12, 0, tzinfo=timezone.utc)
+    dep = DepartureUpdate(departure_time=datetime(2026, 1, 5, 8, 0), arrival_time=arrival)
+
+    assert _arrival_time(dep, 90) == arrival
+
+
+def test_resolve_submitted_departures_by_id_and_index():
+    """Test that IDs and legacy indexes map to existing departures and the rest are new."""
+    first, second = uuid4(), uuid4()
+    by_id = DepartureUpdate(id=second, departure_time=DEPARTURE_TIME)
+    by_index = DepartureUpdate(original_index=0, departure_time=DEPARTURE_TIME)
+    new = DepartureUpdate(original_index=-1, departure_time=DEPARTURE_TIME)
+
+    existing, created = _resolve_submitted_departures([by_id, by_index, new], [first, second])
+
+    assert existing == {second: by_id, first: by_index}
+    assert created == [new]
+
+
+@pytest.mark.parametrize("submitted", [
+    [DepartureUpdate(original_index=2, departure_time=DEPARTURE_TIME)],
+    [
+        DepartureUpdate(original_index=0, departure_time=DEPARTURE_TIME),
+        DepartureUpdate(original_index=0, departure_time=DEPARTURE_TIME),
+    ],
+])
+def test_resolve_submitted_departures_rejects_bad_references(submitted):
+    """Test that out-of-range indexes and departures submitted twice are rejected."""
+    with pytest.raises(HTTPException) as exc_info:
+        _resolve_submitted_departures(submitted, [uuid4(), uuid4()])
+
+    assert exc_info.value.status_code == 400
+
+
+def test_resolve_submitted_departures_rejects_id_and_index_of_same_departure():
+    """Test that a departure referenced by ID and by index is a duplicate."""
+    departure_id = uuid4()
+    submitted = [
+        DepartureUpdate(id=departure_id, departure_time=DEPARTURE_TIME),
+        DepartureUpdate(original_index=0, departure_time=DEPARTURE_TIME),
+    ]
+
+    with pytest.raises(HTTPException) as exc_info:
+        _resolve_submitted_departures(submitted, [departure_id])
+
+    assert exc_info.value.status_code == 400
+
+
+def test_delete_statement_keeps_pattern_departures():
+    """Test that the DELETE skips generated departures and binds the kept IDs as one array."""
+    kept_ids = [uuid4() for _ in range(5000)]
+    stmt = _delete_unsubmitted_departures(uuid4(), kept_ids)
+    compiled = stmt.compile(dialect=postgresql.asyncpg.dialect())
+
+    sql = str(compiled)
+    assert "departures.timetable_pattern_id IS NULL" in sql
+    assert "departures.id != ALL ($2::UUID[])" in sql
+    assert compiled.params["kept_ids"] == kept_ids
+
+
+def test_update_statement_joins_submitted_values():
+    """Test that the UPDATE reads the batch from a VALUES list and stays on the route."""
+    rows = [(uuid4(), DEPARTURE_TIME, DEPARTURE_TIME + timedelta(hours=2), None)]
+
+    sql = compile_sql(_update_submitted_departures(uuid4(), rows))
+
+    assert sql.startswith("UPDATE departures SET departure_time=submitted.departure_time")
+    assert "FROM (VALUES (" in sql
+    assert "departures.id = submitted.id AND departures.route_id = " in sql
+    assert "RETURNING departures.id, departures.departure_time, departures.status" in sql
+
+
+async def create_route(session: AsyncSession) -> Route:
+    route = Route(
+        id=uuid.uuid4(), route_number=f"T-{uuid.uuid4().hex[:8]}",
+        origin_city="Kyiv", destination_city="Lviv",
+        distance_km=540, duration_minutes=360, base_price=20.0)
+    session.add(route)
+    await session.flush()
+    return route
+
+
+def add_departure(
+        session: AsyncSession, route: Route, hours: int,
+        pattern: TimetablePattern | None = None) -> Departure:
+    departure = Departure(
+        id=uuid.uuid4(), route_id=route.id,
+        departure_time=DEPARTURE_TIME + timedelta(hours=hours),
+        timetable_pattern_id=pattern.id if pattern else None)
+    session.add(departure)
+    return departure
+
+
+@pytest.mark.asyncio
+async def test_reconcile_route_departures(db_session: AsyncSession, monkeypatch):
+    """Test that departures are kept by ID or index, deleted, inserted and batched."""
+    monkeypatch.setattr(settings, "route_departure_batch_size", 1)
+    route = await create_route(db_session)
+    pattern = TimetablePattern(
+        id=uuid.uuid4(), route_id=route.id, departure_times=["08:00"],
+        weekdays=["monday"], valid_from=date(2030, 1, 1))
+    db_session.add(pattern)
+    await db_session.flush()
+    first = add_departure(db_session, route, 0)
+    second = add_departure(db_session, route, 1)
+    removed = add_departure(db_session, route, 2)
+    generated = add_departure(db_session, route, 3, pattern)
+    await db_session.flush()
+
+    changes = await reconcile_route_departures(route, [
+        DepartureUpdate(id=second.id, departure_time=DEPARTURE_TIME + timedelta(hours=5)),
+        DepartureUpdate(original_index=0, departure_time=DEPARTURE_TIME, notes="moved"),
+        DepartureUpdate(departure_time=DEPARTURE_TIME + timedelta(hours=6)),
+        DepartureUpdate(departure_time=DEPARTURE_TIME + timedelta(hours=7)),
+    ], db_session)
+
+    assert changes.deleted_ids == [removed.id]
+    assert {row.id for row in changes.updated} == {first.id, second.id}
+    assert len(changes.inserted) == 2
+
+    result = await db_session.execute(
+        select(Departure.id, Departure.arrival_time, Departure.notes)
+        .where(Departure.route_id == route.id))
+    rows = {row.id: row for row in result.all()}
+    assert set(rows) == {
+        first.id, second.id, generated.id, *(row.id for row in changes.inserted)}
+    assert rows[first.id].notes == "moved"
+    assert rows[second.id].arrival_time == DEPARTURE_TIME + timedelta(hours=11)
+
+    await db_session.rollback()
+
+
+@pytest.mark.asyncio
+async def test_reconcile_route_departures_rejects_unknown_ids(db_session: AsyncSession):
+    """Test that an ID of a departure of another route is a 400."""
+    route = await create_route(db_session)
+    other_route = await create_route(db_session)
+    other = add_departure(db_session, other_route, 0)
+    await db_session.flush()
+
+    with pytest.raises(HTTPException) as exc_info:
+        await reconcile_route_departures(
+            route, [DepartureUpdate(id=other.id, departure_time=DEPARTURE_TIME)], db_session)
+
+    assert exc_info.value.status_code == 400
+    await db_session.rollback()
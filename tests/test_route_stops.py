@@ -0,0 +1,34 @@
+import uuid
+
+from models import Route
+from routers.utils import route_stop_rows
+
+
+def test_route_stop_rows_are_ordered_by_distance():
+    """Test that the origin, stops by distance and destination become consecutive rows."""
+    route = Route(
+        id=uuid.uuid4(), origin_city="Kyiv", destination_city="Lviv", distance_km=540,
+        intermediate_stops=[
+            {"city": "Rivne", "stop_duration_minutes": 15, "distance_from_origin_km": 330},
+            {"city": "Zhytomyr", "stop_duration_minutes": 10, "distance_from_origin_km": 140},
+        ]
+    )
+
+    rows = route_stop_rows(route)
+
+    assert [(row["seq"], row["city"], row["offset_km"], row["dwell_minutes"]) for row in rows] == [
+        (0, "Kyiv", 0, 0),
+        (1, "Zhytomyr", 140, 10),
+        (2, "Rivne", 330, 15),
+        (3, "Lviv", 540, 0),
+    ]
+    assert all(row["route_id"] == route.id for row in rows)
+
+
+def test_route_without_intermediate_stops():
+    """Test that a route without stops gets only its origin and destination rows."""
+    route = Route(
+        id=uuid.uuid4(), origin_city="Kyiv", destination_city="Odesa",
+        distance_km=475, intermediate_stops=None)
+
+    assert [row["city"] for row in route_stop_rows(route)] == ["Kyiv", "Odesa"]
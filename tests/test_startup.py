@@ -0,0 +1,28 @@
+from core.config import settings
+from scripts.startup_profile import parse_importtime, profile_import
+
+
+def test_parse_importtime():
+    """Test that -X importtime lines are parsed with their nesting depth."""
+    output = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |     scripts\n"
+        "import time:      4000 |       9000 |   core.scheduler\n"
+    )
+
+    timings = parse_importtime(output)
+
+    assert [t.module for t in timings] == ["scripts", "core.scheduler"]
+    assert timings[0].depth == 2
+    assert timings[1].cumulative_us == 9000
+
+
+def test_cold_import_of_app_within_budget():
+    """Test that a cold import of main stays within the startup budget."""
+    timings, wall_seconds = profile_import("main")
+    modules = {t.module for t in timings}
+
+    assert wall_seconds < settings.startup_import_budget_seconds
+    # CLI-only dependencies must not be imported when serving the app
+    assert "typer" not in modules
+    assert "faker" not in modules
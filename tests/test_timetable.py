@@ -0,0 +1,62 @@
+from datetime import date, datetime, time, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+from pydantic import ValidationError
+
+from core.timetable import expand_pattern
+from schemas.timetable import TimetablePatternCreate
+
+UTC = ZoneInfo("UTC")
+
+
+def test_expand_pattern_weekdays_range_and_exceptions():
+    """Test that only the pattern's weekdays inside both date ranges, minus the
+    exceptions, get departures."""
+    departures = expand_pattern(
+        [time(18, 0), time(8, 30)], ["monday", "wednesday"],
+        valid_from=date(2030, 1, 1), valid_until=date(2030, 1, 31),
+        exceptions=[date(2030, 1, 9)],
+        start=date(2029, 12, 1), end=date(2030, 1, 16), tz=UTC,
+    )
+
+    # 2030-01-07 and 2030-01-14 are Mondays, 2030-01-02 and 2030-01-16 Wednesdays
+    assert departures == [
+        datetime(2030, 1, day, hour, minute, tzinfo=timezone.utc)
+        for day in (2, 7, 14, 16)
+        for hour, minute in ((8, 30), (18, 0))
+    ]
+
+
+def test_expand_pattern_local_time_across_dst():
+    """Test that times of day stay fixed in local time when DST starts."""
+    departures = expand_pattern(
+        [time(9, 0)], ["saturday", "sunday"],
+        valid_from=date(2030, 3, 30), valid_until=None, exceptions=[],
+        start=date(2030, 3, 30), end=date(2030, 3, 31), tz=ZoneInfo("Europe/Kyiv"),
+    )
+
+    assert [departure.hour for departure in departures] == [7, 6]
+
+
+def test_pattern_schema_normalizes_input():
+    """Test that pattern times and weekdays are normalized, sorted and deduplicated."""
+    pattern = TimetablePatternCreate(
+        departure_times=["18:00", "08:30:15", "18:00"],
+        weekdays=["Sunday", " monday"],
+        valid_from="2030-01-01",
+    )
+
+    assert pattern.departure_times == [time(8, 30), time(18, 0)]
+    assert pattern.weekdays == ["monday", "sunday"]
+
+
+@pytest.mark.parametrize("data", [
+    {"departure_times": [], "valid_from": "2030-01-01"},
+    {"departure_times": ["08:00"], "weekdays": ["funday"], "valid_from": "2030-01-01"},
+    {"departure_times": ["08:00"], "valid_from": "2030-01-02", "valid_until": "2030-01-01"},
+])
+def test_pattern_schema_rejects_invalid_patterns(data):
+    """Test that patterns without times, with unknown weekdays or reversed dates are rejected."""
+    with pytest.raises(ValidationError):
+        TimetablePatternCreate(**data)